@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Agent, CallRecording, CallAnalysis, Report, TrainingSession
+from .models import Agent, AgentDailyStats, LeaderboardEntry, CallRecording, ProcessingJob, TranscriptionRequest, UploadSession, LLMCacheEntry, CallAnalysis, Report, TrainingSession
 
 # Register your models here.
 
@@ -9,13 +9,56 @@ class AgentAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'employee_id', 'department')
     list_filter = ('department', 'hire_date')
 
+@admin.register(AgentDailyStats)
+class AgentDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('agent', 'date', 'call_count', 'score_sum', 'compliant_calls', 'total_duration_seconds')
+    search_fields = ('agent__user__username', 'agent__employee_id')
+    list_filter = ('date',)
+    date_hierarchy = 'date'
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ('agent', 'period', 'period_start', 'rank', 'department', 'department_rank', 'call_count', 'avg_score')
+    search_fields = ('agent__user__username', 'agent__employee_id', 'department')
+    list_filter = ('period', 'department')
+    ordering = ('period', '-period_start', 'rank')
+
 @admin.register(CallRecording)
 class CallRecordingAdmin(admin.ModelAdmin):
     list_display = ('title', 'agent', 'customer_phone', 'uploaded_at', 'duration_seconds', 'status')
-    search_fields = ('title', 'agent__user__username', 'customer_phone')
+    search_fields = ('title', 'agent__user__username', 'customer_phone', 'audio_sha256')
     list_filter = ('status', 'uploaded_at')
     date_hierarchy = 'uploaded_at'
 
+@admin.register(ProcessingJob)
+class ProcessingJobAdmin(admin.ModelAdmin):
+    list_display = ('call_recording', 'status', 'attempts', 'worker_id', 'lease_expires_at', 'created_at', 'finished_at')
+    search_fields = ('call_recording__title', 'worker_id')
+    list_filter = ('status', 'created_at')
+    date_hierarchy = 'created_at'
+    readonly_fields = ('last_error',)
+
+@admin.register(TranscriptionRequest)
+class TranscriptionRequestAdmin(admin.ModelAdmin):
+    list_display = ('transcript_id', 'call_recording', 'engine', 'status', 'submitted_at', 'notified_at', 'completed_at')
+    search_fields = ('transcript_id', 'call_recording__title')
+    list_filter = ('status', 'engine', 'submitted_at')
+    readonly_fields = ('error',)
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'agent', 'status', 'received_bytes', 'total_size', 'created_at', 'expires_at')
+    search_fields = ('filename', 'title', 'agent__user__username', 'sha256')
+    list_filter = ('status', 'created_at')
+    readonly_fields = ('temp_path', 'error')
+
+@admin.register(LLMCacheEntry)
+class LLMCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('cache_key', 'model_name', 'prompt_version', 'hit_count', 'created_at', 'last_accessed_at', 'expires_at')
+    search_fields = ('cache_key', 'model_name')
+    list_filter = ('model_name', 'prompt_version')
+    readonly_fields = ('response',)
+
 @admin.register(CallAnalysis)
 class CallAnalysisAdmin(admin.ModelAdmin):
     list_display = ('call_recording', 'agent', 'coverage_score', 'sentiment', 'confidence_score', 'created_at')
@@ -0,0 +1,324 @@
+import logging
+import os
+import struct
+
+logger = logging.getLogger(__name__)
+
+# Bytes scanned for the first MPEG frame after any ID3v2 tag
+MP3_SYNC_SCAN_SIZE = 64 * 1024
+
+# Bitrates in kbps indexed by [version group][layer][bitrate index]
+MP3_BITRATES = {
+    'mpeg1': {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    'mpeg2': {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000],   # MPEG 2.5
+}
+
+MP3_VERSIONS = {3: 'mpeg1', 2: 'mpeg2', 0: 'mpeg2'}
+
+MP3_LAYERS = {3: 1, 2: 2, 1: 3}
+
+def probe_audio(file_obj):
+    """
+    Read the format, duration, sample rate, channels and bitrate of an audio file.
+
+    Only the container and frame headers are parsed; no samples are decoded
+    and only a few kilobytes at the start of the file are read, regardless of
+    its size. Supports MP3 (CBR, and VBR with a Xing/Info or VBRI header),
+    WAV and FLAC.
+
+    Args:
+        file_obj: Seekable binary file object; its position is restored afterwards
+
+    Returns:
+        dict: format, duration (seconds), sample_rate, channels and bitrate
+            (kbps), or None if the format is not recognised
+    """
+    position = file_obj.tell()
+    try:
+        size = _file_size(file_obj)
+        file_obj.seek(0)
+        start = skip_id3v2(file_obj)
+        head = file_obj.read(12)
+
+        if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+            return _probe_wav(file_obj, size)
+        if head[:4] == b'fLaC':
+            return _probe_flac(file_obj, start, size)
+        return _probe_mp3(file_obj, start, size)
+    except (OSError, ValueError, struct.error) as e:
+        logger.debug(f"Could not probe audio file: {str(e)}")
+        return None
+    finally:
+        file_obj.seek(position)
+
+
+def recording_metadata(file_obj):
+    """
+    Probe an uploaded recording and return the matching CallRecording field values.
+
+    Returns:
+        dict: duration_seconds, sample_rate, channels, bitrate and audio_format,
+            or an empty dict if the file could not be probed
+    """
+    try:
+        info = probe_audio(file_obj)
+    except Exception as e:
+        logger.warning(f"Exception while probing audio file: {str(e)}")
+        info = None
+
+    if not info:
+        return {}
+
+    return {
+        'duration_seconds': int(round(info['duration'])),
+        'sample_rate': info['sample_rate'],
+        'channels': info['channels'],
+        'bitrate': info['bitrate'],
+        'audio_format': info['format'],
+    }
+
+
+def _file_size(file_obj):
+    size = getattr(file_obj, 'size', None)
+    if size:
+        return size
+    file_obj.seek(0, os.SEEK_END)
+    return file_obj.tell()
+
+
+def skip_id3v2(file_obj):
+    """Move past an ID3v2 tag at the current position and return the offset of the audio."""
+    offset = file_obj.tell()
+    header = file_obj.read(10)
+    if len(header) == 10 and header[:3] == b'ID3':
+        # Tag size is a 28-bit "syncsafe" integer; a footer adds another 10 bytes
+        tag_size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        offset += 10 + tag_size + (10 if header[5] & 0x10 else 0)
+    file_obj.seek(offset)
+    return offset
+
+
+def _probe_wav(file_obj, size):
+    """Parse the fmt and data chunks of a RIFF/WAVE file."""
+    file_obj.seek(12)
+    fmt = None
+
+    while True:
+        chunk_header = file_obj.read(8)
+        if len(chunk_header) < 8:
+            return None
+        chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+
+        if chunk_id == b'fmt ':
+            fmt = struct.unpack('<HHIIHH', file_obj.read(16))
+            file_obj.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            _, channels, sample_rate, byte_rate, _, _ = fmt
+            # Streamed WAVs may leave the size at 0 or 0xFFFFFFFF
+            data_size = min(chunk_size, size - file_obj.tell()) if chunk_size else size - file_obj.tell()
+            return {
+                'format': 'wav',
+                'duration': data_size / byte_rate if byte_rate else 0.0,
+                'sample_rate': sample_rate,
+                'channels': channels,
+                'bitrate': round(byte_rate * 8 / 1000),
+            }
+        else:
+            file_obj.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def _probe_flac(file_obj, start, size):
+    """Parse the STREAMINFO metadata block of a FLAC file."""
+    file_obj.seek(start + 4)
+    block_header = file_obj.read(4)
+    if len(block_header) < 4 or block_header[0] & 0x7F != 0:
+        return None
+
+    info = file_obj.read(34)
+    if len(info) < 34:
+        return None
+
+    # 20 bits sample rate, 3 bits channels - 1, 5 bits bits per sample - 1, 36 bits total samples
+    packed = int.from_bytes(info[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate:
+        return None
+
+    duration = total_samples / sample_rate
+    return {
+        'format': 'flac',
+        'duration': duration,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'bitrate': round((size - start) * 8 / duration / 1000) if duration else 0,
+    }
+
+
+def parse_mp3_frame_header(data, index):
+    """Decode the MPEG audio frame header at data[index], or return None if it is not one."""
+    if index + 4 > len(data) or data[index] != 0xFF or data[index + 1] & 0xE0 != 0xE0:
+        return None
+
+    b1, b2, b3 = data[index + 1], data[index + 2], data[index + 3]
+    version_bits = (b1 >> 3) & 0x3
+    layer_bits = (b1 >> 1) & 0x3
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x3
+
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    version = MP3_VERSIONS[version_bits]
+    layer = MP3_LAYERS[layer_bits]
+    bitrate = MP3_BITRATES[version][layer][bitrate_index]
+    sample_rate = MP3_SAMPLE_RATES[version_bits][sample_rate_index]
+    padding = (b2 >> 1) & 0x1
+    channel_mode = b3 >> 6
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 1152 if layer == 2 or version == 'mpeg1' else 576
+        frame_length = samples_per_frame // 8 * bitrate * 1000 // sample_rate + padding
+
+    return {
+        'version': version,
+        'layer': layer,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'channels': 1 if channel_mode == 3 else 2,
+        'samples_per_frame': samples_per_frame,
+        'frame_length': frame_length,
+    }
+
+
+def iter_mp3_frames(file_obj, block_size=1024 * 1024):
+    """
+    Walk the MPEG audio frames of an MP3 file by their headers.
+
+    Frames are located from the header of the previous frame, so only the
+    first frame is searched for. Walking stops at the first position that
+    does not hold a valid frame header, such as a trailing ID3v1 tag.
+
+    Yields:
+        tuple: Byte offset of the frame and its decoded header
+    """
+    file_obj.seek(0)
+    position = skip_id3v2(file_obj)
+    data = file_obj.read(MP3_SYNC_SCAN_SIZE)
+    for index in range(len(data) - 4):
+        if parse_mp3_frame_header(data, index) is not None:
+            position += index
+            break
+    else:
+        return
+
+    buffer = b''
+    buffer_start = position
+    while True:
+        index = position - buffer_start
+        if index + 4 > len(buffer):
+            file_obj.seek(position)
+            buffer = file_obj.read(block_size)
+            buffer_start = position
+            index = 0
+            if len(buffer) < 4:
+                return
+
+        frame = parse_mp3_frame_header(buffer, index)
+        if frame is None or not frame['frame_length']:
+            return
+        yield position, frame
+        position += frame['frame_length']
+
+
+def has_vbr_header(data, frame):
+    """Return True if a frame (starting at data[0]) holds a Xing/Info or VBRI header instead of audio."""
+    frames, vbr_bytes = _read_vbr_header(data, 0, frame)
+    return frames is not None or vbr_bytes is not None
+
+
+def _probe_mp3(file_obj, start, size):
+    """Find the first MPEG audio frame and read its Xing/Info or VBRI header if present."""
+    file_obj.seek(start)
+    data = file_obj.read(MP3_SYNC_SCAN_SIZE)
+
+    for index in range(len(data) - 4):
+        frame = parse_mp3_frame_header(data, index)
+        if frame is None:
+            continue
+
+        # Require a second frame header where this one ends to rule out false syncs
+        next_index = index + frame['frame_length']
+        if next_index + 4 <= len(data) and parse_mp3_frame_header(data, next_index) is None:
+            continue
+        break
+    else:
+        return None
+
+    audio_start = start + index
+    audio_size = size - audio_start
+    frames, vbr_bytes = _read_vbr_header(data, index, frame)
+
+    if frames:
+        duration = frames * frame['samples_per_frame'] / frame['sample_rate']
+        bitrate = round((vbr_bytes or audio_size) * 8 / duration / 1000) if duration else frame['bitrate']
+    else:
+        # Constant bitrate: every frame has the same bitrate as the first
+        duration = audio_size * 8 / (frame['bitrate'] * 1000)
+        bitrate = frame['bitrate']
+
+    return {
+        'format': 'mp3',
+        'duration': duration,
+        'sample_rate': frame['sample_rate'],
+        'channels': frame['channels'],
+        'bitrate': bitrate,
+    }
+
+
+def _read_vbr_header(data, index, frame):
+    """Return the frame and byte counts from a Xing/Info or VBRI header in the first frame."""
+    # The Xing header follows the side information, whose size depends on version and channels
+    if frame['version'] == 'mpeg1':
+        side_info = 17 if frame['channels'] == 1 else 32
+    else:
+        side_info = 9 if frame['channels'] == 1 else 17
+
+    xing = index + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info') and len(data) >= xing + 8:
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        position = xing + 8
+        frames = vbr_bytes = None
+        if flags & 0x1:
+            frames = struct.unpack('>I', data[position:position + 4])[0]
+            position += 4
+        if flags & 0x2:
+            vbr_bytes = struct.unpack('>I', data[position:position + 4])[0]
+        return frames, vbr_bytes
+
+    vbri = index + 4 + 32
+    if data[vbri:vbri + 4] == b'VBRI' and len(data) >= vbri + 18:
+        vbr_bytes, frames = struct.unpack('>II', data[vbri + 10:vbri + 18])
+        return frames, vbr_bytes
+
+    return None, None
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from analyzer.models import Agent, AgentDailyStats
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per-agent daily stats rollup from the call analyses, to reconcile it "
+        "after analyses were changed outside the models."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--agent', action='append', dest='employee_ids', metavar='EMPLOYEE_ID',
+            help="Only rebuild this agent (may be repeated)"
+        )
+
+    def handle(self, *args, **options):
+        agents = None
+        if options['employee_ids']:
+            agents = Agent.objects.filter(employee_id__in=options['employee_ids'])
+            missing = set(options['employee_ids']) - set(agents.values_list('employee_id', flat=True))
+            if missing:
+                raise CommandError(f"Unknown agents: {', '.join(sorted(missing))}")
+
+        created = AgentDailyStats.rebuild(agents)
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {created} agent days"))
@@ -0,0 +1,139 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from analyzer.services.load_test import PipelineLoadTest
+from analyzer.services.worker import CallWorkerPool
+
+class Command(BaseCommand):
+    help = (
+        "Push synthetic recordings through call processing against local stand-ins "
+        "for AssemblyAI and Gemini and report throughput, stage latencies and DB queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=50, help="Number of synthetic recordings")
+        parser.add_argument(
+            '--engine', choices=CallWorkerPool.ENGINES, default=settings.CALL_WORKER_ENGINE,
+            help="Worker engine to load test"
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.CALL_WORKER_CONCURRENCY,
+            help="Number of worker threads (threads engine)"
+        )
+        parser.add_argument('--audio-size', type=int, default=64, help="Size of each synthetic recording in KB")
+        parser.add_argument(
+            '--transcription-latency', type=float, default=2.0,
+            help="Seconds the fake AssemblyAI takes to complete a transcript"
+        )
+        parser.add_argument(
+            '--analysis-latency', type=float, default=1.0,
+            help="Seconds the fake Gemini takes to generate an analysis"
+        )
+        parser.add_argument(
+            '--request-latency', type=float, default=0.05,
+            help="Seconds added to every request to the fake APIs"
+        )
+        parser.add_argument(
+            '--jitter', type=float, default=0.25,
+            help="Random variation of every latency, as a fraction of it"
+        )
+        parser.add_argument(
+            '--error-rate', type=float, default=0.0,
+            help="Fraction of transcripts and generations that fail"
+        )
+        parser.add_argument(
+            '--rate-limit-rate', type=float, default=0.0,
+            help="Fraction of requests answered with HTTP 429"
+        )
+        parser.add_argument(
+            '--polling-interval', type=float, default=0.2,
+            help="Seconds between AssemblyAI transcript status polls"
+        )
+        parser.add_argument(
+            '--analysis-batch-size', type=int, default=0,
+            help="Analyse up to this many calls per Gemini request (0 disables batching)"
+        )
+        parser.add_argument(
+            '--analysis-batch-wait', type=float, default=0.5,
+            help="Seconds a call waits for its analysis batch to fill"
+        )
+        parser.add_argument(
+            '--webhooks', action='store_true',
+            help="Submit transcripts with a completion webhook served by this app instead of polling"
+        )
+        parser.add_argument(
+            '--webhook-drop-rate', type=float, default=0.0,
+            help="Fraction of webhooks the AssemblyAI stand-in never delivers"
+        )
+        parser.add_argument(
+            '--webhook-poll-interval', type=float, default=5.0,
+            help="Seconds before a job whose webhook is missing polls for its transcript"
+        )
+        parser.add_argument('--seed', type=int, default=None, help="Seed for the fake APIs' randomness")
+        parser.add_argument(
+            '--keep-data', action='store_true',
+            help="Keep the synthetic recordings and analyses afterwards"
+        )
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        load_test = PipelineLoadTest(
+            calls=options['calls'],
+            engine=options['engine'],
+            workers=options['workers'],
+            audio_size=options['audio_size'] * 1024,
+            transcription_latency=options['transcription_latency'],
+            analysis_latency=options['analysis_latency'],
+            request_latency=options['request_latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            polling_interval=options['polling_interval'],
+            seed=options['seed'],
+            analysis_batch_size=options['analysis_batch_size'],
+            analysis_batch_wait=options['analysis_batch_wait'],
+            webhooks=options['webhooks'],
+            webhook_drop_rate=options['webhook_drop_rate'],
+            webhook_poll_interval=options['webhook_poll_interval']
+        )
+
+        if not options['json']:
+            self.stdout.write(f"Processing {options['calls']} synthetic calls with the {options['engine']} engine...")
+
+        results = load_test.run(keep_data=options['keep_data'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        outcomes = results['outcomes']
+        self.stdout.write(
+            f"\nCompleted {outcomes['completed']} of {results['calls']} calls "
+            f"({outcomes['failed']} failed, {outcomes['pending']} parked) in {results['elapsed']:.2f}s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Throughput: {results['throughput_per_second']:.2f} calls/s "
+            f"({results['throughput_per_hour']:.0f} calls/hour)"
+        ))
+        self.stdout.write(f"DB queries per call: {results['queries_per_call']:.1f}\n")
+
+        self.stdout.write(f"{'Stage':<15}{'Count':>7}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}{'Queries':>10}")
+        for stage, stats in results['stages'].items():
+            self.stdout.write(
+                f"{stage:<15}{stats['count']:>7}{stats['p50']:>10.3f}{stats['p95']:>10.3f}"
+                f"{stats['p99']:>10.3f}{stats['queries']:>10}"
+            )
+
+        self.stdout.write("")
+        for api, stats in results['apis'].items():
+            self.stdout.write(
+                f"{api}: {stats['requests']} requests over {stats['connections']} connections, "
+                f"{stats['rate_limited']} rate limited, "
+                f"{stats['errors']} simulated errors"
+                + (f", {stats['webhooks']} webhooks ({stats['webhooks_dropped']} dropped)" if 'webhooks' in stats else "")
+            )
+        for api, stats in results['api_limits'].items():
+            self.stdout.write(
+                f"{api} limiter: circuit {stats['circuit']}, concurrency limit {stats['concurrency_limit']}, "
+                f"{stats['retries']} retries, {stats['rejected']} calls refused by the open circuit"
+            )
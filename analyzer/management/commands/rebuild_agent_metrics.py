@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from analyzer.models import Agent
+
+class Command(BaseCommand):
+    help = (
+        "Recompute agents' running call totals and average coverage scores from their "
+        "call analyses, and report the agents whose stored metrics had drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--agent', action='append', dest='employee_ids', metavar='EMPLOYEE_ID',
+            help="Only rebuild this agent (may be repeated)"
+        )
+
+    def handle(self, *args, **options):
+        agents = Agent.objects.all()
+        if options['employee_ids']:
+            agents = agents.filter(employee_id__in=options['employee_ids'])
+            missing = set(options['employee_ids']) - set(agents.values_list('employee_id', flat=True))
+            if missing:
+                raise CommandError(f"Unknown agents: {', '.join(sorted(missing))}")
+
+        fields = ('employee_id', 'total_calls_handled', 'coverage_score_sum', 'avg_coverage_score')
+        before = {row[0]: row[1:] for row in agents.values_list(*fields)}
+        updated = Agent.rebuild_metrics(agents)
+        after = {row[0]: row[1:] for row in agents.values_list(*fields)}
+
+        drifted = 0
+        for employee_id, (calls, score_sum, avg_score) in sorted(after.items()):
+            old_calls, old_sum, old_avg = before.get(employee_id, (None, None, None))
+            if old_calls != calls or abs(old_sum - score_sum) > 1e-6 or abs(old_avg - avg_score) > 1e-6:
+                drifted += 1
+                self.stdout.write(
+                    f"{employee_id}: {old_calls} calls, average {old_avg:.2f} -> "
+                    f"{calls} calls, average {avg_score:.2f}"
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt metrics for {updated} agents ({drifted} corrected)"))
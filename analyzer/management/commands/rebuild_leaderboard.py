@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from analyzer.services.leaderboard import rank_changed_periods, rebuild_leaderboard
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the all-time, weekly and monthly leaderboard entries of every agent "
+        "from the call analyses, to reconcile the totals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rank-only', action='store_true',
+            help="Only rank the periods that changed since they were last ranked, as the call workers do"
+        )
+
+    def handle(self, *args, **options):
+        if options['rank_only']:
+            ranked = rank_changed_periods()
+            self.stdout.write(self.style.SUCCESS(f"Ranked {ranked} leaderboard periods"))
+            return
+
+        created = rebuild_leaderboard()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} leaderboard entries"))
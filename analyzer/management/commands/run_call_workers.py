@@ -0,0 +1,47 @@
+import signal
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from analyzer.services.worker import CallWorkerPool
+
+class Command(BaseCommand):
+    help = "Run a pool of workers that process queued call recordings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.CALL_WORKER_CONCURRENCY,
+            help="Number of worker threads in this process (threads engine)"
+        )
+        parser.add_argument(
+            '--engine', choices=CallWorkerPool.ENGINES, default=settings.CALL_WORKER_ENGINE,
+            help="'threads' runs whole jobs per thread; 'pipeline' overlaps stages across calls"
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.CALL_WORKER_POLL_INTERVAL,
+            help="Seconds to wait before polling an empty queue again"
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help="Exit once the queue is empty instead of waiting for new jobs"
+        )
+
+    def handle(self, *args, **options):
+        pool = CallWorkerPool(
+            concurrency=options['workers'],
+            poll_interval=options['poll_interval'],
+            engine=options['engine']
+        )
+
+        def shutdown(signum, frame):
+            self.stdout.write("Shutting down after current jobs finish...")
+            pool.stop()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        if options['engine'] == 'pipeline':
+            self.stdout.write("Starting pipelined call processing engine")
+        else:
+            self.stdout.write(f"Starting {options['workers']} call processing workers")
+        pool.start(burst=options['burst'])
+        pool.join()
+        self.stdout.write(self.style.SUCCESS("Call processing workers stopped"))
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0002_processingjob'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='processingjob',
+            name='analyzer_pr_status_01f34a_idx',
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time the job may be claimed'),
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='max_attempts',
+            field=models.PositiveIntegerField(default=3),
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='worker_id',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='processingjob',
+            index=models.Index(fields=['status', 'available_at'], name='analyzer_pr_status_d42a07_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingjob',
+            index=models.Index(fields=['status', 'lease_expires_at'], name='analyzer_pr_status_23cc66_idx'),
+        ),
+    ]
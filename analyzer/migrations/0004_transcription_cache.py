@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0003_processingjob_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callrecording',
+            name='audio_sha256',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 digest of the audio file', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='TranscriptionCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('audio_sha256', models.CharField(max_length=64)),
+                ('config_key', models.CharField(help_text='Digest of the transcription configuration', max_length=64)),
+                ('full_text', models.TextField()),
+                ('agent_text', models.TextField()),
+                ('customer_text', models.TextField()),
+                ('utterances', models.JSONField(default=list)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('audio_sha256', 'config_key'), name='unique_transcription_cache_entry')],
+            },
+        ),
+    ]
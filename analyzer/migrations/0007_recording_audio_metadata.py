@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0006_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callrecording',
+            name='audio_format',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='callrecording',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, help_text='Average bitrate in kbps', null=True),
+        ),
+        migrations.AddField(
+            model_name='callrecording',
+            name='channels',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='callrecording',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, help_text='Sample rate in Hz', null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0007_recording_audio_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Utterance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(help_text='Order of the utterance within the call')),
+                ('speaker', models.CharField(max_length=10)),
+                ('start_ms', models.PositiveIntegerField()),
+                ('end_ms', models.PositiveIntegerField()),
+                ('text', models.TextField()),
+                ('analysis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='utterances', to='analyzer.callanalysis')),
+            ],
+            options={
+                'ordering': ['analysis', 'position'],
+                'indexes': [models.Index(fields=['analysis', 'start_ms'], name='analyzer_ut_analysi_1c41d9_idx')],
+                'constraints': [models.UniqueConstraint(fields=('analysis', 'position'), name='unique_utterance_position')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0008_utterance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callanalysis',
+            name='prompt_transcript_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='callanalysis',
+            name='transcript_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0009_analysis_prompt_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptionRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('engine', models.CharField(max_length=50)),
+                ('transcript_id', models.CharField(help_text="The provider's ID of the transcript", max_length=100, unique=True)),
+                ('status', models.CharField(choices=[('submitted', 'Submitted'), ('completed', 'Completed'), ('failed', 'Failed')], default='submitted', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('submitted_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, help_text="When the provider's webhook arrived", null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('call_recording', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcription_requests', to='analyzer.callrecording')),
+            ],
+            options={
+                'ordering': ['-submitted_at'],
+                'indexes': [models.Index(fields=['call_recording', 'status'], name='analyzer_tr_call_re_658ec6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:08
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def rebuild_agent_metrics(apps, schema_editor):
+    Agent = apps.get_model('analyzer', 'Agent')
+    CallAnalysis = apps.get_model('analyzer', 'CallAnalysis')
+    analyses = CallAnalysis.objects.filter(agent=OuterRef('pk')).order_by().values('agent')
+
+    def aggregate(function, default):
+        return Coalesce(Subquery(analyses.annotate(value=function).values('value')), Value(default))
+
+    Agent.objects.update(
+        total_calls_handled=aggregate(Count('id'), 0),
+        coverage_score_sum=aggregate(Sum('coverage_score'), 0.0),
+        avg_coverage_score=aggregate(Avg('coverage_score'), 0.0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0010_transcription_request'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agent',
+            name='coverage_score_sum',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(rebuild_agent_metrics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0011_agent_coverage_score_sum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agent',
+            name='metrics_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:12
+
+import django.db.models.deletion
+from collections import defaultdict
+from datetime import date
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DateField, Sum, Value
+from django.db.models.functions import TruncMonth, TruncWeek
+
+
+def fill_leaderboard(apps, schema_editor):
+    CallAnalysis = apps.get_model('analyzer', 'CallAnalysis')
+    LeaderboardEntry = apps.get_model('analyzer', 'LeaderboardEntry')
+    analyses = CallAnalysis.objects.order_by()
+    buckets = {
+        'all': Value(date(1970, 1, 1), output_field=DateField()),
+        'week': TruncWeek('created_at', output_field=DateField()),
+        'month': TruncMonth('created_at', output_field=DateField()),
+    }
+
+    periods = defaultdict(list)
+    for period, bucket in buckets.items():
+        rows = analyses.annotate(period_start=bucket).values(
+            'agent_id', 'agent__department', 'period_start'
+        ).annotate(call_count=Count('id'), score_sum=Sum('coverage_score'))
+        for row in rows:
+            periods[period, row['period_start']].append(LeaderboardEntry(
+                agent_id=row['agent_id'], department=row['agent__department'], period=period,
+                period_start=row['period_start'], call_count=row['call_count'], score_sum=row['score_sum'],
+                avg_score=row['score_sum'] / row['call_count'], changes=1, ranked_changes=1
+            ))
+
+    # Rank each period as services.leaderboard.rank_period does
+    for entries in periods.values():
+        eligible = sorted(
+            (entry for entry in entries if entry.call_count >= settings.LEADERBOARD_MIN_CALLS),
+            key=lambda entry: (-entry.avg_score, -entry.call_count, entry.agent_id)
+        )
+        department_counts = defaultdict(int)
+        for position, entry in enumerate(eligible, start=1):
+            department_counts[entry.department] += 1
+            entry.rank = position
+            entry.department_rank = department_counts[entry.department]
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0012_agent_metrics_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=100)),
+                ('period', models.CharField(choices=[('all', 'All time'), ('week', 'Week'), ('month', 'Month')], max_length=10)),
+                ('period_start', models.DateField(help_text='Monday of the week or first day of the month')),
+                ('call_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('avg_score', models.FloatField(default=0.0)),
+                ('rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('department_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('changes', models.PositiveIntegerField(default=0)),
+                ('ranked_changes', models.PositiveIntegerField(default=0)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='analyzer.agent')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'period_start', 'rank'], name='analyzer_le_period_1b556a_idx'), models.Index(fields=['period', 'period_start', 'department', 'department_rank'], name='analyzer_le_period_0830fe_idx')],
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start', 'agent'), name='unique_leaderboard_entry')],
+            },
+        ),
+        migrations.RunPython(fill_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_agent_daily_stats(apps, schema_editor):
+    # As AgentDailyStats.rebuild, which the historical model does not have
+    AgentDailyStats = apps.get_model('analyzer', 'AgentDailyStats')
+    CallAnalysis = apps.get_model('analyzer', 'CallAnalysis')
+    analyses = CallAnalysis.objects.order_by().values(
+        'agent_id', 'created_at', 'coverage_score', 'sentiment', 'compliance_check',
+        'call_recording__duration_seconds'
+    )
+
+    rows = {}
+    for analysis in analyses.iterator(chunk_size=2000):
+        row = rows.setdefault((analysis['agent_id'], timezone.localdate(analysis['created_at'])), {
+            'call_count': 0, 'score_sum': 0.0, 'score_sq_sum': 0.0, 'positive_count': 0, 'neutral_count': 0,
+            'negative_count': 0, 'compliance_checks': 0, 'compliance_passed': 0, 'compliant_calls': 0,
+            'total_duration_seconds': 0,
+        })
+        score = analysis['coverage_score']
+        checks = analysis['compliance_check'] if isinstance(analysis['compliance_check'], dict) else {}
+        passed = sum(1 for result in checks.values() if result is True)
+        row['call_count'] += 1
+        row['score_sum'] += score
+        row['score_sq_sum'] += score * score
+        if f"{analysis['sentiment']}_count" in row:
+            row[f"{analysis['sentiment']}_count"] += 1
+        row['compliance_checks'] += len(checks)
+        row['compliance_passed'] += passed
+        row['compliant_calls'] += int(bool(checks) and passed == len(checks))
+        row['total_duration_seconds'] += analysis['call_recording__duration_seconds'] or 0
+
+    AgentDailyStats.objects.bulk_create(
+        [AgentDailyStats(agent_id=agent_id, date=day, **counters) for (agent_id, day), counters in rows.items()],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0013_leaderboard_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('call_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('score_sq_sum', models.FloatField(default=0.0, help_text='Sum of squared coverage scores, for the variance')),
+                ('positive_count', models.PositiveIntegerField(default=0)),
+                ('neutral_count', models.PositiveIntegerField(default=0)),
+                ('negative_count', models.PositiveIntegerField(default=0)),
+                ('compliance_checks', models.PositiveIntegerField(default=0, help_text='Compliance checks evaluated')),
+                ('compliance_passed', models.PositiveIntegerField(default=0, help_text='Compliance checks passed')),
+                ('compliant_calls', models.PositiveIntegerField(default=0, help_text='Calls that passed every compliance check')),
+                ('total_duration_seconds', models.PositiveIntegerField(default=0)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='analyzer.agent')),
+            ],
+            options={
+                'ordering': ['date', 'agent'],
+                'indexes': [models.Index(fields=['date', 'agent'], name='analyzer_ag_date_99bee9_idx')],
+                'constraints': [models.UniqueConstraint(fields=('agent', 'date'), name='unique_agent_daily_stats')],
+            },
+        ),
+        migrations.RunPython(fill_agent_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0014_agent_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('receiving', 'Receiving'), ('finalizing', 'Finalizing'), ('completed', 'Completed'), ('failed', 'Failed'), ('aborted', 'Aborted')], default='active', max_length=20),
+        ),
+    ]
@@ -1,9 +1,34 @@
-from django.db import models
+from datetime import date, timedelta
+from django.db import IntegrityError, models, transaction
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
 import uuid
 import os
 
+def running_average(count_field, sum_field, average_field, calls, score):
+    """
+    Build update() arguments adding to a stored count, sum and their average.
+    
+    The database computes the new values from the stored ones in the same
+    UPDATE, so concurrent changes to the same row are never lost.
+    """
+    total = F(count_field) + calls
+    score_sum = F(sum_field) + score
+    return {
+        count_field: total,
+        sum_field: score_sum,
+        average_field: Case(
+            When(**{f'{count_field}__gt': -calls}, then=score_sum / total),
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+    }
+
 def get_upload_path(instance, filename):
     """Generate a unique path for uploaded call recordings."""
     ext = filename.split('.')[-1]
@@ -17,20 +42,64 @@ class Agent(models.Model):
     department = models.CharField(max_length=100)
     hire_date = models.DateField()
     
-    # Performance metrics
+    # Performance metrics, maintained incrementally as call analyses are saved and deleted
     avg_coverage_score = models.FloatField(default=0.0)
     total_calls_handled = models.PositiveIntegerField(default=0)
+    coverage_score_sum = models.FloatField(default=0.0)
+    # Bumped on every change to the agent's call analyses, to invalidate cached performance data
+    metrics_version = models.PositiveIntegerField(default=0)
     
     def __str__(self):
         return f"{self.user.get_full_name()} ({self.employee_id})"
     
+    @classmethod
+    def record_analysis(cls, agent_id, calls, score):
+        """
+        Add to an agent's running totals in a single atomic UPDATE.
+        
+        The new values are computed by the database from the stored ones, so
+        analyses of the same agent finishing at the same time do not
+        overwrite each other's changes. The agent's metrics version is bumped
+        even when both changes are 0.
+        
+        Args:
+            agent_id: ID of the agent
+            calls: Change in the number of analysed calls (1, 0 or -1)
+            score: Change in the sum of coverage scores
+        """
+        cls.objects.filter(pk=agent_id).update(
+            metrics_version=F('metrics_version') + 1,
+            **running_average('total_calls_handled', 'coverage_score_sum', 'avg_coverage_score', calls, score)
+        )
+    
+    @classmethod
+    def rebuild_metrics(cls, agents=None):
+        """
+        Recompute running totals from the call analyses, for reconciliation.
+        
+        Args:
+            agents: Optional queryset of agents to rebuild; all agents by default
+            
+        Returns:
+            int: Number of agents updated
+        """
+        analyses = CallAnalysis.objects.filter(agent=OuterRef('pk')).order_by().values('agent')
+        
+        def aggregate(function, default):
+            return Coalesce(Subquery(analyses.annotate(value=function).values('value')), Value(default))
+        
+        agents = cls.objects.all() if agents is None else agents
+        return agents.update(
+            metrics_version=F('metrics_version') + 1,
+            total_calls_handled=aggregate(Count('id'), 0),
+            coverage_score_sum=aggregate(Sum('coverage_score'), 0.0),
+            avg_coverage_score=aggregate(Avg('coverage_score'), 0.0)
+        )
+    
     def update_metrics(self):
-        """Update agent metrics based on call analyses."""
-        analyses = self.call_analyses.all()
-        if analyses.exists():
-            self.avg_coverage_score = sum(a.coverage_score for a in analyses) / analyses.count()
-            self.total_calls_handled = analyses.count()
-            self.save()
+        """Recompute this agent's metrics from its call analyses."""
+        Agent.rebuild_metrics(Agent.objects.filter(pk=self.pk))
+        self.refresh_from_db(fields=['avg_coverage_score', 'total_calls_handled', 'coverage_score_sum', 'metrics_version'])
 
 class CallRecording(models.Model):
     """Model for storing uploaded call recordings."""
@@ -48,10 +117,155 @@ class CallRecording(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
     duration_seconds = models.PositiveIntegerField(default=0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    audio_sha256 = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 digest of the audio file")
+    
+    # Format metadata read from the audio headers at upload time
+    audio_format = models.CharField(max_length=10, blank=True)
+    sample_rate = models.PositiveIntegerField(null=True, blank=True, help_text="Sample rate in Hz")
+    channels = models.PositiveSmallIntegerField(null=True, blank=True)
+    bitrate = models.PositiveIntegerField(null=True, blank=True, help_text="Average bitrate in kbps")
     
     def __str__(self):
         return f"{self.title} - {self.agent.user.get_full_name()}"
 
+class TranscriptionCacheEntry(models.Model):
+    """Model for cached transcriptions keyed by audio digest and transcription config."""
+    audio_sha256 = models.CharField(max_length=64)
+    config_key = models.CharField(max_length=64, help_text="Digest of the transcription configuration")
+    
+    full_text = models.TextField()
+    agent_text = models.TextField()
+    customer_text = models.TextField()
+    utterances = models.JSONField(default=list)
+    
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['audio_sha256', 'config_key'], name='unique_transcription_cache_entry'),
+        ]
+    
+    def __str__(self):
+        return f"Transcript {self.audio_sha256[:12]} ({self.config_key[:8]})"
+
+class ProcessingJob(models.Model):
+    """Model for durable call processing jobs consumed by the worker pool."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    call_recording = models.ForeignKey(CallRecording, on_delete=models.CASCADE, related_name='processing_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    
+    # Lease held by the worker currently running the job
+    worker_id = models.CharField(max_length=255, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Earliest time the job may be claimed")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+            models.Index(fields=['status', 'lease_expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"Job {self.id} for {self.call_recording.title} ({self.status})"
+
+class TranscriptionRequest(models.Model):
+    """Model for transcriptions submitted to a provider that reports completion by webhook."""
+    STATUS_CHOICES = [
+        ('submitted', 'Submitted'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    call_recording = models.ForeignKey(CallRecording, on_delete=models.CASCADE, related_name='transcription_requests')
+    engine = models.CharField(max_length=50)
+    transcript_id = models.CharField(max_length=100, unique=True, help_text="The provider's ID of the transcript")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='submitted')
+    error = models.TextField(blank=True)
+    
+    submitted_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True, help_text="When the provider's webhook arrived")
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['call_recording', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"Transcript {self.transcript_id} for {self.call_recording.title} ({self.status})"
+
+class UploadSession(models.Model):
+    """Model for resumable chunked uploads of call recordings."""
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        # A request is writing a chunk or storing the finished file
+        ('receiving', 'Receiving'),
+        ('finalizing', 'Finalizing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('aborted', 'Aborted'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, related_name='upload_sessions')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions')
+    title = models.CharField(max_length=255)
+    filename = models.CharField(max_length=255)
+    customer_phone = models.CharField(max_length=20, blank=True, null=True)
+    
+    total_size = models.PositiveBigIntegerField(help_text="Size of the complete file in bytes")
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Expected SHA-256 digest of the complete file")
+    temp_path = models.CharField(max_length=500, help_text="Partial file the chunks are appended to")
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    error = models.TextField(blank=True)
+    call_recording = models.ForeignKey(CallRecording, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.received_bytes}/{self.total_size} bytes, {self.status})"
+
+class LLMCacheEntry(models.Model):
+    """Model for cached LLM responses keyed by model, prompt version and input digest."""
+    cache_key = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=100)
+    prompt_version = models.CharField(max_length=50)
+    response = models.JSONField()
+    
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_accessed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.model_name} {self.prompt_version} ({self.cache_key[:12]})"
+
 class CallAnalysis(models.Model):
     """Model for storing AI analysis results of call recordings."""
     SENTIMENT_CHOICES = [
@@ -85,6 +299,10 @@ class CallAnalysis(models.Model):
     compliance_check = models.JSONField(default=dict, help_text="Compliance check results")
     improvement_suggestions = models.TextField(blank=True)
     
+    # Estimated size of the transcript in the analysis prompt, before and after compaction
+    transcript_tokens = models.PositiveIntegerField(default=0)
+    prompt_transcript_tokens = models.PositiveIntegerField(default=0)
+    
     # Processing metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -92,10 +310,331 @@ class CallAnalysis(models.Model):
     def __str__(self):
         return f"Analysis for {self.call_recording.title}"
     
+    # Fields counted by the agent metrics, leaderboards and daily stats
+    ROLLUP_FIELDS = {'agent', 'agent_id', 'coverage_score', 'sentiment', 'compliance_check'}
+    
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Update agent metrics when analysis is saved
-        self.agent.update_metrics()
+        update_fields = kwargs.get('update_fields')
+        tracked = update_fields is None or bool(self.ROLLUP_FIELDS & set(update_fields))
+        
+        with transaction.atomic():
+            # Lock the stored row so a concurrent save cannot apply the same change twice
+            previous = None
+            if self.pk is not None and tracked:
+                previous = CallAnalysis.objects.select_for_update().only(
+                    'agent', 'coverage_score', 'sentiment', 'compliance_check', 'created_at'
+                ).filter(pk=self.pk).first()
+            
+            super().save(*args, **kwargs)
+            
+            if not tracked:
+                # Nothing the rollups count changed, but cached performance data may show it
+                Agent.record_analysis(self.agent_id, 0, 0)
+                return
+            
+            # Update the rollups by the difference between the stored and the saved analysis
+            duration = self.call_recording.duration_seconds
+            changes = {}
+            for analysis, sign in ((previous, -1), (self, 1)):
+                if analysis is None:
+                    continue
+                key = (analysis.agent_id, timezone.localdate(analysis.created_at))
+                delta = changes.setdefault(key, {})
+                for field, value in analysis.rollup(duration).items():
+                    delta[field] = delta.get(field, 0) + sign * value
+            
+            for (agent_id, day), delta in changes.items():
+                apply_rollup(agent_id, day, delta)
+    
+    def rollup(self, duration_seconds):
+        """Return what this analysis adds to its agent's daily stats."""
+        return AgentDailyStats.contribution(self.coverage_score, self.sentiment, self.compliance_check, duration_seconds)
+
+
+def apply_rollup(agent_id, day, delta):
+    """
+    Apply a change in an agent's analyses of one day to its metrics, leaderboard entries and daily stats.
+    
+    Args:
+        agent_id: ID of the agent
+        day: Date the analyses were made
+        delta: Change of every AgentDailyStats counter
+    """
+    calls, score = delta['call_count'], delta['score_sum']
+    Agent.record_analysis(agent_id, calls, score)
+    if calls or score:
+        LeaderboardEntry.record_analysis(agent_id, day, calls, score)
+    changed = {field: value for field, value in delta.items() if value}
+    if changed:
+        AgentDailyStats.record_analysis(agent_id, day, changed)
+
+
+@receiver(post_delete, sender=CallAnalysis)
+def remove_analysis_from_rollups(sender, instance, **kwargs):
+    """Take a deleted analysis, including one deleted by cascade, out of its agent's rollups."""
+    duration = CallRecording.objects.filter(pk=instance.call_recording_id).values_list(
+        'duration_seconds', flat=True
+    ).first() or 0
+    apply_rollup(
+        instance.agent_id,
+        timezone.localdate(instance.created_at),
+        {field: -value for field, value in instance.rollup(duration).items()}
+    )
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Precomputed leaderboard standing of an agent for one period.
+    
+    Call counts and scores are updated as analyses are saved and deleted;
+    ranks are recomputed for a whole period by the call workers' maintenance
+    after a change (see services.leaderboard).
+    """
+    PERIOD_CHOICES = [
+        ('all', 'All time'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+    
+    # period_start of the single all-time period
+    ALL_TIME_START = date(1970, 1, 1)
+    
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    department = models.CharField(max_length=100)
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField(help_text="Monday of the week or first day of the month")
+    call_count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    avg_score = models.FloatField(default=0.0)
+    
+    # Ranks among the agents with at least LEADERBOARD_MIN_CALLS calls in the period
+    rank = models.PositiveIntegerField(null=True, blank=True)
+    department_rank = models.PositiveIntegerField(null=True, blank=True)
+    # The ranks are current while ranked_changes equals changes
+    changes = models.PositiveIntegerField(default=0)
+    ranked_changes = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'period_start', 'agent'], name='unique_leaderboard_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'period_start', 'rank']),
+            models.Index(fields=['period', 'period_start', 'department', 'department_rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.agent} {self.period} {self.period_start}: #{self.rank}"
+    
+    @classmethod
+    def period_starts(cls, day):
+        """Return the start of each leaderboard period containing a date."""
+        return {
+            'all': cls.ALL_TIME_START,
+            'week': day - timedelta(days=day.weekday()),
+            'month': day.replace(day=1),
+        }
+    
+    @classmethod
+    def record_analysis(cls, agent_id, day, calls, score):
+        """
+        Add to an agent's entries for every period containing a day.
+        
+        All entries are updated by one atomic UPDATE; missing ones are created.
+        
+        Args:
+            agent_id: ID of the agent
+            day: Date the analysis was made
+            calls: Change in the number of analysed calls (1, 0 or -1)
+            score: Change in the sum of coverage scores
+        """
+        starts = cls.period_starts(day)
+        periods = Q()
+        for period, start in starts.items():
+            periods |= Q(period=period, period_start=start)
+        
+        updated = cls.objects.filter(periods, agent_id=agent_id).update(
+            changes=F('changes') + 1,
+            **running_average('call_count', 'score_sum', 'avg_score', calls, score)
+        )
+        if updated == len(starts) or calls <= 0:
+            # An analysis removed from a period that was never filled in needs no entry
+            return
+        
+        existing = set(cls.objects.filter(periods, agent_id=agent_id).values_list('period', flat=True))
+        department = Agent.objects.values_list('department', flat=True).get(pk=agent_id)
+        for period, start in starts.items():
+            if period in existing:
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        agent_id=agent_id, department=department, period=period, period_start=start,
+                        call_count=calls, score_sum=score, avg_score=score / calls, changes=1
+                    )
+            except IntegrityError:
+                # Another analysis of the agent created the entry first
+                cls.objects.filter(agent_id=agent_id, period=period, period_start=start).update(
+                    changes=F('changes') + 1,
+                    **running_average('call_count', 'score_sum', 'avg_score', calls, score)
+                )
+
+
+class AgentDailyStats(models.Model):
+    """
+    Rollup of an agent's call analyses made on one day.
+    
+    Updated in the same transaction as every analysis save and delete, so
+    reports and trends over a date range read one row per agent and day
+    instead of every call.
+    """
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    call_count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    score_sq_sum = models.FloatField(default=0.0, help_text="Sum of squared coverage scores, for the variance")
+    positive_count = models.PositiveIntegerField(default=0)
+    neutral_count = models.PositiveIntegerField(default=0)
+    negative_count = models.PositiveIntegerField(default=0)
+    compliance_checks = models.PositiveIntegerField(default=0, help_text="Compliance checks evaluated")
+    compliance_passed = models.PositiveIntegerField(default=0, help_text="Compliance checks passed")
+    compliant_calls = models.PositiveIntegerField(default=0, help_text="Calls that passed every compliance check")
+    total_duration_seconds = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['date', 'agent']
+        constraints = [
+            models.UniqueConstraint(fields=['agent', 'date'], name='unique_agent_daily_stats'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'agent']),
+        ]
+    
+    def __str__(self):
+        return f"{self.agent} on {self.date}: {self.call_count} calls"
+    
+    @staticmethod
+    def contribution(coverage_score, sentiment, compliance_check, duration_seconds):
+        """
+        Return what one analysis adds to each counter.
+        
+        Args:
+            coverage_score: Coverage score of the analysis
+            sentiment: Sentiment of the call
+            compliance_check: Dict of compliance check names to whether they passed
+            duration_seconds: Duration of the call recording
+            
+        Returns:
+            dict: Amount added to each counter field
+        """
+        checks = compliance_check if isinstance(compliance_check, dict) else {}
+        passed = sum(1 for result in checks.values() if result is True)
+        counts = {
+            'call_count': 1,
+            'score_sum': coverage_score,
+            'score_sq_sum': coverage_score * coverage_score,
+            'positive_count': 0,
+            'neutral_count': 0,
+            'negative_count': 0,
+            'compliance_checks': len(checks),
+            'compliance_passed': passed,
+            'compliant_calls': int(bool(checks) and passed == len(checks)),
+            'total_duration_seconds': duration_seconds or 0,
+        }
+        if f'{sentiment}_count' in counts:
+            counts[f'{sentiment}_count'] = 1
+        return counts
+    
+    @classmethod
+    def record_analysis(cls, agent_id, day, changes):
+        """
+        Add to the counters of an agent's day in a single atomic UPDATE, creating the row if needed.
+        
+        Args:
+            agent_id: ID of the agent
+            day: Date the analyses were made
+            changes: Amount to add to each changed counter
+        """
+        updates = {field: F(field) + value for field, value in changes.items()}
+        if cls.objects.filter(agent_id=agent_id, date=day).update(**updates) or changes.get('call_count', 0) <= 0:
+            # A change to a day that was never filled in needs no row; backfilling adds it
+            return
+        
+        try:
+            with transaction.atomic():
+                cls.objects.create(agent_id=agent_id, date=day, **changes)
+        except IntegrityError:
+            # Another analysis of the agent created the row first
+            cls.objects.filter(agent_id=agent_id, date=day).update(**updates)
+    
+    @classmethod
+    def rebuild(cls, agents=None):
+        """
+        Recompute the daily stats from the call analyses, for backfilling and reconciliation.
+        
+        Args:
+            agents: Optional queryset of agents to rebuild; all agents by default
+            
+        Returns:
+            int: Number of rows created
+        """
+        analyses = CallAnalysis.objects.order_by()
+        stats = cls.objects.all()
+        if agents is not None:
+            analyses = analyses.filter(agent__in=agents)
+            stats = stats.filter(agent__in=agents)
+        
+        analyses = analyses.values(
+            'agent_id', 'created_at', 'coverage_score', 'sentiment', 'compliance_check',
+            'call_recording__duration_seconds'
+        )
+        
+        rows = {}
+        for analysis in analyses.iterator(chunk_size=2000):
+            row = rows.setdefault((analysis['agent_id'], timezone.localdate(analysis['created_at'])), {})
+            counts = cls.contribution(
+                analysis['coverage_score'], analysis['sentiment'], analysis['compliance_check'],
+                analysis['call_recording__duration_seconds']
+            )
+            for field, value in counts.items():
+                row[field] = row.get(field, 0) + value
+        
+        with transaction.atomic():
+            stats.delete()
+            cls.objects.bulk_create(
+                [cls(agent_id=agent_id, date=day, **counters) for (agent_id, day), counters in rows.items()],
+                batch_size=500
+            )
+        return len(rows)
+
+
+@receiver(post_save, sender=Agent)
+def update_leaderboard_department(sender, instance, **kwargs):
+    """Move an agent's leaderboard entries along when the agent changes department."""
+    LeaderboardEntry.objects.filter(agent=instance).exclude(department=instance.department).update(
+        department=instance.department, changes=F('changes') + 1
+    )
+
+class Utterance(models.Model):
+    """Model for one speaker turn of a call transcription, timed in milliseconds from the start of the call."""
+    analysis = models.ForeignKey(CallAnalysis, on_delete=models.CASCADE, related_name='utterances')
+    position = models.PositiveIntegerField(help_text="Order of the utterance within the call")
+    speaker = models.CharField(max_length=10)
+    start_ms = models.PositiveIntegerField()
+    end_ms = models.PositiveIntegerField()
+    text = models.TextField()
+    
+    class Meta:
+        ordering = ['analysis', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['analysis', 'position'], name='unique_utterance_position'),
+        ]
+        indexes = [
+            models.Index(fields=['analysis', 'start_ms']),
+        ]
+    
+    def __str__(self):
+        return f"{self.speaker} {self.start_ms}-{self.end_ms}ms: {self.text[:50]}"
 
 class Report(models.Model):
     """Model for aggregated reports and analytics."""
@@ -0,0 +1,20 @@
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Renderer that lets views answer ``Accept: text/event-stream`` requests.
+
+    The events themselves are written by a StreamingHttpResponse; this
+    renderer only serializes error responses raised before the stream starts.
+    """
+
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return f"event: error\ndata: {json.dumps(data)}\n\n".encode(self.charset)
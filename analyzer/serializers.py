@@ -1,8 +1,65 @@
+import re
 from rest_framework import serializers
-from .models import Agent, CallRecording, CallAnalysis, Report, TrainingSession
+from .models import Agent, LeaderboardEntry, CallRecording, UploadSession, CallAnalysis, Utterance, Report, TrainingSession
 from django.contrib.auth.models import User
 
 
+class SparseFieldsMixin:
+    """
+    Serializer mixin that limits the output to requested fields and expands related objects.
+    
+    ``fields`` names the fields to keep; ``expand`` names fields of
+    ``expandable_fields`` to replace by the nested representation of the
+    related object. ``optimize_queryset`` loads exactly what those fields
+    read, with one query per page.
+    """
+    # Field name -> (serializer class, relation path the nested serializer reads)
+    expandable_fields = {}
+    # Field name -> lookups the field reads; other fields read the model field of the same name
+    field_columns = {}
+    
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in expand or ():
+            serializer_class, _ = self.expandable_fields[name]
+            self.fields[name] = serializer_class(read_only=True)
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - set(expand or ()):
+                self.fields.pop(name)
+    
+    @classmethod
+    def optimize_queryset(cls, queryset, fields=None, expand=()):
+        """
+        Restrict a queryset to the columns and joins the requested fields need.
+        
+        Args:
+            queryset: Queryset of the serializer's model
+            fields: Optional field names to serialize; all fields by default
+            expand: Names of the fields to expand
+            
+        Returns:
+            QuerySet: The queryset with select_related() and only() applied
+        """
+        columns = {queryset.model._meta.pk.name}
+        relations = set()
+        for name in set(fields if fields is not None else cls.Meta.fields) | set(expand):
+            if name in expand:
+                # Nested serializers read every column of every model along the path
+                path = cls.expandable_fields[name][1]
+                model, prefix = queryset.model, ''
+                for part in path.split('__'):
+                    prefix = f'{prefix}__{part}' if prefix else part
+                    model = model._meta.get_field(part).related_model
+                    columns.update(f'{prefix}__{field.name}' for field in model._meta.concrete_fields)
+                relations.add(path)
+                continue
+            for column in cls.field_columns.get(name, [name]):
+                columns.add(column)
+                if '__' in column:
+                    relations.add(column.rsplit('__', 1)[0])
+        return queryset.select_related(*relations).only(*columns)
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -22,25 +79,84 @@ class AgentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'avg_coverage_score', 'total_calls_handled']
 
 
-class CallRecordingSerializer(serializers.ModelSerializer):
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """An agent's details with its standing and totals for the leaderboard's period."""
+    
+    class Meta:
+        model = LeaderboardEntry
+        fields = [
+            'rank', 'department_rank', 'period', 'period_start', 'call_count', 'avg_score'
+        ]
+        read_only_fields = fields
+    
+    def to_representation(self, instance):
+        return {**AgentSerializer(instance.agent, context=self.context).data, **super().to_representation(instance)}
+
+
+class CallRecordingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     agent_name = serializers.SerializerMethodField()
     
+    expandable_fields = {
+        'agent': (AgentSerializer, 'agent__user'),
+    }
+    field_columns = {
+        'agent_name': ['agent__user__first_name', 'agent__user__last_name'],
+    }
+    
     class Meta:
         model = CallRecording
         fields = [
             'id', 'title', 'file', 'agent', 'agent_name', 'customer_phone',
-            'uploaded_at', 'duration_seconds', 'status'
+            'uploaded_at', 'duration_seconds', 'audio_format', 'sample_rate',
+            'channels', 'bitrate', 'status'
+        ]
+        read_only_fields = [
+            'id', 'uploaded_at', 'duration_seconds', 'audio_format', 'sample_rate',
+            'channels', 'bitrate', 'status'
         ]
-        read_only_fields = ['id', 'uploaded_at', 'duration_seconds', 'status']
     
     def get_agent_name(self, obj):
         return obj.agent.user.get_full_name()
 
 
-class CallAnalysisSerializer(serializers.ModelSerializer):
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'agent', 'title', 'filename', 'customer_phone', 'total_size',
+            'sha256', 'received_bytes', 'status', 'error', 'call_recording',
+            'created_at', 'expires_at'
+        ]
+        read_only_fields = [
+            'id', 'received_bytes', 'status', 'error', 'call_recording',
+            'created_at', 'expires_at'
+        ]
+    
+    def validate_total_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("The file must not be empty.")
+        return value
+    
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError("Expected a hex SHA-256 digest.")
+        return value
+
+
+class CallAnalysisSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     recording_title = serializers.CharField(source='call_recording.title', read_only=True)
     agent_name = serializers.CharField(source='agent.user.get_full_name', read_only=True)
     
+    expandable_fields = {
+        'agent': (AgentSerializer, 'agent__user'),
+        'call_recording': (CallRecordingSerializer, 'call_recording__agent__user'),
+    }
+    field_columns = {
+        'recording_title': ['call_recording__title'],
+        'agent_name': ['agent__user__first_name', 'agent__user__last_name'],
+    }
+    
     class Meta:
         model = CallAnalysis
         fields = [
@@ -48,16 +164,40 @@ class CallAnalysisSerializer(serializers.ModelSerializer):
             'transcription_text', 'agent_text', 'customer_text',
             'coverage_score', 'score_explanation', 'sentiment',
             'confidence_score', 'key_issues', 'compliance_check',
-            'improvement_suggestions', 'created_at', 'updated_at'
+            'improvement_suggestions', 'transcript_tokens', 'prompt_transcript_tokens',
+            'created_at', 'updated_at'
         ]
         read_only_fields = [
             'id', 'recording_title', 'agent_name', 'transcription_text',
             'agent_text', 'customer_text', 'coverage_score', 'score_explanation',
             'sentiment', 'confidence_score', 'key_issues', 'compliance_check',
-            'improvement_suggestions', 'created_at', 'updated_at'
+            'improvement_suggestions', 'transcript_tokens', 'prompt_transcript_tokens',
+            'created_at', 'updated_at'
         ]
 
 
+class CallAnalysisListSerializer(CallAnalysisSerializer):
+    """Compact representation of an analysis for list pages, without the transcript."""
+    
+    class Meta(CallAnalysisSerializer.Meta):
+        fields = [
+            'id', 'call_recording', 'recording_title', 'agent', 'agent_name',
+            'coverage_score', 'sentiment', 'confidence_score', 'key_issues',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class UtteranceSerializer(serializers.ModelSerializer):
+    start = serializers.IntegerField(source='start_ms', read_only=True)
+    end = serializers.IntegerField(source='end_ms', read_only=True)
+    
+    class Meta:
+        model = Utterance
+        fields = ['position', 'speaker', 'start', 'end', 'text']
+        read_only_fields = fields
+
+
 class ReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Report
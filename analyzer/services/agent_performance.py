@@ -0,0 +1,116 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, FloatField, Q
+from django.utils import timezone
+from ..models import CallAnalysis, CallRecording
+from ..serializers import CallRecordingSerializer
+
+logger = logging.getLogger(__name__)
+
+# Rolling windows, in days, accepted by the performance endpoint
+PERFORMANCE_WINDOWS = (7, 30, 90)
+
+SCORE_PERCENTILES = {'p25': 0.25, 'p50': 0.5, 'p75': 0.75, 'p90': 0.9}
+
+RECENT_CALLS = 5
+
+
+class PercentileCont(Aggregate):
+    """Continuous percentile of an expression (PostgreSQL's ordered-set aggregate)."""
+
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def percentile(sorted_values, fraction):
+    """Return the percentile of sorted values, interpolated like PERCENTILE_CONT."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def get_agent_performance(agent, window=None):
+    """
+    Return an agent's performance metrics, from the cache when possible.
+
+    Cache entries are keyed by the agent's metrics version, which every
+    change to the agent's call analyses bumps, so they are invalidated in
+    all processes without deleting anything. They also expire after
+    AGENT_PERFORMANCE_CACHE_TIMEOUT seconds, which bounds how stale the
+    rolling window and the statuses of recent calls can get.
+
+    Args:
+        agent: Agent object, as loaded for the request
+        window: Optional number of days to look back; all time by default
+
+    Returns:
+        dict: Call counts, average and percentiles of the coverage score,
+            sentiment distribution and the most recent calls
+    """
+    key = f"agent-performance:{agent.id}:{agent.metrics_version}:{window or 'all'}"
+    performance = cache.get(key)
+    if performance is None:
+        performance = compute_agent_performance(agent, window)
+        cache.set(key, performance, settings.AGENT_PERFORMANCE_CACHE_TIMEOUT)
+    return performance
+
+
+def compute_agent_performance(agent, window=None):
+    """
+    Compute an agent's performance metrics.
+
+    The counts, average, sentiment split and (on PostgreSQL) the score
+    percentiles come from one conditional-aggregate query; other databases
+    have no PERCENTILE_CONT, so the scores are fetched to compute them.
+    """
+    analyses = CallAnalysis.objects.filter(agent=agent)
+    recordings = CallRecording.objects.filter(agent=agent)
+    if window:
+        since = timezone.now() - timedelta(days=window)
+        analyses = analyses.filter(created_at__gte=since)
+        recordings = recordings.filter(uploaded_at__gte=since)
+
+    aggregates = {
+        'total_calls': Count('id'),
+        'avg_coverage_score': Avg('coverage_score'),
+        **{
+            sentiment: Count('id', filter=Q(sentiment=sentiment))
+            for sentiment, _ in CallAnalysis.SENTIMENT_CHOICES
+        }
+    }
+    native_percentiles = connection.vendor == 'postgresql'
+    if native_percentiles:
+        aggregates.update({
+            name: PercentileCont('coverage_score', fraction)
+            for name, fraction in SCORE_PERCENTILES.items()
+        })
+    metrics = analyses.aggregate(**aggregates)
+
+    if native_percentiles:
+        percentiles = {name: metrics[name] for name in SCORE_PERCENTILES}
+    else:
+        scores = list(analyses.order_by('coverage_score').values_list('coverage_score', flat=True))
+        percentiles = {name: percentile(scores, fraction) for name, fraction in SCORE_PERCENTILES.items()}
+
+    recent_calls = recordings.select_related('agent__user').order_by('-uploaded_at')[:RECENT_CALLS]
+
+    return {
+        'window': window,
+        'total_calls': metrics['total_calls'],
+        'avg_coverage_score': metrics['avg_coverage_score'] or 0.0,
+        'score_percentiles': percentiles,
+        'recent_calls': CallRecordingSerializer(recent_calls, many=True).data,
+        'sentiment_distribution': {
+            sentiment: metrics[sentiment] for sentiment, _ in CallAnalysis.SENTIMENT_CHOICES
+        }
+    }
@@ -0,0 +1,80 @@
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError
+from django.conf import settings
+from .api_limiter import get_api_limiter
+
+logger = logging.getLogger(__name__)
+
+class AnalysisBatcher:
+    """
+    Pack analyses requested by concurrent workers into multi-call LLM requests.
+
+    Each worker thread submits its transcript and blocks until the result is
+    ready. A batch is sent as soon as ``batch_size`` transcripts are waiting,
+    or once the oldest has waited ``max_wait`` seconds, whichever comes
+    first, so a worker never waits much longer than ``max_wait`` for a batch
+    to fill. If the batch request fails or its response cannot be parsed,
+    the calls missing from it are analysed one request at a time. All
+    requests go through the provider's API limiter.
+    """
+
+    def __init__(self, backend, batch_size=None, max_wait=None, limiter=None):
+        self.backend = backend
+        self.limiter = limiter or get_api_limiter(backend.name)
+        self.batch_size = batch_size or settings.ANALYSIS_BATCH_SIZE
+        self.max_wait = max_wait if max_wait is not None else settings.ANALYSIS_BATCH_MAX_WAIT
+        self.pending = []
+        self.lock = threading.Lock()
+        self.next_id = 0
+
+    def analyze(self, transcript):
+        """
+        Analyze a transcript as part of the next batch.
+
+        Args:
+            transcript: Speaker-tagged transcript of the call
+
+        Returns:
+            dict: Analysis result for this transcript
+        """
+        future = Future()
+        with self.lock:
+            self.next_id += 1
+            self.pending.append((f"call-{self.next_id}", transcript, future))
+            full = len(self.pending) >= self.batch_size
+
+        if full:
+            self.flush()
+        else:
+            try:
+                return future.result(timeout=self.max_wait)
+            except TimeoutError:
+                # Nobody filled the batch in time: send what is waiting
+                self.flush()
+        return future.result()
+
+    def flush(self):
+        """Send the waiting transcripts as one batch and resolve their results."""
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return
+
+        transcripts = {call_id: transcript for call_id, transcript, _ in batch}
+        results = {}
+        if len(batch) > 1:
+            try:
+                results = self.limiter.call(self.backend.analyze_batch, transcripts)
+                logger.info(f"Analysed {len(results)} of {len(batch)} calls in one batch request")
+            except Exception as e:
+                logger.warning(f"Batch analysis of {len(batch)} calls failed, analysing them one by one: {str(e)}")
+
+        for call_id, transcript, future in batch:
+            try:
+                result = results.get(call_id)
+                if result is None:
+                    result = self.limiter.call(self.backend.analyze, transcript)
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
@@ -0,0 +1,304 @@
+import logging
+import random
+import threading
+import time
+from django.conf import settings
+from .backends.base import BackendUnavailableError
+from .singletons import KeyedProcessSingleton
+
+logger = logging.getLogger(__name__)
+
+class ProviderUnavailableError(Exception):
+    """Raised instead of calling a provider while its circuit breaker is open."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` calls per second in bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it. A rate of 0 never blocks."""
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def available(self):
+        """Return the number of tokens currently in the bucket."""
+        with self.lock:
+            self._refill()
+            return self.tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Limit on concurrent calls that adapts with additive increase, multiplicative decrease.
+
+    Every call that succeeds at normal latency raises the limit by about one
+    per window of ``limit`` calls. A rate-limited or failed call, or a
+    smoothed latency more than ``latency_tolerance`` times the best recently
+    observed, halves it; successive signals within ``cooldown`` seconds
+    count as one, so a burst of failures from the same overload does not
+    collapse the limit to its minimum.
+    """
+
+    def __init__(self, max_limit, min_limit=1, latency_tolerance=3.0, cooldown=1.0):
+        self.max_limit = max(max_limit, min_limit)
+        self.min_limit = min_limit
+        self.limit = float(max(self.max_limit // 2, min_limit))
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.latency = None
+        self.baseline = None
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Block until a call may start under the current limit."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    def release(self, latency=None, overloaded=False):
+        """
+        Finish a call and adapt the limit to its outcome.
+
+        Args:
+            latency: Seconds the call took, if it succeeded
+            overloaded: True if the provider rate-limited or failed the call
+        """
+        with self.condition:
+            self.in_flight -= 1
+
+            congested = False
+            if latency is not None:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                # The baseline follows improvements at once and degradations slowly
+                if self.baseline is None or self.latency < self.baseline:
+                    self.baseline = self.latency
+                else:
+                    self.baseline += (self.latency - self.baseline) * 0.01
+                congested = bool(self.latency_tolerance) and self.latency > self.baseline * self.latency_tolerance
+
+            now = time.monotonic()
+            if overloaded or congested:
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self.last_decrease = now
+            elif latency is not None:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            self.condition.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Stop calling a provider after repeated failures and probe it again later.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are refused for ``reset_timeout`` seconds. Then a single probe call
+    is let through: if it succeeds the circuit closes, otherwise it opens
+    again for another ``reset_timeout``.
+    """
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Raise ProviderUnavailableError unless a call may go through now.
+
+        Returns:
+            bool: True if the call is the half-open probe, whose outcome must
+                be reported with record_success or record_failure
+        """
+        with self.lock:
+            if self.state == 'closed':
+                return False
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise ProviderUnavailableError(f"{self.name} circuit is open", self._retry_after())
+                self.state = 'half_open'
+            if self.probing:
+                raise ProviderUnavailableError(f"{self.name} circuit is half open", self._retry_after())
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            if self.state != 'closed':
+                logger.info(f"{self.name} circuit closed after a successful probe")
+            self.state = 'closed'
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                logger.warning(f"{self.name} circuit opened after {self.failures} consecutive failures")
+
+    def retry_after(self):
+        """Return the seconds until the circuit lets a probe through."""
+        with self.lock:
+            return self._retry_after()
+
+    def _retry_after(self):
+        if self.state == 'closed':
+            return 0
+        if self.state == 'half_open':
+            return self.reset_timeout
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0)
+
+
+class ProviderLimiter:
+    """
+    Shared gate in front of one external AI provider.
+
+    Every call takes a token from the provider's rate limit and a slot under
+    its adaptive concurrency limit. Calls failing with
+    BackendUnavailableError (rate limits, timeouts, server errors) are
+    retried with exponentially growing, fully jittered delays. Outages, and
+    rate limiting that outlasts the retries, count towards the circuit
+    breaker. Calls that run out of retries raise ProviderUnavailableError,
+    and while the circuit is open calls raise it at once, so the caller can
+    park the work.
+    """
+
+    def __init__(self, name, rate=0, burst=1, max_concurrency=16):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrencyLimit(max_concurrency, latency_tolerance=settings.API_LATENCY_TOLERANCE)
+        self.breaker = CircuitBreaker(name, settings.API_CIRCUIT_FAILURE_THRESHOLD, settings.API_CIRCUIT_RESET_TIMEOUT)
+        self.max_attempts = max(settings.API_RETRY_ATTEMPTS, 1)
+        self.base_delay = settings.API_RETRY_BASE_DELAY
+        self.max_delay = settings.API_RETRY_MAX_DELAY
+        self.counters = dict.fromkeys(
+            ('calls', 'succeeded', 'rate_limited', 'unavailable', 'retries', 'rejected'), 0
+        )
+        self.counter_lock = threading.Lock()
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call the provider through the limiter.
+
+        Raises:
+            ProviderUnavailableError: If the circuit breaker is open, or the
+                provider is still unavailable after all retries
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                probe = self.breaker.before_call()
+            except ProviderUnavailableError:
+                self._count('rejected')
+                raise
+
+            self.bucket.acquire()
+            self.concurrency.acquire()
+            self._count('calls')
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except BackendUnavailableError as e:
+                self.concurrency.release(overloaded=True)
+                self._count('rate_limited' if e.rate_limited else 'unavailable')
+                # A 429 asks for less traffic, which backing off provides; only
+                # outages, or rate limiting that outlasts the retries, open the
+                # circuit. A failed probe reopens it whatever the error.
+                if probe or not e.rate_limited or attempt + 1 >= self.max_attempts:
+                    self.breaker.record_failure()
+                if attempt + 1 >= self.max_attempts:
+                    # Out of retries: the caller parks the work rather than failing it
+                    retry_after = e.retry_after or self.breaker.retry_after() or self.max_delay
+                    raise ProviderUnavailableError(
+                        f"{self.name} unavailable after {self.max_attempts} attempts: {str(e)}", retry_after
+                    ) from e
+                if probe:
+                    # The next attempt is refused, so the caller parks the work
+                    continue
+
+                delay = e.retry_after or random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                logger.warning(f"{self.name} call failed ({str(e)}), retrying in {delay:.1f}s")
+                self._count('retries')
+                time.sleep(delay)
+            except Exception:
+                # The provider answered; the request itself was at fault
+                self.concurrency.release()
+                self.breaker.record_success()
+                raise
+            else:
+                self.concurrency.release(latency=time.monotonic() - started)
+                self.breaker.record_success()
+                self._count('succeeded')
+                return result
+
+    def stats(self):
+        """Return the limiter's current state and counters."""
+        with self.counter_lock:
+            counters = dict(self.counters)
+        return {
+            'circuit': self.breaker.state,
+            'retry_after': round(self.breaker.retry_after(), 1),
+            'concurrency_limit': int(self.concurrency.limit),
+            'max_concurrency': self.concurrency.max_limit,
+            'in_flight': self.concurrency.in_flight,
+            'latency': round(self.concurrency.latency, 3) if self.concurrency.latency is not None else None,
+            'rate': self.bucket.rate,
+            'tokens': round(self.bucket.available(), 1),
+            **counters
+        }
+
+    def _count(self, counter):
+        with self.counter_lock:
+            self.counters[counter] += 1
+
+
+_limiters = KeyedProcessSingleton(
+    lambda name: ProviderLimiter(name, **settings.API_LIMITS.get(name, {}))
+)
+
+def get_api_limiter(name):
+    """
+    Return the process-wide limiter for a provider.
+
+    Providers listed in API_LIMITS get its rate and concurrency limits;
+    others (such as the local backends) are only retried and circuit-broken.
+    """
+    return _limiters.get(name)
+
+
+def api_limiter_stats():
+    """Return the state of every limiter created in this process."""
+    return {limiter.name: limiter.stats() for limiter in _limiters.all()}
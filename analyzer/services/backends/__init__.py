@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Backends are referenced by dotted path so that selecting a local engine
+# never imports the AssemblyAI or Gemini SDKs. Settings may also name a
+# dotted path directly to plug in a custom backend.
+TRANSCRIPTION_BACKENDS = {
+    'assemblyai': 'analyzer.services.backends.assemblyai_backend.AssemblyAITranscriptionBackend',
+    'local': 'analyzer.services.backends.local.LocalTranscriptionBackend',
+}
+
+ANALYSIS_BACKENDS = {
+    'gemini': 'analyzer.services.backends.gemini_backend.GeminiAnalysisBackend',
+    'local': 'analyzer.services.backends.local.LocalAnalysisBackend',
+}
+
+def get_transcription_backend(name=None):
+    """Instantiate the transcription backend named in TRANSCRIPTION_BACKEND."""
+    name = name or settings.TRANSCRIPTION_BACKEND
+    return import_string(TRANSCRIPTION_BACKENDS.get(name, name))()
+
+def get_analysis_backend(name=None):
+    """Instantiate the analysis backend named in ANALYSIS_BACKEND."""
+    name = name or settings.ANALYSIS_BACKEND
+    return import_string(ANALYSIS_BACKENDS.get(name, name))()
@@ -0,0 +1,94 @@
+import assemblyai as aai
+import httpx
+import logging
+from contextlib import contextmanager
+from django.conf import settings
+from .base import BackendError, BackendUnavailableError, TranscriptionBackend, build_transcription_result
+
+logger = logging.getLogger(__name__)
+
+class AssemblyAITranscriptionBackend(TranscriptionBackend):
+    """Transcription backend using the AssemblyAI API."""
+    
+    name = 'assemblyai'
+    supports_webhooks = True
+    
+    def __init__(self):
+        client_settings = {
+            'api_key': settings.ASSEMBLY_AI_API_KEY,
+            'polling_interval': settings.ASSEMBLY_AI_POLLING_INTERVAL
+        }
+        
+        # Point the SDK at another server, e.g. the load test stand-in
+        if settings.ASSEMBLY_AI_BASE_URL:
+            client_settings['base_url'] = settings.ASSEMBLY_AI_BASE_URL
+        
+        # One client and transcriber for the backend's lifetime, instead of the
+        # SDK's global settings, so their keep-alive HTTP connections are reused
+        self.client = aai.Client(settings=aai.Settings(**client_settings))
+        self.transcriber = aai.Transcriber(client=self.client)
+    
+    def transcribe(self, file_path, config):
+        # Start transcription with speaker diarization and wait for it
+        with self._translate_errors():
+            transcript = self.transcriber.transcribe(file_path, config=aai.TranscriptionConfig(**config))
+        
+        if transcript.status == 'error':
+            logger.error(f"Transcription failed: {transcript.error}")
+            raise BackendError(transcript.error)
+        
+        return self._result(transcript)
+    
+    def submit(self, file_path, config, webhook):
+        transcription_config = aai.TranscriptionConfig(**config).set_webhook(
+            webhook['url'], webhook['auth_header_name'], webhook['auth_header_value']
+        )
+        
+        # Upload the audio and queue the transcript without polling for it
+        with self._translate_errors():
+            transcript = self.transcriber.submit(file_path, config=transcription_config)
+        
+        if transcript.status == 'error':
+            logger.error(f"Transcription submission failed: {transcript.error}")
+            raise BackendError(transcript.error)
+        
+        return transcript.id
+    
+    def fetch(self, transcript_id):
+        with self._translate_errors():
+            transcript = aai.api.get_transcript(self.client.http_client, transcript_id)
+        
+        if transcript.status == 'error':
+            logger.error(f"Transcription {transcript_id} failed: {transcript.error}")
+            raise BackendError(transcript.error)
+        if transcript.status != 'completed':
+            return None
+        
+        return self._result(transcript)
+    
+    @contextmanager
+    def _translate_errors(self):
+        """Report rate limits, server errors and network errors as BackendUnavailableError."""
+        try:
+            yield
+        except aai.types.AssemblyAIError as e:
+            status_code = getattr(e, 'status_code', None)
+            if status_code == 429 or (status_code or 0) >= 500:
+                raise BackendUnavailableError(str(e), rate_limited=status_code == 429)
+            raise
+        except httpx.TransportError as e:
+            raise BackendUnavailableError(f"AssemblyAI request failed: {str(e)}")
+    
+    def _result(self, transcript):
+        return build_transcription_result(
+            transcript.text,
+            [
+                {
+                    'speaker': u.speaker,
+                    'text': u.text,
+                    'start': u.start,
+                    'end': u.end
+                }
+                for u in transcript.utterances or []
+            ]
+        )
@@ -0,0 +1,285 @@
+import json
+import logging
+import math
+import re
+from ...models import CallAnalysis
+
+logger = logging.getLogger(__name__)
+
+class BackendError(Exception):
+    """Raised when a transcription or analysis backend cannot complete a request."""
+
+
+class BackendUnavailableError(BackendError):
+    """
+    Raised when a provider is temporarily unable to serve a request.
+    
+    Covers rate limiting, timeouts, connection errors and server errors, which
+    are worth retrying later, unlike errors caused by the request itself.
+    """
+    
+    def __init__(self, message, rate_limited=False, retry_after=None):
+        super().__init__(message)
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+
+
+class TranscriptionBackend:
+    """Interface for speech-to-text engines used by TranscriptionService."""
+    
+    name = None
+    
+    # Whether submit and fetch can report completion by webhook instead of blocking
+    supports_webhooks = False
+    
+    def transcribe(self, file_path, config):
+        """
+        Transcribe an audio file with speaker labels.
+        
+        Args:
+            file_path: Path to the audio file
+            config: Transcription options (speaker_labels, speakers_expected, language_code)
+            
+        Returns:
+            dict: full_text, agent_text, customer_text and utterances
+            
+        Raises:
+            BackendError: If the engine reports a failure
+            BackendUnavailableError: If the engine is temporarily unavailable
+        """
+        raise NotImplementedError
+    
+    def submit(self, file_path, config, webhook):
+        """
+        Start transcribing an audio file without waiting for the result.
+        
+        Args:
+            file_path: Path to the audio file
+            config: Transcription options, as for transcribe
+            webhook: Dict with the url to call on completion and the
+                auth_header_name and auth_header_value to send with it
+            
+        Returns:
+            str: The engine's ID of the transcript
+        """
+        raise NotImplementedError
+    
+    def fetch(self, transcript_id):
+        """
+        Collect the result of a submitted transcription.
+        
+        Args:
+            transcript_id: ID returned by submit
+            
+        Returns:
+            dict: The transcription result, as returned by transcribe, or None
+                if the transcript is not ready yet
+            
+        Raises:
+            BackendError: If the transcription failed
+        """
+        raise NotImplementedError
+
+
+class AnalysisBackend:
+    """Interface for conversation analysis engines used by SentimentAnalysisService."""
+    
+    name = None
+    model_name = None
+    
+    # Bump whenever the prompt or the parsing of its response changes
+    prompt_version = None
+    
+    # Whether analyze_batch sends several calls in one request
+    supports_batch = False
+    
+    ANALYSIS_KEYS = (
+        'sentiment', 'tone_analysis', 'key_issues', 'coverage_score',
+        'score_explanation', 'compliance_check', 'improvement_suggestions'
+    )
+    
+    def analyze(self, transcript):
+        """
+        Analyze a conversation.
+        
+        Args:
+            transcript: The call as ``Agent:``/``Customer:`` tagged lines, one
+                turn per line, compacted to the prompt token budget
+            
+        Returns:
+            dict: sentiment, tone_analysis, key_issues, coverage_score,
+                score_explanation, compliance_check and improvement_suggestions
+        """
+        raise NotImplementedError
+    
+    def analyze_batch(self, transcripts):
+        """
+        Analyze several conversations.
+        
+        Args:
+            transcripts: Dict of call ID to transcript
+            
+        Returns:
+            dict: Call ID to analysis result; calls missing from the result
+                are retried individually by the caller
+                
+        Raises:
+            BackendError: If the batch response cannot be used at all
+        """
+        return {call_id: self.analyze(transcript) for call_id, transcript in transcripts.items()}
+    
+    def parse_response(self, text):
+        """
+        Parse the JSON object returned by a single-call request.
+        
+        Args:
+            text: Model response, optionally wrapped in a Markdown code fence
+            
+        Returns:
+            dict: The validated analysis
+            
+        Raises:
+            BackendError: If the response is not a JSON object or not a valid analysis
+        """
+        entry = self._load_json(text)
+        if not isinstance(entry, dict):
+            raise BackendError("Analysis response is not a JSON object")
+        return self.parse_analysis(entry)
+    
+    def parse_batch_response(self, text, call_ids):
+        """
+        Parse a JSON array of per-call analyses returned by a batch request.
+        
+        Args:
+            text: Model response, optionally wrapped in a Markdown code fence
+            call_ids: IDs of the calls in the batch
+            
+        Returns:
+            dict: Call ID to analysis for every valid entry with a known ID;
+                invalid entries are left out, so those calls count as failed
+            
+        Raises:
+            BackendError: If the response is not a JSON array
+        """
+        entries = self._load_json(text)
+        if not isinstance(entries, list):
+            raise BackendError("Batch response is not a JSON array")
+        
+        results = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            call_id = str(entry.get('call_id'))
+            if call_id not in call_ids:
+                continue
+            try:
+                results[call_id] = self.parse_analysis(entry)
+            except BackendError as e:
+                logger.warning(f"Discarding the batch analysis of {call_id}: {str(e)}")
+        return results
+    
+    def parse_analysis(self, entry):
+        """
+        Validate an analysis returned by the model and coerce it to the stored types.
+        
+        Args:
+            entry: Dict with the ANALYSIS_KEYS
+            
+        Returns:
+            dict: The analysis, with a sentiment from CallAnalysis.SENTIMENT_CHOICES,
+                a coverage score between 0 and 10, boolean compliance checks,
+                a list of key issues and text explanations
+            
+        Raises:
+            BackendError: If a key is missing or a value has the wrong type or range
+        """
+        missing = [key for key in self.ANALYSIS_KEYS if key not in entry]
+        if missing:
+            raise BackendError(f"Analysis is missing {', '.join(missing)}")
+        
+        sentiment = entry['sentiment']
+        sentiments = [choice for choice, _ in CallAnalysis.SENTIMENT_CHOICES]
+        if not isinstance(sentiment, str) or sentiment.strip().lower() not in sentiments:
+            raise BackendError(f"Invalid sentiment: {sentiment!r}")
+        
+        score = entry['coverage_score']
+        try:
+            if isinstance(score, bool):
+                raise ValueError
+            score = float(score)
+        except (TypeError, ValueError):
+            raise BackendError(f"Invalid coverage score: {score!r}")
+        if not math.isfinite(score) or not 0 <= score <= 10:
+            raise BackendError(f"Coverage score out of range: {score!r}")
+        
+        compliance_check = entry['compliance_check']
+        if not isinstance(compliance_check, dict):
+            raise BackendError("Compliance check is not an object")
+        
+        tone_analysis = entry['tone_analysis']
+        if not isinstance(tone_analysis, dict):
+            raise BackendError("Tone analysis is not an object")
+        
+        key_issues = entry['key_issues']
+        if isinstance(key_issues, str):
+            key_issues = [key_issues]
+        if not isinstance(key_issues, list):
+            raise BackendError("Key issues are not a list")
+        
+        return {
+            'sentiment': sentiment.strip().lower(),
+            'tone_analysis': tone_analysis,
+            'key_issues': [str(issue) for issue in key_issues],
+            'coverage_score': score,
+            'score_explanation': _text(entry['score_explanation']),
+            'compliance_check': {str(check): _passed(check, value) for check, value in compliance_check.items()},
+            'improvement_suggestions': _text(entry['improvement_suggestions'])
+        }
+    
+    def _load_json(self, text):
+        text = re.sub(r"^```(?:json)?\s*|\s*```$", '', text.strip())
+        try:
+            return json.loads(text)
+        except ValueError as e:
+            raise BackendError(f"Response is not valid JSON: {str(e)}")
+
+
+def _passed(check, value):
+    """Return a compliance check result as a bool."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', 'yes', 'passed', 'pass'):
+        return True
+    if isinstance(value, str) and value.strip().lower() in ('false', 'no', 'failed', 'fail'):
+        return False
+    raise BackendError(f"Invalid result for compliance check {check!r}: {value!r}")
+
+
+def _text(value):
+    """Return an explanation as text, joining lists of points by line."""
+    if isinstance(value, list):
+        return "\n".join(str(item) for item in value)
+    return "" if value is None else str(value)
+
+def build_transcription_result(full_text, utterances):
+    """
+    Build the transcription result dictionary from speaker-labelled utterances.
+    
+    Speaker A is assumed to be the agent and speaker B the customer.
+    
+    Args:
+        full_text: Full transcription text
+        utterances: List of dicts with speaker, text, start and end
+        
+    Returns:
+        dict: full_text, agent_text, customer_text and utterances
+    """
+    agent_text = [u['text'] for u in utterances if u['speaker'] == 'A']
+    customer_text = [u['text'] for u in utterances if u['speaker'] == 'B']
+    
+    return {
+        'full_text': full_text,
+        'agent_text': "\n".join(agent_text),
+        'customer_text': "\n".join(customer_text),
+        'utterances': utterances
+    }
@@ -0,0 +1,142 @@
+import google.generativeai as genai
+import logging
+import requests
+import threading
+from django.conf import settings
+from google.api_core import exceptions as google_exceptions
+from .base import AnalysisBackend, BackendUnavailableError
+from ..singletons import ProcessSingleton
+
+logger = logging.getLogger(__name__)
+
+class GeminiModels:
+    """
+    Gemini SDK configured once per process, with one model client per model name.
+    
+    ``genai.configure`` is process-global and discards the SDK's clients, so it
+    must not be called per request: every caller shares these model objects,
+    whose underlying client keeps its connections open between calls.
+    """
+    
+    def __init__(self):
+        if settings.GEMINI_API_ENDPOINT:
+            # Talk REST to another server, e.g. the load test stand-in
+            genai.configure(
+                api_key=settings.GOOGLE_API_KEY,
+                transport='rest',
+                client_options={'api_endpoint': settings.GEMINI_API_ENDPOINT}
+            )
+        else:
+            genai.configure(api_key=settings.GOOGLE_API_KEY)
+        self.models = {}
+        self.lock = threading.Lock()
+    
+    def get(self, model_name):
+        """Return the shared model client for a model name."""
+        with self.lock:
+            if model_name not in self.models:
+                self.models[model_name] = genai.GenerativeModel(model_name)
+            return self.models[model_name]
+
+
+_gemini_models = ProcessSingleton(GeminiModels)
+
+def get_gemini_model(model_name):
+    """Return the process-wide Gemini model client for a model name."""
+    return _gemini_models.get().get(model_name)
+
+
+class GeminiAnalysisBackend(AnalysisBackend):
+    """Analysis backend using Google Gemini 2.0 Flash."""
+    
+    name = 'gemini'
+    model_name = 'gemini-2.0-flash'
+    prompt_version = 'analysis-v3'
+    supports_batch = True
+    
+    # What the model reports for every call, shared by single and batch prompts
+    ANALYSIS_TASKS = """
+        1. Overall sentiment (positive, neutral, or negative)
+        2. Tone analysis for both the agent and customer (detect: escalation, stress, politeness, professionalism)
+        3. Key issues identified in the call
+        4. Coverage score (0-10) - how well the agent handled the complaint
+        5. Coverage score explanation
+        6. Compliance check (Did the agent follow required procedures and disclosures?)
+        7. Improvement suggestions for the agent
+    """
+    
+    # Types of the response values, which parse_analysis enforces
+    RESPONSE_FORMAT = """
+        sentiment is one of "positive", "neutral" or "negative"; tone_analysis is an object with
+        "agent" and "customer" objects of escalation, stress, politeness and professionalism levels;
+        key_issues is an array of strings; coverage_score is a number from 0 to 10; compliance_check
+        is an object of check names to true or false; score_explanation and improvement_suggestions are strings.
+    """
+    
+    def __init__(self):
+        self.model = get_gemini_model(self.model_name)
+    
+    def analyze(self, transcript):
+        prompt = f"""
+        You are an expert insurance call quality analyst.
+        
+        I will provide you with a transcription of a call between an insurance agent and a customer calling with a complaint.
+        Each line is one turn of the conversation, prefixed with the speaker (Agent or Customer).
+        Parts of long calls may have been left out; this is marked in the transcript.
+        
+        Please analyze this conversation and provide the following:
+        {self.ANALYSIS_TASKS}
+        Conversation:
+        {transcript}
+        
+        Respond with a JSON object with the following keys:
+        sentiment, tone_analysis, key_issues, coverage_score, score_explanation, compliance_check, improvement_suggestions
+        {self.RESPONSE_FORMAT}
+        """
+        
+        response = self._generate(
+            prompt,
+            generation_config={'response_mime_type': 'application/json'}
+        )
+        
+        return self.parse_response(response.text)
+    
+    def analyze_batch(self, transcripts):
+        calls = "\n\n".join(
+            f'<call id="{call_id}">\n{transcript}\n</call>'
+            for call_id, transcript in transcripts.items()
+        )
+        prompt = f"""
+        You are an expert insurance call quality analyst.
+        
+        I will provide you with transcriptions of {len(transcripts)} separate calls between insurance agents and customers calling with a complaint.
+        Each call is enclosed in a <call id="..."> element. Each line is one turn of the conversation, prefixed with the speaker (Agent or Customer).
+        Analyze every call on its own; do not carry information from one call over to another.
+        
+        For each call, provide the following:
+        {self.ANALYSIS_TASKS}
+        Calls:
+        {calls}
+        
+        Respond with a JSON array containing one object per call, in the same order as the calls, with the following keys:
+        call_id (the id of the call element), sentiment, tone_analysis, key_issues, coverage_score, score_explanation, compliance_check, improvement_suggestions
+        {self.RESPONSE_FORMAT}
+        """
+        
+        response = self._generate(
+            prompt,
+            generation_config={'response_mime_type': 'application/json'}
+        )
+        
+        return self.parse_batch_response(response.text, transcripts.keys())
+    
+    def _generate(self, prompt, **kwargs):
+        """Call the model, reporting rate limits and outages as BackendUnavailableError."""
+        try:
+            return self.model.generate_content(prompt, **kwargs)
+        except (google_exceptions.TooManyRequests, google_exceptions.ResourceExhausted) as e:
+            raise BackendUnavailableError(str(e), rate_limited=True)
+        except (google_exceptions.ServerError, google_exceptions.DeadlineExceeded) as e:
+            raise BackendUnavailableError(str(e))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise BackendUnavailableError(f"Gemini request failed: {str(e)}")
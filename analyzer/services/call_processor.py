@@ -1,12 +1,14 @@
 import os
 import logging
 from django.conf import settings
-from .transcription import TranscriptionService
-from .sentiment_analysis import SentimentAnalysisService
-from .report_generator import ReportGenerator
-from ..models import CallRecording, CallAnalysis
-import tempfile
-import threading
+from django.db import transaction
+from .transcription import get_transcription_service
+from .sentiment_analysis import get_sentiment_service
+from .report_generator import get_report_generator
+from .job_queue import JobQueue
+from .status_events import publish_status
+from ..models import CallRecording, CallAnalysis, Utterance
+from ..uploads import file_digest
 
 logger = logging.getLogger(__name__)
 
@@ -14,85 +16,192 @@ class CallProcessingService:
     """Service to orchestrate the entire call processing workflow."""
     
     def __init__(self):
-        self.transcription_service = TranscriptionService()
-        self.sentiment_service = SentimentAnalysisService()
-        self.report_generator = ReportGenerator()
+        # Process-wide services, so API clients and their connections are set up once
+        self.transcription_service = get_transcription_service()
+        self.sentiment_service = get_sentiment_service()
+        self.report_generator = get_report_generator()
     
     def process_call_recording(self, recording_id):
         """
-        Process a call recording asynchronously.
+        Queue a call recording for processing by the worker pool.
         
         Args:
             recording_id: ID of the CallRecording object to process
+            
+        Returns:
+            ProcessingJob: The queued job
         """
-        # Start processing in a background thread to avoid blocking
-        thread = threading.Thread(
-            target=self._process_call_recording_thread,
-            args=(recording_id,)
-        )
-        thread.daemon = True
-        thread.start()
+        return JobQueue().enqueue(recording_id)
     
-    def _process_call_recording_thread(self, recording_id):
+    def process_now(self, recording_id):
         """
         Main processing workflow for a call recording.
         
         Args:
             recording_id: ID of the CallRecording object to process
+            
+        Returns:
+            dict: Processing result with the created analysis or an error message
         """
         try:
-            # Get the recording object
-            recording = CallRecording.objects.get(id=recording_id)
-            
-            # Update status to processing
-            recording.status = 'processing'
-            recording.save()
-            
-            logger.info(f"Starting processing for call recording {recording_id}")
-            
-            # Get the file path
-            file_path = recording.file.path
+            recording = self.start_processing(recording_id)
             
-            # 1. Transcribe the audio
-            transcription_result = self.transcription_service.process_audio_file(file_path)
+            # 1. Transcribe the audio (reusing the transcript of identical audio)
+            transcription_result = self.transcribe(recording)
             
             if not transcription_result['success']:
-                logger.error(f"Transcription failed: {transcription_result.get('error')}")
-                recording.status = 'failed'
-                recording.save()
-                return
+                return self.handle_failure(recording_id, "Transcription", transcription_result)
             
             # 2. Perform sentiment and tone analysis
-            sentiment_result = self.sentiment_service.analyze_conversation(transcription_result)
+            sentiment_result = self.analyze(transcription_result)
             
             if not sentiment_result['success']:
-                logger.error(f"Sentiment analysis failed: {sentiment_result.get('error')}")
-                recording.status = 'failed'
-                recording.save()
-                return
+                return self.handle_failure(recording_id, "Sentiment analysis", sentiment_result)
             
             # 3. Create or update the call analysis object
-            analysis = self._create_call_analysis(recording, transcription_result, sentiment_result)
+            analysis = self.persist(recording, transcription_result, sentiment_result)
             
             # 4. Generate Excel report
-            report_path = self.report_generator.generate_call_report(analysis)
+            self.render_report(analysis)
             
             # 5. Update recording status
-            recording.status = 'completed'
-            recording.save()
+            self.mark_completed(recording)
             
-            logger.info(f"Completed processing for call recording {recording_id}")
-            
-            return analysis
+            return {
+                'success': True,
+                'analysis': analysis
+            }
             
         except Exception as e:
             logger.exception(f"Exception in call processing: {str(e)}")
-            try:
-                recording = CallRecording.objects.get(id=recording_id)
-                recording.status = 'failed'
-                recording.save()
-            except:
-                pass
+            return self.fail(recording_id, str(e))
+    
+    def start_processing(self, recording_id):
+        """
+        Load a call recording and mark it as processing.
+        
+        Args:
+            recording_id: ID of the CallRecording object to process
+            
+        Returns:
+            CallRecording: The recording being processed
+        """
+        recording = CallRecording.objects.select_related('agent').get(id=recording_id)
+        
+        recording.status = 'processing'
+        recording.save(update_fields=['status'])
+        publish_status(recording.id, recording.status)
+        
+        logger.info(f"Starting processing for call recording {recording_id}")
+        
+        # Hash recordings stored before uploads were hashed on arrival
+        if not recording.audio_sha256:
+            with recording.file.open('rb') as audio_file:
+                recording.audio_sha256 = file_digest(audio_file)
+            recording.save(update_fields=['audio_sha256'])
+        
+        return recording
+    
+    def transcribe(self, recording):
+        """Transcribe a recording's audio, reusing the transcript of identical audio."""
+        return self.transcription_service.process_audio_file(
+            recording.file.path, audio_sha256=recording.audio_sha256, recording=recording
+        )
+    
+    def analyze(self, transcription_result):
+        """Run sentiment and tone analysis on a transcription."""
+        return self.sentiment_service.analyze_conversation(transcription_result)
+    
+    def persist(self, recording, transcription_result, sentiment_result):
+        """Store the analysis results for a recording."""
+        return self._create_call_analysis(recording, transcription_result, sentiment_result)
+    
+    def render_report(self, analysis):
+        """Generate the Excel report for an analysis."""
+        return self.report_generator.generate_call_report(analysis)
+    
+    def mark_completed(self, recording):
+        """Mark a recording as successfully processed."""
+        recording.status = 'completed'
+        recording.save(update_fields=['status'])
+        publish_status(recording.id, recording.status)
+        
+        logger.info(f"Completed processing for call recording {recording.id}")
+    
+    def handle_failure(self, recording_id, step, result):
+        """
+        Park or fail a recording after a processing step that did not succeed.
+        
+        Args:
+            recording_id: ID of the CallRecording object being processed
+            step: Name of the step, for the error message
+            result: Unsuccessful result of the step
+            
+        Returns:
+            dict: Failed processing result, or a parked one (which the worker
+                pool requeues) if the step is waiting for a webhook or its
+                provider is unavailable
+        """
+        if result.get('waiting'):
+            # Submitted with a webhook: the recording stays processing while the job waits
+            logger.info(f"Call recording {recording_id}: {result['error']}")
+            return {
+                'success': False,
+                'parked': True,
+                'retry_after': result['retry_after'],
+                'error': result['error']
+            }
+        if result.get('retry_after') is not None:
+            return self.park(recording_id, f"{step} deferred: {result.get('error')}", result['retry_after'])
+        return self.fail(recording_id, f"{step} failed: {result.get('error')}")
+    
+    def park(self, recording_id, error, retry_after):
+        """
+        Put a recording back to pending because a provider is unavailable.
+        
+        Args:
+            recording_id: ID of the CallRecording object to park
+            error: Why the recording cannot be processed now
+            retry_after: Seconds after which processing should be retried
+            
+        Returns:
+            dict: Parked processing result, which the worker pool requeues
+                without counting it as a failed attempt
+        """
+        logger.warning(f"Parking call recording {recording_id} for {retry_after:.0f}s: {error}")
+        try:
+            CallRecording.objects.filter(id=recording_id).update(status='pending')
+            publish_status(recording_id, 'pending')
+        except Exception:
+            logger.exception(f"Could not mark call recording {recording_id} as pending")
+        return {
+            'success': False,
+            'parked': True,
+            'retry_after': retry_after,
+            'error': error
+        }
+    
+    def fail(self, recording_id, error):
+        """
+        Mark a recording as failed.
+        
+        Args:
+            recording_id: ID of the CallRecording object that failed
+            error: Description of the failure
+            
+        Returns:
+            dict: Failed processing result
+        """
+        logger.error(f"Processing failed for call recording {recording_id}: {error}")
+        try:
+            CallRecording.objects.filter(id=recording_id).update(status='failed')
+            publish_status(recording_id, 'failed')
+        except Exception:
+            logger.exception(f"Could not mark call recording {recording_id} as failed")
+        return {
+            'success': False,
+            'error': error
+        }
     
     def _create_call_analysis(self, recording, transcription_result, sentiment_result):
         """
@@ -108,21 +217,49 @@ class CallProcessingService:
         """
         analysis_data = sentiment_result['analysis']
         
-        analysis, created = CallAnalysis.objects.update_or_create(
-            call_recording=recording,
-            defaults={
-                'agent': recording.agent,
-                'transcription_text': transcription_result['full_text'],
-                'agent_text': transcription_result['agent_text'],
-                'customer_text': transcription_result['customer_text'],
-                'coverage_score': analysis_data['coverage_score'],
-                'score_explanation': analysis_data['score_explanation'],
-                'sentiment': analysis_data['sentiment'],
-                'confidence_score': 0.85,  # Placeholder value
-                'key_issues': analysis_data['key_issues'],
-                'compliance_check': analysis_data['compliance_check'],
-                'improvement_suggestions': analysis_data['improvement_suggestions']
-            }
-        )
+        with transaction.atomic():
+            analysis, created = CallAnalysis.objects.update_or_create(
+                call_recording=recording,
+                defaults={
+                    'agent': recording.agent,
+                    'transcription_text': transcription_result['full_text'],
+                    'agent_text': transcription_result['agent_text'],
+                    'customer_text': transcription_result['customer_text'],
+                    'coverage_score': analysis_data['coverage_score'],
+                    'score_explanation': analysis_data['score_explanation'],
+                    'sentiment': analysis_data['sentiment'],
+                    'confidence_score': 0.85,  # Placeholder value
+                    'key_issues': analysis_data['key_issues'],
+                    'compliance_check': analysis_data['compliance_check'],
+                    'improvement_suggestions': analysis_data['improvement_suggestions'],
+                    'transcript_tokens': sentiment_result.get('input_tokens', {}).get('before', 0),
+                    'prompt_transcript_tokens': sentiment_result.get('input_tokens', {}).get('after', 0)
+                }
+            )
+            self._store_utterances(analysis, transcription_result.get('utterances') or [], replace=not created)
         
         return analysis
+    
+    def _store_utterances(self, analysis, utterances, replace=False):
+        """
+        Store the timed utterances of a transcription as rows of the analysis.
+        
+        Args:
+            analysis: CallAnalysis object
+            utterances: List of dicts with speaker, text, start and end (milliseconds)
+            replace: Delete utterances stored by an earlier run first
+        """
+        if replace:
+            analysis.utterances.all().delete()
+        
+        Utterance.objects.bulk_create([
+            Utterance(
+                analysis=analysis,
+                position=position,
+                speaker=u['speaker'] or '',
+                start_ms=max(int(u['start'] or 0), 0),
+                end_ms=max(int(u['end'] or 0), 0),
+                text=u['text']
+            )
+            for position, u in enumerate(utterances)
+        ], batch_size=500)
@@ -0,0 +1,310 @@
+import logging
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from .ingestion import PipelineSaturatedError
+from .job_queue import JobQueue
+from ..models import CallRecording, UploadSession, get_upload_path
+from ..audio_probe import recording_metadata
+from ..uploads import HashingFile
+
+logger = logging.getLogger(__name__)
+
+class UploadError(Exception):
+    """Raised when a chunked upload request cannot be applied to its session."""
+
+
+class UploadConflictError(UploadError):
+    """Raised when a request does not match the session's current offset or state."""
+
+    def __init__(self, message, offset):
+        super().__init__(message)
+        self.offset = offset
+
+
+class ChunkedUploadService:
+    """
+    Service for resumable uploads of large call recordings.
+
+    A client creates an upload session, sends the file as chunks that are
+    appended to a partial file on disk at the offset the server reports, and
+    finalizes the session once every byte has arrived. If the connection
+    drops, the client asks the session for its offset and resumes from
+    there. Finalizing verifies the SHA-256 digest, moves the file to storage,
+    creates the CallRecording and queues it for processing.
+    """
+
+    # Bytes read from the request per write to the partial file
+    READ_SIZE = 64 * 1024
+
+    def __init__(self):
+        self.job_queue = JobQueue()
+
+    def create_session(self, **fields):
+        """
+        Start an upload session.
+
+        Args:
+            **fields: UploadSession fields (agent, title, filename, total_size,
+                and optionally customer_phone, sha256 and created_by)
+
+        Returns:
+            UploadSession: The new session
+        """
+        if fields['total_size'] > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise UploadError(f"Uploads are limited to {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes")
+
+        os.makedirs(settings.CHUNKED_UPLOAD_TEMP_DIR, exist_ok=True)
+        session = UploadSession(
+            expires_at=timezone.now() + timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY),
+            **fields
+        )
+        session.temp_path = os.path.join(settings.CHUNKED_UPLOAD_TEMP_DIR, f"{session.id}.part")
+        open(session.temp_path, 'wb').close()
+        session.save()
+
+        logger.info(f"Started upload session {session.id} for {session.filename} ({session.total_size} bytes)")
+        return session
+
+    def append_chunk(self, session_id, offset, stream, length):
+        """
+        Append a chunk read from a stream to the session's partial file.
+
+        The chunk is copied in small blocks, so it is never held in memory as
+        a whole. Bytes that arrived before a dropped connection are kept and
+        counted, so the client can resume from the reported offset.
+
+        No row lock is held while the chunk is read: the session is marked
+        receiving, which keeps other requests off it, and the offset is
+        advanced once the data is on disk.
+
+        Args:
+            session_id: ID of the UploadSession
+            offset: Byte offset of the chunk within the file
+            stream: File-like object the chunk is read from
+            length: Number of bytes in the chunk
+
+        Returns:
+            UploadSession: The updated session
+        """
+        if length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+            raise UploadError(f"Chunks are limited to {settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE} bytes")
+
+        with transaction.atomic():
+            session = self._lock(session_id)
+
+            if offset != session.received_bytes:
+                raise UploadConflictError(
+                    f"Chunk offset {offset} does not match the upload offset {session.received_bytes}",
+                    session.received_bytes
+                )
+            if offset + length > session.total_size:
+                raise UploadError("Chunk extends past the declared size of the file")
+
+            claimed_at = self._claim(session, 'receiving')
+
+        written = 0
+        try:
+            with open(session.temp_path, 'r+b') as partial:
+                partial.seek(offset)
+                # Drop bytes beyond the offset left by an interrupted chunk
+                partial.truncate()
+                try:
+                    while written < length:
+                        data = stream.read(min(self.READ_SIZE, length - written))
+                        if not data:
+                            break
+                        partial.write(data)
+                        written += len(data)
+                except OSError as e:
+                    logger.warning(f"Upload session {session.id} interrupted after {written} bytes: {str(e)}")
+                partial.flush()
+        finally:
+            # Count what reached the disk even if writing it failed
+            session = self._release(
+                session, claimed_at,
+                received_bytes=offset + written,
+                expires_at=timezone.now() + timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY)
+            )
+
+        if written < length:
+            raise UploadConflictError(
+                f"Chunk ended after {written} of {length} bytes",
+                session.received_bytes
+            )
+        return session
+
+    def finalize(self, session_id, sha256=None):
+        """
+        Verify a complete upload, store it and queue it for processing.
+
+        Finalizing a session that already completed returns its recording
+        again, so clients can safely retry after a lost response. As with
+        chunks, the session is marked finalizing rather than locked while the
+        file is hashed and copied to storage.
+
+        Args:
+            session_id: ID of the UploadSession
+            sha256: SHA-256 hex digest of the file, if not given when the session was created
+
+        Returns:
+            dict: The session, its CallRecording and the admission decision
+        """
+        with transaction.atomic():
+            session = self._lock(session_id, statuses=('active', 'completed'))
+
+            if session.status == 'completed':
+                return {'session': session, 'recording': session.call_recording, 'admission': None}
+
+            expected = (sha256 or session.sha256).lower()
+            if not expected:
+                raise UploadError("A SHA-256 checksum is required to finalize the upload")
+
+            if session.received_bytes != session.total_size:
+                raise UploadConflictError(
+                    f"Upload is incomplete: {session.received_bytes} of {session.total_size} bytes received",
+                    session.received_bytes
+                )
+
+            admission = self.job_queue.admit()
+            if not admission['admitted']:
+                raise PipelineSaturatedError(admission)
+
+            claimed_at = self._claim(session, 'finalizing')
+
+        try:
+            # Hash the file while storage copies it instead of reading it twice
+            with open(session.temp_path, 'rb') as partial:
+                metadata = recording_metadata(partial)
+                audio = HashingFile(partial, name=session.filename)
+                stored_name = default_storage.save(get_upload_path(None, session.filename), audio)
+        except Exception:
+            self._release(session, claimed_at)
+            raise
+
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().select_related('agent').get(id=session_id)
+            if session.status != 'finalizing' or session.updated_at != claimed_at:
+                # The session was taken over after this request stalled
+                default_storage.delete(stored_name)
+                raise UploadConflictError(f"Upload session is {session.status}", session.received_bytes)
+
+            if audio.sha256 != expected:
+                default_storage.delete(stored_name)
+                self._close(session, 'failed', f"Checksum mismatch: expected {expected}, received {audio.sha256}")
+                recording = None
+            else:
+                recording = CallRecording.objects.create(
+                    title=session.title,
+                    file=stored_name,
+                    agent=session.agent,
+                    customer_phone=session.customer_phone,
+                    audio_sha256=audio.sha256,
+                    **metadata
+                )
+                self.job_queue.enqueue(recording.id, delay=admission['delay'])
+
+                session.call_recording = recording
+                self._close(session, 'completed')
+
+        if recording is None:
+            raise UploadError("Checksum of the uploaded file does not match")
+
+        logger.info(f"Finalized upload session {session.id} as call recording {recording.id}")
+        return {'session': session, 'recording': recording, 'admission': admission}
+
+    def abort(self, session_id):
+        """
+        Cancel an upload session and delete its partial file.
+
+        A session receiving a chunk can be aborted; the request writing the
+        chunk then finds it gone and reports a conflict.
+        """
+        with transaction.atomic():
+            session = self._lock(session_id, statuses=('active', 'receiving'))
+            self._close(session, 'aborted')
+        return session
+
+    def purge_expired(self):
+        """
+        Abort sessions that have not received a chunk before their expiry.
+
+        Returns:
+            int: Number of sessions purged
+        """
+        purged = 0
+        expired = UploadSession.objects.filter(status__in=['active', 'receiving'], expires_at__lt=timezone.now())
+        for session_id in expired.values_list('id', flat=True):
+            with transaction.atomic():
+                session = (
+                    UploadSession.objects
+                    .select_for_update(skip_locked=True)
+                    .filter(id=session_id, status__in=['active', 'receiving'], expires_at__lt=timezone.now())
+                    .first()
+                )
+                if session is not None:
+                    self._close(session, 'aborted', "Upload session expired")
+                    purged += 1
+
+        if purged:
+            logger.info(f"Purged {purged} expired upload sessions")
+        return purged
+
+    def _lock(self, session_id, statuses=('active',)):
+        """
+        Load and lock a session, checking it is in one of the given states.
+
+        A session left receiving or finalizing for CHUNKED_UPLOAD_STALL_TIMEOUT
+        seconds belonged to a request that died, and counts as active again.
+        """
+        session = UploadSession.objects.select_for_update().select_related('agent').get(id=session_id)
+        state = session.status
+        stalled_before = timezone.now() - timedelta(seconds=settings.CHUNKED_UPLOAD_STALL_TIMEOUT)
+        if state in ('receiving', 'finalizing') and state not in statuses and session.updated_at < stalled_before:
+            logger.warning(f"Upload session {session.id} stalled while {state}; taking it over")
+            state = 'active'
+        if state not in statuses:
+            raise UploadConflictError(f"Upload session is {session.status}", session.received_bytes)
+        return session
+
+    def _claim(self, session, status):
+        """
+        Mark a locked session as in use by this request until it is released.
+
+        Returns:
+            datetime: The session's updated_at, which identifies the claim
+        """
+        session.status = status
+        session.expires_at = timezone.now() + timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY)
+        session.save(update_fields=['status', 'expires_at', 'updated_at'])
+        return session.updated_at
+
+    def _release(self, session, claimed_at, **fields):
+        """
+        Make a claimed session active again, updating the given fields.
+
+        The update only applies while the claim holds, so a session aborted or
+        taken over in the meantime is left alone.
+
+        Returns:
+            UploadSession: The session as stored
+        """
+        released = UploadSession.objects.filter(
+            id=session.id, status=session.status, updated_at=claimed_at
+        ).update(status='active', updated_at=timezone.now(), **fields)
+        session = UploadSession.objects.get(id=session.id)
+        if not released:
+            raise UploadConflictError(f"Upload session is {session.status}", session.received_bytes)
+        return session
+
+    def _close(self, session, status, error=''):
+        """Move a session to a final state and delete its partial file."""
+        session.status = status
+        session.error = error
+        session.save(update_fields=['status', 'error', 'call_recording', 'updated_at'])
+
+        if os.path.exists(session.temp_path):
+            os.remove(session.temp_path)
@@ -0,0 +1,331 @@
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from .backends.local import LocalAnalysisBackend, LocalTranscriptionBackend
+
+logger = logging.getLogger(__name__)
+
+class FakeAPIServer:
+    """
+    Local HTTP stand-in for a third-party API, used by the load test harness.
+
+    Every request waits for ``request_latency`` seconds (varied by
+    ``jitter``, a fraction of the latency) and is answered with HTTP 429 with
+    probability ``rate_limit_rate``. Subclasses implement ``handle``.
+    """
+
+    name = None
+
+    def __init__(self, request_latency=0.05, error_rate=0.0, rate_limit_rate=0.0, jitter=0.25, seed=None):
+        self.request_latency = request_latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+
+        self.counters = {'requests': 0, 'connections': 0, 'rate_limited': 0, 'errors': 0}
+        self.counters_lock = threading.Lock()
+
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host='127.0.0.1', port=0):
+        """Start serving in a background thread on the given (or a free) port."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # Few connections for many requests means clients keep them alive
+                server.count('connections')
+
+            def do_GET(self):
+                server._dispatch(self, 'GET')
+
+            def do_POST(self):
+                server._dispatch(self, 'POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name=f"fake-{self.name}", daemon=True)
+        self.thread.start()
+        logger.info(f"Fake {self.name} API listening on {self.url}")
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def stats(self):
+        """Return request counters."""
+        with self.counters_lock:
+            return dict(self.counters)
+
+    def chance(self, probability):
+        """Return True with the given probability."""
+        with self.random_lock:
+            return probability > 0 and self.random.random() < probability
+
+    def delay(self, seconds):
+        """Return a latency varied by the configured jitter."""
+        with self.random_lock:
+            spread = seconds * self.jitter
+            return max(0.0, self.random.uniform(seconds - spread, seconds + spread))
+
+    def count(self, counter):
+        with self.counters_lock:
+            self.counters[counter] += 1
+
+    def _dispatch(self, request, method):
+        self.count('requests')
+        body = self._read_body(request)
+
+        time.sleep(self.delay(self.request_latency))
+
+        if self.chance(self.rate_limit_rate):
+            self.count('rate_limited')
+            status, payload = self.rate_limited()
+        else:
+            try:
+                status, payload = self.handle(method, urlsplit(request.path).path, body)
+            except Exception as e:
+                logger.exception(f"Fake {self.name} API failed: {str(e)}")
+                status, payload = 500, {'error': str(e)}
+
+        data = json.dumps(payload).encode()
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(data)))
+        if status == 429:
+            request.send_header('Retry-After', '1')
+        request.end_headers()
+        request.wfile.write(data)
+
+    def _read_body(self, request):
+        """Read a request body sent with Content-Length or chunked encoding."""
+        if request.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(request.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    request.rfile.readline()
+                    return b''.join(chunks)
+                chunks.append(request.rfile.read(size))
+                request.rfile.readline()
+
+        length = int(request.headers.get('Content-Length') or 0)
+        return request.rfile.read(length) if length else b''
+
+    def rate_limited(self):
+        return 429, {'error': 'Too Many Requests'}
+
+    def handle(self, method, path, body):
+        """
+        Answer a request.
+
+        Returns:
+            tuple: HTTP status code and JSON-serialisable payload
+        """
+        raise NotImplementedError
+
+
+class FakeAssemblyAIServer(FakeAPIServer):
+    """
+    Stand-in for AssemblyAI's ``/v2/upload`` and ``/v2/transcript`` endpoints.
+
+    A transcript stays ``processing`` for ``transcription_latency`` seconds
+    after it is created and then completes with a synthetic two-speaker
+    conversation, or fails with probability ``error_rate``. Transcripts
+    created with a ``webhook_url`` are announced to it when they are ready,
+    except for a ``webhook_drop_rate`` share of them, to exercise the
+    fallback for missed callbacks.
+    """
+
+    name = 'assemblyai'
+
+    def __init__(self, transcription_latency=2.0, webhook_drop_rate=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.transcription_latency = transcription_latency
+        self.webhook_drop_rate = webhook_drop_rate
+        self.counters.update(webhooks=0, webhooks_dropped=0)
+        self.conversations = LocalTranscriptionBackend()
+        self.ids = itertools.count(1)
+        self.uploads = {}
+        self.transcripts = {}
+        self.lock = threading.Lock()
+
+    def handle(self, method, path, body):
+        if method == 'POST' and path == '/v2/upload':
+            upload_id = next(self.ids)
+            with self.lock:
+                self.uploads[upload_id] = (len(body), body[:1024])
+            return 200, {'upload_url': f"{self.url}/uploads/{upload_id}"}
+
+        if method == 'POST' and path == '/v2/transcript':
+            request = json.loads(body or b'{}')
+            transcript_id = f"fake-{next(self.ids)}"
+            transcript = {
+                'id': transcript_id,
+                'audio_url': request.get('audio_url'),
+                'ready_at': time.monotonic() + self.delay(self.transcription_latency),
+                'failed': self.chance(self.error_rate),
+            }
+            with self.lock:
+                self.transcripts[transcript_id] = transcript
+
+            if request.get('webhook_url'):
+                timer = threading.Timer(
+                    max(transcript['ready_at'] - time.monotonic(), 0),
+                    self._send_webhook,
+                    args=(transcript_id, request)
+                )
+                timer.daemon = True
+                timer.start()
+            return 200, self._render(transcript, 'queued')
+
+        match = re.fullmatch(r'/v2/transcript/([\w-]+)', path)
+        if method == 'GET' and match:
+            with self.lock:
+                transcript = self.transcripts.get(match.group(1))
+            if transcript is None:
+                return 404, {'error': 'Transcript not found'}
+            if time.monotonic() < transcript['ready_at']:
+                return 200, self._render(transcript, 'processing')
+            if transcript['failed']:
+                self.count('errors')
+                return 200, self._render(transcript, 'error')
+            return 200, self._render(transcript, 'completed')
+
+        return 404, {'error': f"Unknown endpoint {method} {path}"}
+
+    def _send_webhook(self, transcript_id, request):
+        """POST the completion notice for a transcript to the webhook it was created with."""
+        if self.chance(self.webhook_drop_rate):
+            self.count('webhooks_dropped')
+            return
+
+        with self.lock:
+            failed = self.transcripts[transcript_id]['failed']
+        headers = {'Content-Type': 'application/json'}
+        if request.get('webhook_auth_header_name'):
+            headers[request['webhook_auth_header_name']] = request.get('webhook_auth_header_value') or ''
+        notice = urllib.request.Request(
+            request['webhook_url'],
+            data=json.dumps({'transcript_id': transcript_id, 'status': 'error' if failed else 'completed'}).encode(),
+            headers=headers,
+            method='POST'
+        )
+        try:
+            with urllib.request.urlopen(notice, timeout=10):
+                pass
+            self.count('webhooks')
+        except Exception as e:
+            logger.warning(f"Fake {self.name} API could not deliver webhook for {transcript_id}: {str(e)}")
+
+    def _render(self, transcript, status):
+        payload = {
+            'id': transcript['id'],
+            'audio_url': transcript['audio_url'],
+            'status': status,
+            'speaker_labels': True,
+        }
+
+        if status == 'error':
+            payload['error'] = 'Simulated transcription failure'
+        elif status == 'completed':
+            upload_id = int(transcript['audio_url'].rsplit('/', 1)[-1])
+            with self.lock:
+                seed = self.uploads.get(upload_id)
+            utterances = self.conversations.conversation(repr(seed))
+            payload['text'] = " ".join(u['text'] for u in utterances)
+            payload['utterances'] = [
+                {
+                    **u,
+                    'confidence': 0.95,
+                    'words': [],
+                }
+                for u in utterances
+            ]
+            payload['audio_duration'] = utterances[-1]['end'] // 1000 if utterances else 0
+
+        return payload
+
+
+class FakeGeminiServer(FakeAPIServer):
+    """
+    Stand-in for Gemini's ``generateContent`` REST endpoint.
+
+    Answers after ``generation_latency`` seconds with an analysis produced by
+    the local rules engine, or fails with HTTP 500 with probability
+    ``error_rate``.
+    """
+
+    name = 'gemini'
+
+    def __init__(self, generation_latency=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.generation_latency = generation_latency
+        self.analysis = LocalAnalysisBackend()
+
+    def rate_limited(self):
+        return 429, {'error': {'code': 429, 'message': 'Resource has been exhausted', 'status': 'RESOURCE_EXHAUSTED'}}
+
+    def handle(self, method, path, body):
+        if method != 'POST' or not re.fullmatch(r'/v1beta/models/[\w.-]+:generateContent', path):
+            return 404, {'error': {'code': 404, 'message': f"Unknown endpoint {method} {path}", 'status': 'NOT_FOUND'}}
+
+        time.sleep(self.delay(self.generation_latency))
+
+        if self.chance(self.error_rate):
+            self.count('errors')
+            return 500, {'error': {'code': 500, 'message': 'Simulated generation failure', 'status': 'INTERNAL'}}
+
+        request = json.loads(body or b'{}')
+        prompt = " ".join(
+            part.get('text', '')
+            for content in request.get('contents', [])
+            for part in content.get('parts', [])
+        )
+        # Batch prompts enclose each call in a <call id="..."> element and expect an array back
+        calls = re.findall(r'<call id="([^"]+)">\n(.*?)\n</call>', prompt, re.DOTALL)
+        if calls:
+            answer = [{'call_id': call_id, **self.analysis.analyze(transcript)} for call_id, transcript in calls]
+        else:
+            answer = self.analysis.analyze(prompt)
+
+        return 200, {
+            'candidates': [{
+                'content': {
+                    'role': 'model',
+                    'parts': [{'text': json.dumps(answer)}]
+                },
+                'finishReason': 'STOP',
+                'index': 0
+            }],
+            'usageMetadata': {
+                'promptTokenCount': len(prompt.split()),
+                'candidatesTokenCount': 200,
+                'totalTokenCount': len(prompt.split()) + 200
+            }
+        }
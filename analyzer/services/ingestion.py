@@ -0,0 +1,243 @@
+import csv
+import io
+import json
+import logging
+import os
+import zipfile
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from .job_queue import JobQueue
+from ..models import Agent, CallRecording, get_upload_path
+from ..audio_probe import recording_metadata
+from ..uploads import HashingFile
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAMES = ('manifest.csv', 'manifest.json')
+
+class IngestionError(Exception):
+    """Raised when a bulk upload cannot be processed as a whole."""
+
+
+class PipelineSaturatedError(IngestionError):
+    """Raised when the processing queue has no room for a bulk upload."""
+
+    def __init__(self, admission):
+        super().__init__("Call processing pipeline is saturated, please retry later")
+        self.admission = admission
+
+
+class RecordingIngestionService:
+    """Service to store batches of call recordings and queue them for processing."""
+
+    def __init__(self):
+        self.job_queue = JobQueue()
+
+    def parse_manifest(self, content, name='manifest.json'):
+        """
+        Parse a bulk upload manifest.
+
+        The manifest is either a JSON list of objects or a CSV file with a
+        header row. Each entry describes one file with the keys ``filename``,
+        ``title``, ``employee_id`` and ``customer_phone``.
+
+        Args:
+            content: Manifest contents as bytes or str
+            name: File name used to detect the format
+
+        Returns:
+            dict: Manifest entries keyed by file name
+        """
+        if isinstance(content, bytes):
+            content = content.decode('utf-8-sig')
+
+        try:
+            if name.lower().endswith('.csv'):
+                entries = list(csv.DictReader(io.StringIO(content)))
+            else:
+                entries = json.loads(content)
+        except (ValueError, csv.Error) as e:
+            raise IngestionError(f"Invalid manifest: {str(e)}")
+
+        if not isinstance(entries, list):
+            raise IngestionError("Manifest must be a list of entries")
+
+        manifest = {}
+        for entry in entries:
+            if not isinstance(entry, dict) or not entry.get('filename'):
+                raise IngestionError("Every manifest entry needs a filename")
+            manifest[os.path.basename(entry['filename'])] = entry
+        return manifest
+
+    def ingest_files(self, files, manifest=None, default_agent=None):
+        """
+        Store uploaded files and queue them as one batch.
+
+        Args:
+            files: Uploaded file objects
+            manifest: Manifest entries keyed by file name
+            default_agent: Agent used for files without an employee_id
+
+        Returns:
+            dict: Per-file results and the admission decision for the batch
+        """
+        items = [(os.path.basename(f.name), f) for f in files]
+        return self._ingest(items, manifest or {}, default_agent)
+
+    def ingest_archive(self, archive, manifest=None, default_agent=None):
+        """
+        Store the recordings contained in a zip archive and queue them as one batch.
+
+        Entries are streamed from the archive to storage one at a time. A
+        ``manifest.csv`` or ``manifest.json`` at the root of the archive is
+        used when no manifest was supplied with the request. Archives whose
+        entries exceed the BULK_UPLOAD_MAX_* size or compression limits are
+        refused before anything is extracted.
+
+        Args:
+            archive: Uploaded zip file object
+            manifest: Manifest entries keyed by file name
+            default_agent: Agent used for files without an employee_id
+
+        Returns:
+            dict: Per-file results and the admission decision for the batch
+        """
+        try:
+            zf = zipfile.ZipFile(archive)
+        except zipfile.BadZipFile:
+            raise IngestionError("Uploaded archive is not a valid zip file")
+
+        with zf:
+            entries = [
+                info for info in zf.infolist()
+                if not info.is_dir()
+                and not os.path.basename(info.filename).startswith('.')
+                and not info.filename.startswith('__MACOSX/')
+            ]
+            self._check_archive_sizes(entries)
+
+            if manifest is None:
+                for info in entries:
+                    if info.filename.lower() in MANIFEST_NAMES:
+                        manifest = self.parse_manifest(zf.read(info), info.filename)
+                        break
+
+            items = []
+            for info in entries:
+                if info.filename.lower() in MANIFEST_NAMES:
+                    continue
+                entry_file = File(zf.open(info), name=os.path.basename(info.filename))
+                entry_file.size = info.file_size
+                items.append((os.path.basename(info.filename), entry_file))
+
+            return self._ingest(items, manifest or {}, default_agent)
+
+    def _check_archive_sizes(self, entries):
+        """
+        Refuse archives that would expand beyond the bulk upload limits.
+
+        The sizes come from the archive's directory; zipfile stops reading an
+        entry at its declared size, so an entry cannot expand past it.
+        """
+        max_file_size = settings.BULK_UPLOAD_MAX_FILE_SIZE
+        max_ratio = settings.BULK_UPLOAD_MAX_COMPRESSION_RATIO
+        total = 0
+        for info in entries:
+            if max_file_size and info.file_size > max_file_size:
+                raise IngestionError(
+                    f"{info.filename} is larger than the {max_file_size} byte limit for files in an archive"
+                )
+            if max_ratio and info.file_size > max_ratio * max(info.compress_size, 1):
+                raise IngestionError(
+                    f"{info.filename} is compressed more than {max_ratio} times, which no recording is"
+                )
+            total += info.file_size
+
+        if settings.BULK_UPLOAD_MAX_TOTAL_SIZE and total > settings.BULK_UPLOAD_MAX_TOTAL_SIZE:
+            raise IngestionError(
+                f"Archive expands to {total} bytes, more than the {settings.BULK_UPLOAD_MAX_TOTAL_SIZE} byte limit"
+            )
+
+    def _ingest(self, items, manifest, default_agent):
+        """Validate, store, bulk-insert and enqueue a batch of recordings."""
+        if not items:
+            raise IngestionError("No recordings were found in the upload")
+
+        if len(items) > settings.BULK_UPLOAD_MAX_FILES:
+            raise IngestionError(
+                f"A bulk upload may contain at most {settings.BULK_UPLOAD_MAX_FILES} files"
+            )
+
+        admission = self.job_queue.admit(len(items))
+        if not admission['admitted']:
+            raise PipelineSaturatedError(admission)
+
+        employee_ids = {
+            entry.get('employee_id') for entry in manifest.values() if entry.get('employee_id')
+        }
+        agents = {
+            agent.employee_id: agent
+            for agent in Agent.objects.filter(employee_id__in=employee_ids)
+        }
+
+        results = []
+        recordings = []
+        for filename, file_obj in items:
+            entry = manifest.get(filename, {})
+            employee_id = entry.get('employee_id')
+            agent = agents.get(employee_id) if employee_id else default_agent
+
+            if agent is None:
+                error = f"Unknown agent '{employee_id}'" if employee_id else "No agent specified"
+                results.append({'filename': filename, 'success': False, 'error': error})
+                continue
+
+            metadata = recording_metadata(file_obj)
+
+            # Hash the file while storage reads it unless the upload handler already did
+            if not getattr(file_obj, 'sha256', None):
+                file_obj = HashingFile(file_obj, name=filename)
+
+            try:
+                stored_name = default_storage.save(get_upload_path(None, filename), file_obj)
+            except Exception as e:
+                logger.exception(f"Failed to store bulk upload file {filename}: {str(e)}")
+                results.append({'filename': filename, 'success': False, 'error': str(e)})
+                continue
+            finally:
+                file_obj.close()
+
+            recordings.append(CallRecording(
+                title=entry.get('title') or os.path.splitext(filename)[0],
+                file=stored_name,
+                agent=agent,
+                customer_phone=entry.get('customer_phone') or None,
+                audio_sha256=file_obj.sha256,
+                **metadata
+            ))
+            results.append({'filename': filename, 'success': True})
+
+        try:
+            with transaction.atomic():
+                CallRecording.objects.bulk_create(recordings)
+                self.job_queue.enqueue_many([r.id for r in recordings], delay=admission['delay'])
+        except Exception:
+            for recording in recordings:
+                default_storage.delete(recording.file.name)
+            raise
+
+        created = iter(recordings)
+        for result in results:
+            if result['success']:
+                result['id'] = next(created).id
+
+        logger.info(f"Bulk upload stored and queued {len(recordings)} of {len(items)} recordings")
+        return {
+            'results': results,
+            'created': len(recordings),
+            'failed': len(items) - len(recordings),
+            'deferred': admission['deferred'],
+            'retry_after': admission['retry_after']
+        }
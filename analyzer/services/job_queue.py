@@ -0,0 +1,363 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef
+from django.utils import timezone
+from .status_events import publish_status
+from ..models import CallRecording, ProcessingJob, TranscriptionRequest
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL advisory lock serializing claims while CALL_PROCESSING_MAX_IN_FLIGHT applies
+CLAIM_LOCK_ID = 0x63616c6c
+
+class JobQueue:
+    """
+    Service to manage the database-backed call processing queue.
+
+    Workers claim jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` and hold a
+    time-limited lease on them. The lease is renewed by heartbeats while the
+    job runs; if a worker dies, the lease expires and the reaper puts the job
+    back on the queue until it runs out of attempts.
+    """
+
+    def __init__(self, lease_seconds=None):
+        self.lease_seconds = lease_seconds or settings.CALL_JOB_LEASE_SECONDS
+
+    def enqueue(self, recording_id, delay=0):
+        """
+        Add a call recording to the processing queue.
+
+        Args:
+            recording_id: ID of the CallRecording object to process
+            delay: Seconds before the job may be claimed
+
+        Returns:
+            ProcessingJob: The queued job
+        """
+        job = ProcessingJob.objects.create(
+            call_recording_id=recording_id,
+            max_attempts=settings.CALL_JOB_MAX_ATTEMPTS,
+            available_at=timezone.now() + timedelta(seconds=delay)
+        )
+        logger.info(f"Queued processing job {job.id} for call recording {recording_id}")
+        return job
+
+    def enqueue_many(self, recording_ids, delay=0):
+        """
+        Add several call recordings to the processing queue in one query.
+
+        Args:
+            recording_ids: IDs of the CallRecording objects to process
+            delay: Seconds before the jobs may be claimed
+
+        Returns:
+            list: The queued ProcessingJob objects
+        """
+        available_at = timezone.now() + timedelta(seconds=delay)
+        jobs = ProcessingJob.objects.bulk_create([
+            ProcessingJob(
+                call_recording_id=recording_id,
+                max_attempts=settings.CALL_JOB_MAX_ATTEMPTS,
+                available_at=available_at
+            )
+            for recording_id in recording_ids
+        ])
+        logger.info(f"Queued {len(jobs)} processing jobs")
+        return jobs
+
+    def claim(self, worker_id):
+        """
+        Claim the oldest available job and take a lease on it.
+
+        Rows locked by other workers are skipped rather than waited on, so
+        any number of workers on any number of nodes can drain the same queue.
+        Nothing is claimed while CALL_PROCESSING_MAX_IN_FLIGHT jobs are
+        already running across the cluster. Counting the running jobs and
+        claiming one happen under a transaction-scoped advisory lock on
+        PostgreSQL, so concurrent claims cannot overshoot the limit. Other
+        databases only keep to it if they serialize the transactions, as
+        SQLite does with the IMMEDIATE transaction mode.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+
+        Returns:
+            ProcessingJob: The claimed job, or None if nothing is available
+        """
+        now = timezone.now()
+        max_in_flight = settings.CALL_PROCESSING_MAX_IN_FLIGHT
+
+        with transaction.atomic():
+            if max_in_flight:
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [CLAIM_LOCK_ID])
+                if ProcessingJob.objects.filter(status='running').count() >= max_in_flight:
+                    return None
+
+            job = (
+                ProcessingJob.objects
+                .select_for_update(skip_locked=True)
+                .filter(status='queued', available_at__lte=now)
+                .order_by('available_at', 'created_at')
+                .first()
+            )
+            if job is None:
+                return None
+
+            job.status = 'running'
+            job.worker_id = worker_id
+            job.attempts += 1
+            job.started_at = now
+            job.heartbeat_at = now
+            job.lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+            job.save(update_fields=[
+                'status', 'worker_id', 'attempts', 'started_at',
+                'heartbeat_at', 'lease_expires_at'
+            ])
+
+        return job
+
+    def heartbeat(self, job):
+        """
+        Extend the lease on a running job.
+
+        Args:
+            job: The ProcessingJob held by the calling worker
+
+        Returns:
+            bool: False if the lease was lost to the reaper or another worker
+        """
+        now = timezone.now()
+        renewed = ProcessingJob.objects.filter(
+            id=job.id, worker_id=job.worker_id, status='running'
+        ).update(
+            heartbeat_at=now,
+            lease_expires_at=now + timedelta(seconds=self.lease_seconds)
+        )
+        return bool(renewed)
+
+    def complete(self, job):
+        """Mark a job as successfully completed."""
+        self._finish(job, 'completed', '')
+
+    def fail(self, job, error):
+        """Mark a job as failed and record the error."""
+        self._finish(job, 'failed', error or '')
+
+    def park(self, job, delay, error):
+        """
+        Put a running job back on the queue because a provider is unavailable.
+
+        Parking does not use up one of the job's attempts, so calls held back
+        during a provider outage are not failed because of it.
+
+        Args:
+            job: The ProcessingJob held by the calling worker
+            delay: Seconds before the job can be claimed again
+            error: Why the job was parked
+        """
+        parked = ProcessingJob.objects.filter(
+            id=job.id, worker_id=job.worker_id, status='running'
+        ).update(
+            status='queued',
+            attempts=F('attempts') - 1,
+            available_at=timezone.now() + timedelta(seconds=delay),
+            last_error=error or '',
+            worker_id='',
+            lease_expires_at=None
+        )
+        if not parked:
+            logger.warning(f"Job {job.id} parked by {job.worker_id} after its lease was lost")
+
+        job.status = 'queued'
+        job.last_error = error or ''
+
+    def wake(self, recording_id):
+        """
+        Make a recording's queued job claimable now instead of at its scheduled time.
+
+        Used when a job parked to wait for a provider's callback gets it.
+
+        Returns:
+            int: Number of jobs woken
+        """
+        now = timezone.now()
+        return ProcessingJob.objects.filter(
+            call_recording_id=recording_id, status='queued', available_at__gt=now
+        ).update(available_at=now)
+
+    def reap_expired(self):
+        """
+        Recover jobs whose lease expired without a heartbeat.
+
+        Jobs with attempts left are queued again with a growing delay and
+        their recordings are reset to pending; the rest are marked failed.
+
+        Returns:
+            dict: Number of jobs requeued and failed
+        """
+        now = timezone.now()
+        requeued = 0
+        failed = 0
+
+        with transaction.atomic():
+            expired = list(
+                ProcessingJob.objects
+                .select_for_update(skip_locked=True)
+                .filter(status='running', lease_expires_at__lt=now)
+            )
+
+            for job in expired:
+                error = f"Lease held by {job.worker_id} expired at {job.lease_expires_at.isoformat()}"
+
+                if job.attempts < job.max_attempts:
+                    job.status = 'queued'
+                    job.available_at = now + timedelta(seconds=settings.CALL_JOB_RETRY_DELAY * job.attempts)
+                    recording_status = 'pending'
+                    requeued += 1
+                else:
+                    job.status = 'failed'
+                    job.finished_at = now
+                    recording_status = 'failed'
+                    failed += 1
+
+                job.last_error = error
+                job.worker_id = ''
+                job.lease_expires_at = None
+                job.save(update_fields=[
+                    'status', 'available_at', 'finished_at', 'last_error',
+                    'worker_id', 'lease_expires_at'
+                ])
+                CallRecording.objects.filter(id=job.call_recording_id).update(status=recording_status)
+                publish_status(job.call_recording_id, recording_status)
+
+        if expired:
+            logger.warning(f"Reaped {len(expired)} expired jobs ({requeued} requeued, {failed} failed)")
+
+        return {
+            'requeued': requeued,
+            'failed': failed
+        }
+
+    def depth(self):
+        """Return the number of jobs waiting to be claimed, not counting those waiting for a webhook."""
+        return ProcessingJob.objects.filter(status='queued').exclude(self._waiting_for_webhook()).count()
+
+    def position(self, job):
+        """
+        Return a queued job's place in the queue, not counting jobs waiting for a webhook.
+
+        Returns:
+            int: 1 for the next job to be claimed, or None if the job is not
+                queued or is itself waiting for a webhook
+        """
+        if job.status != 'queued':
+            return None
+        queued = ProcessingJob.objects.filter(status='queued').exclude(self._waiting_for_webhook())
+        if not queued.filter(id=job.id).exists():
+            return None
+        return queued.filter(available_at__lt=job.available_at).count() + 1
+
+    def stats(self):
+        """
+        Report the current load on the processing pipeline.
+
+        Queued jobs whose transcript was submitted with a webhook are counted
+        as waiting rather than queued: they hold no worker and only come back
+        to collect the result, so they do not count towards the queue depth.
+
+        Returns:
+            dict: Queued, waiting and running job counts alongside the configured limits
+        """
+        rows = (
+            ProcessingJob.objects
+            .filter(status__in=['queued', 'running'])
+            .annotate(waiting=self._waiting_for_webhook())
+            .order_by()
+            .values_list('status', 'waiting')
+            .annotate(total=Count('id'))
+        )
+        counts = {(status, waiting): total for status, waiting, total in rows}
+        queued = counts.get(('queued', False), 0)
+        waiting = counts.get(('queued', True), 0)
+        running = counts.get(('running', False), 0) + counts.get(('running', True), 0)
+        max_queue_depth = settings.CALL_PROCESSING_MAX_QUEUE_DEPTH
+        max_in_flight = settings.CALL_PROCESSING_MAX_IN_FLIGHT
+
+        return {
+            'queued': queued,
+            'waiting': waiting,
+            'running': running,
+            'max_in_flight': max_in_flight,
+            'max_queue_depth': max_queue_depth,
+            'saturated': bool(max_queue_depth) and queued >= max_queue_depth,
+            'overload_policy': settings.CALL_PROCESSING_OVERLOAD_POLICY,
+        }
+
+    def admit(self, count=1):
+        """
+        Decide whether new uploads may join the queue.
+
+        When the queue is full, the ``reject`` policy turns the uploads away
+        and the ``defer`` policy accepts them but holds their jobs back for
+        CALL_PROCESSING_RETRY_AFTER seconds.
+
+        Args:
+            count: Number of recordings about to be queued
+
+        Returns:
+            dict: Admission decision, enqueue delay, Retry-After hint and pipeline stats
+        """
+        stats = self.stats()
+        retry_after = settings.CALL_PROCESSING_RETRY_AFTER
+        max_queue_depth = stats['max_queue_depth']
+        over_limit = bool(max_queue_depth) and stats['queued'] + count > max_queue_depth
+
+        if not over_limit:
+            return {
+                'admitted': True,
+                'deferred': False,
+                'delay': 0,
+                'retry_after': 0,
+                'stats': stats
+            }
+
+        deferred = stats['overload_policy'] == 'defer'
+        logger.warning(
+            f"Pipeline saturated ({stats['queued']} queued, limit {max_queue_depth}); "
+            f"{'deferring' if deferred else 'rejecting'} {count} uploads"
+        )
+        return {
+            'admitted': deferred,
+            'deferred': deferred,
+            'delay': retry_after if deferred else 0,
+            'retry_after': retry_after,
+            'stats': stats
+        }
+
+    def _waiting_for_webhook(self):
+        """Condition matching jobs whose recording has a transcript submitted with a webhook."""
+        return Exists(TranscriptionRequest.objects.filter(
+            call_recording=OuterRef('call_recording'), status='submitted'
+        ))
+
+    def _finish(self, job, status, error):
+        """Record the final state of a job if the caller still holds its lease."""
+        now = timezone.now()
+        updated = ProcessingJob.objects.filter(
+            id=job.id, worker_id=job.worker_id, status='running'
+        ).update(
+            status=status,
+            finished_at=now,
+            last_error=error,
+            lease_expires_at=None
+        )
+        if not updated:
+            logger.warning(f"Job {job.id} finished by {job.worker_id} after its lease was lost")
+
+        job.status = status
+        job.finished_at = now
+        job.last_error = error
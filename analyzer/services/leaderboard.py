@@ -0,0 +1,122 @@
+import logging
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DateField, F, Sum, Value
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from ..models import CallAnalysis, LeaderboardEntry
+
+logger = logging.getLogger(__name__)
+
+PERIODS = [period for period, _ in LeaderboardEntry.PERIOD_CHOICES]
+
+
+def get_leaderboard(period='all', day=None, department=None, limit=10):
+    """
+    Return the top of a leaderboard as last ranked.
+
+    Reading does not rank: periods are re-ranked after their entries change
+    by rank_changed_periods, which the call workers run periodically.
+
+    Args:
+        period: 'all', 'week' or 'month'
+        day: Date within the period; today by default
+        department: Optional department to rank agents within
+        limit: Maximum number of entries
+
+    Returns:
+        list: LeaderboardEntry objects in rank order, with their agents and users loaded
+    """
+    period_start = LeaderboardEntry.period_starts(day or timezone.localdate())[period]
+    entries = LeaderboardEntry.objects.filter(period=period, period_start=period_start).select_related('agent__user')
+    if department:
+        entries = entries.filter(department=department, department_rank__isnull=False).order_by('department_rank')
+    else:
+        entries = entries.filter(rank__isnull=False).order_by('rank')
+    return list(entries[:limit])
+
+
+def rank_period(period, period_start):
+    """
+    Recompute the stored ranks of a period if any of its entries changed since.
+
+    Entries that change while the ranks are computed keep their changes
+    count ahead of ranked_changes, so the period is ranked again next time.
+
+    Returns:
+        bool: True if the period was ranked
+    """
+    entries = LeaderboardEntry.objects.filter(period=period, period_start=period_start)
+    if not entries.exclude(ranked_changes=F('changes')).exists():
+        return False
+
+    rows = list(entries.only('id', 'agent_id', 'department', 'call_count', 'avg_score', 'changes'))
+    eligible = sorted(
+        (entry for entry in rows if entry.call_count >= settings.LEADERBOARD_MIN_CALLS),
+        key=lambda entry: (-entry.avg_score, -entry.call_count, entry.agent_id)
+    )
+    ranks = {}
+    department_ranks = {}
+    department_counts = defaultdict(int)
+    for position, entry in enumerate(eligible, start=1):
+        department_counts[entry.department] += 1
+        ranks[entry.id] = position
+        department_ranks[entry.id] = department_counts[entry.department]
+
+    for entry in rows:
+        entry.rank = ranks.get(entry.id)
+        entry.department_rank = department_ranks.get(entry.id)
+        entry.ranked_changes = entry.changes
+    LeaderboardEntry.objects.bulk_update(rows, ['rank', 'department_rank', 'ranked_changes'], batch_size=500)
+    logger.info(f"Ranked {len(eligible)} of {len(rows)} agents on the {period} leaderboard from {period_start}")
+    return True
+
+
+def rank_changed_periods():
+    """
+    Rank every period with entries that changed since it was last ranked.
+
+    Returns:
+        int: Number of periods ranked
+    """
+    periods = (
+        LeaderboardEntry.objects.exclude(ranked_changes=F('changes'))
+        .order_by().values_list('period', 'period_start').distinct()
+    )
+    return sum(rank_period(period, period_start) for period, period_start in list(periods))
+
+
+def rebuild_leaderboard():
+    """
+    Recompute every leaderboard entry from the call analyses and rank all periods.
+
+    Returns:
+        int: Number of entries created
+    """
+    analyses = CallAnalysis.objects.order_by()
+    buckets = {
+        'all': Value(LeaderboardEntry.ALL_TIME_START, output_field=DateField()),
+        'week': TruncWeek('created_at', output_field=DateField()),
+        'month': TruncMonth('created_at', output_field=DateField()),
+    }
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        entries = []
+        for period, bucket in buckets.items():
+            rows = analyses.annotate(period_start=bucket).values(
+                'agent_id', 'agent__department', 'period_start'
+            ).annotate(call_count=Count('id'), score_sum=Sum('coverage_score'))
+            entries.extend(
+                LeaderboardEntry(
+                    agent_id=row['agent_id'], department=row['agent__department'], period=period,
+                    period_start=row['period_start'], call_count=row['call_count'], score_sum=row['score_sum'],
+                    avg_score=row['score_sum'] / row['call_count'], changes=1
+                )
+                for row in rows
+            )
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=500)
+        rank_changed_periods()
+
+    return len(entries)
@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from .singletons import ProcessSingleton
+from ..models import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+class LLMCache:
+    """
+    Base class for caches of LLM responses.
+
+    Entries are keyed by the model name, the version of the prompt template
+    and a digest of the input text, so changing any of them misses the cache.
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = ttl if ttl is not None else settings.LLM_CACHE_TTL
+        self.max_entries = max_entries if max_entries is not None else settings.LLM_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self.counter_lock = threading.Lock()
+
+    def make_key(self, model_name, prompt_version, *inputs):
+        """
+        Build the cache key for a request.
+
+        Args:
+            model_name: Name of the LLM
+            prompt_version: Version of the prompt template
+            *inputs: Input texts substituted into the prompt
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        hasher = hashlib.sha256()
+        for part in (model_name, prompt_version) + inputs:
+            hasher.update((part or '').encode('utf-8'))
+            hasher.update(b'\x00')
+        return hasher.hexdigest()
+
+    def get(self, key):
+        """Return the cached response for a key, or None on a miss."""
+        value = self._get(key)
+        with self.counter_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value, model_name='', prompt_version=''):
+        """Store a response under a key."""
+        self._set(key, value, model_name, prompt_version)
+
+    def stats(self):
+        """Return hit and miss counters for this process."""
+        with self.counter_lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': self.__class__.__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, value, model_name, prompt_version):
+        raise NotImplementedError
+
+
+class NullLLMCache(LLMCache):
+    """Cache that never stores anything."""
+
+    def _get(self, key):
+        return None
+
+    def _set(self, key, value, model_name, prompt_version):
+        pass
+
+
+class LocalMemoryLLMCache(LLMCache):
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, ttl=None, max_entries=None):
+        super().__init__(ttl, max_entries)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def stats(self):
+        stats = super().stats()
+        with self.lock:
+            stats['entries'] = len(self.entries)
+        return stats
+
+    def _get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value, model_name, prompt_version):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while self.max_entries and len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class DatabaseLLMCache(LLMCache):
+    """
+    Cache shared by all processes through the LLMCacheEntry table.
+
+    Expired entries are deleted and the table is trimmed back to
+    ``max_entries`` by least recent access every ``EVICTION_INTERVAL`` writes.
+    """
+
+    EVICTION_INTERVAL = 100
+
+    def __init__(self, ttl=None, max_entries=None):
+        super().__init__(ttl, max_entries)
+        self.writes = 0
+
+    def _get(self, key):
+        now = timezone.now()
+        entry = LLMCacheEntry.objects.filter(cache_key=key).values('id', 'response', 'expires_at').first()
+        if entry is None:
+            return None
+
+        if entry['expires_at'] is not None and entry['expires_at'] < now:
+            LLMCacheEntry.objects.filter(id=entry['id']).delete()
+            return None
+
+        LLMCacheEntry.objects.filter(id=entry['id']).update(
+            hit_count=F('hit_count') + 1,
+            last_accessed_at=now
+        )
+        return entry['response']
+
+    def _set(self, key, value, model_name, prompt_version):
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.ttl) if self.ttl else None
+        try:
+            LLMCacheEntry.objects.update_or_create(
+                cache_key=key,
+                defaults={
+                    'model_name': model_name,
+                    'prompt_version': prompt_version,
+                    'response': value,
+                    'last_accessed_at': now,
+                    'expires_at': expires_at
+                }
+            )
+        except IntegrityError:
+            # Another worker stored the same response concurrently
+            pass
+
+        with self.counter_lock:
+            self.writes += 1
+            evict = self.writes % self.EVICTION_INTERVAL == 0
+        if evict:
+            self.evict()
+
+    def stats(self):
+        """Return this process's counters plus totals shared through the table."""
+        stats = super().stats()
+        totals = LLMCacheEntry.objects.aggregate(entries=Count('id'), total_hits=Sum('hit_count'))
+        stats['entries'] = totals['entries']
+        stats['total_hits'] = totals['total_hits'] or 0
+        return stats
+
+    def evict(self):
+        """
+        Delete expired entries and trim the table to the size limit.
+
+        Returns:
+            int: Number of entries deleted
+        """
+        deleted, _ = LLMCacheEntry.objects.filter(expires_at__lt=timezone.now()).delete()
+
+        if self.max_entries:
+            cutoff = (
+                LLMCacheEntry.objects
+                .order_by('-last_accessed_at')
+                .values_list('last_accessed_at', flat=True)[self.max_entries:self.max_entries + 1]
+                .first()
+            )
+            if cutoff is not None:
+                trimmed, _ = LLMCacheEntry.objects.filter(last_accessed_at__lte=cutoff).delete()
+                deleted += trimmed
+
+        if deleted:
+            logger.info(f"Evicted {deleted} LLM cache entries")
+        return deleted
+
+
+LLM_CACHE_BACKENDS = {
+    'none': NullLLMCache,
+    'memory': LocalMemoryLLMCache,
+    'database': DatabaseLLMCache,
+}
+
+_llm_cache = ProcessSingleton(lambda: LLM_CACHE_BACKENDS[settings.LLM_CACHE_BACKEND]())
+
+def get_llm_cache():
+    """Return the process-wide LLM cache selected by LLM_CACHE_BACKEND."""
+    return _llm_cache.get()
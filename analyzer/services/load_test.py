@@ -0,0 +1,314 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from .api_limiter import api_limiter_stats
+from .fake_apis import FakeAssemblyAIServer, FakeGeminiServer
+from .job_queue import JobQueue
+from .worker import CallWorkerPool
+from ..models import Agent, CallRecording, get_upload_path
+
+logger = logging.getLogger(__name__)
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class StageRecorder:
+    """Thread-safe collector of per-stage durations and database query counts."""
+
+    def __init__(self):
+        self.durations = {}
+        self.queries = {}
+        self.lock = threading.Lock()
+
+    def wrap(self, stage, func):
+        """Return ``func`` instrumented to record its duration and queries under ``stage``."""
+        def instrumented(*args, **kwargs):
+            queries = [0]
+
+            def count_query(execute, sql, params, many, context):
+                queries[0] += 1
+                return execute(sql, params, many, context)
+
+            started = time.perf_counter()
+            try:
+                with connection.execute_wrapper(count_query):
+                    return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self.lock:
+                    self.durations.setdefault(stage, []).append(elapsed)
+                    self.queries[stage] = self.queries.get(stage, 0) + queries[0]
+
+        return instrumented
+
+    def summary(self):
+        """Return count, p50/p95/p99 latency and total queries per stage."""
+        with self.lock:
+            return {
+                stage: {
+                    'count': len(durations),
+                    'p50': percentile(durations, 0.50),
+                    'p95': percentile(durations, 0.95),
+                    'p99': percentile(durations, 0.99),
+                    'queries': self.queries.get(stage, 0)
+                }
+                for stage, durations in self.durations.items()
+            }
+
+
+class AppServer:
+    """This Django app served over HTTP in a background thread, to receive the stand-ins' webhooks."""
+
+    def __init__(self):
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host='127.0.0.1', port=0):
+        class QuietRequestHandler(WSGIRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadedWSGIServer((host, port), QuietRequestHandler)
+        self.httpd.set_app(WSGIHandler())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='load-test-app', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+
+class PipelineLoadTest:
+    """
+    End-to-end load test of call processing against local API stand-ins.
+
+    Starts fake AssemblyAI and Gemini servers, points the real backends at
+    them, pushes synthetic recordings through the job queue and a
+    CallWorkerPool, and measures throughput, per-stage latency percentiles and
+    database queries.
+
+    With ``webhooks``, transcripts are submitted with a completion webhook
+    served by this app on a local port, so workers do not wait for them;
+    ``webhook_drop_rate`` of the callbacks are lost and left to the fallback
+    poll every ``webhook_poll_interval`` seconds.
+    """
+
+    # CallProcessingService steps timed as stages, in pipeline order
+    STAGES = (
+        ('start', 'start_processing'),
+        ('transcription', 'transcribe'),
+        ('analysis', 'analyze'),
+        ('persistence', 'persist'),
+        ('report', 'render_report'),
+        ('complete', 'mark_completed'),
+    )
+
+    AGENT_EMPLOYEE_ID = 'LOADTEST'
+
+    def __init__(self, calls=50, engine='threads', workers=None, audio_size=64 * 1024,
+                 transcription_latency=2.0, analysis_latency=1.0, request_latency=0.05,
+                 jitter=0.25, error_rate=0.0, rate_limit_rate=0.0, polling_interval=0.2, seed=None,
+                 analysis_batch_size=0, analysis_batch_wait=0.5, webhooks=False, webhook_drop_rate=0.0,
+                 webhook_poll_interval=5.0):
+        self.calls = calls
+        self.engine = engine
+        self.workers = workers
+        self.audio_size = audio_size
+        self.polling_interval = polling_interval
+        self.analysis_batch_size = analysis_batch_size
+        self.analysis_batch_wait = analysis_batch_wait
+        self.webhook_poll_interval = webhook_poll_interval
+        self.app = AppServer() if webhooks else None
+        server_options = {
+            'request_latency': request_latency,
+            'jitter': jitter,
+            'error_rate': error_rate,
+            'rate_limit_rate': rate_limit_rate,
+            'seed': seed,
+        }
+        self.assemblyai = FakeAssemblyAIServer(
+            transcription_latency=transcription_latency, webhook_drop_rate=webhook_drop_rate, **server_options
+        )
+        self.gemini = FakeGeminiServer(generation_latency=analysis_latency, **server_options)
+        self.recorder = StageRecorder()
+        self.report_paths = []
+
+    def run(self, keep_data=False):
+        """
+        Run the load test.
+
+        Args:
+            keep_data: Keep the synthetic recordings and their analyses afterwards
+
+        Returns:
+            dict: Throughput, outcome counts, per-stage statistics, API counters
+                and the state of the API limiters
+        """
+        self.assemblyai.start()
+        self.gemini.start()
+        webhook_settings = {}
+        if self.app is not None:
+            self.app.start()
+            webhook_settings = {
+                'TRANSCRIPTION_WEBHOOK_BASE_URL': self.app.url,
+                'TRANSCRIPTION_WEBHOOK_SECRET': uuid.uuid4().hex,
+                'TRANSCRIPTION_WEBHOOK_POLL_INTERVAL': self.webhook_poll_interval,
+                'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, '127.0.0.1'],
+            }
+        recordings = []
+        try:
+            with override_settings(
+                TRANSCRIPTION_BACKEND='assemblyai',
+                ANALYSIS_BACKEND='gemini',
+                ASSEMBLY_AI_API_KEY='load-test',
+                ASSEMBLY_AI_BASE_URL=self.assemblyai.url,
+                ASSEMBLY_AI_POLLING_INTERVAL=self.polling_interval,
+                GOOGLE_API_KEY='load-test',
+                GEMINI_API_ENDPOINT=self.gemini.url,
+                ANALYSIS_BATCHING=self.analysis_batch_size > 1,
+                ANALYSIS_BATCH_SIZE=self.analysis_batch_size,
+                ANALYSIS_BATCH_MAX_WAIT=self.analysis_batch_wait,
+                **webhook_settings
+            ):
+                recordings = self._create_recordings()
+                pool = self._instrumented_pool()
+
+                started = time.perf_counter()
+                JobQueue().enqueue_many([r.id for r in recordings])
+                if self.app is None:
+                    pool.start(burst=True)
+                else:
+                    # Jobs waiting for a webhook are not claimable, so a burst would end early
+                    pool.start()
+                    self._wait_until_finished(recordings)
+                    pool.stop()
+                pool.join()
+                elapsed = time.perf_counter() - started
+
+            return self._results(recordings, elapsed)
+        finally:
+            self.assemblyai.stop()
+            self.gemini.stop()
+            if self.app is not None:
+                self.app.stop()
+            if not keep_data:
+                self._cleanup(recordings)
+
+    def _wait_until_finished(self, recordings):
+        """Block until every recording is completed or failed."""
+        recording_ids = [r.id for r in recordings]
+        while CallRecording.objects.filter(id__in=recording_ids).exclude(status__in=('completed', 'failed')).exists():
+            time.sleep(0.2)
+
+    def _create_recordings(self):
+        """Store random audio files and create their CallRecording rows."""
+        agent = Agent.objects.filter(employee_id=self.AGENT_EMPLOYEE_ID).first()
+        if agent is None:
+            user, _ = User.objects.get_or_create(
+                username='loadtest',
+                defaults={'first_name': 'Load', 'last_name': 'Test'}
+            )
+            agent = Agent.objects.create(
+                user=user,
+                employee_id=self.AGENT_EMPLOYEE_ID,
+                department='Load Test',
+                hire_date=timezone.now().date()
+            )
+
+        recordings = []
+        for index in range(self.calls):
+            # Unique audio so the transcription cache never short-circuits a call
+            audio = os.urandom(self.audio_size)
+            filename = f"loadtest-{uuid.uuid4().hex[:12]}.mp3"
+            stored_name = default_storage.save(get_upload_path(None, filename), ContentFile(audio))
+            recordings.append(CallRecording(
+                title=f"Load test call {index + 1}",
+                file=stored_name,
+                agent=agent,
+                audio_sha256=hashlib.sha256(audio).hexdigest()
+            ))
+        return CallRecording.objects.bulk_create(recordings)
+
+    def _instrumented_pool(self):
+        """Build a worker pool whose processing steps report to the recorder."""
+        pool = CallWorkerPool(concurrency=self.workers, poll_interval=0.1, engine=self.engine)
+
+        processor = pool.call_processor
+        render_report = processor.render_report
+
+        def keep_report_path(analysis):
+            path = render_report(analysis)
+            if path:
+                self.report_paths.append(path)
+            return path
+
+        processor.render_report = keep_report_path
+        for stage, method in self.STAGES:
+            setattr(processor, method, self.recorder.wrap(stage, getattr(processor, method)))
+
+        # The threads engine runs every step inside process_now, which is timed as a whole
+        processor.process_now = self.recorder.wrap('total', processor.process_now)
+        pool.claim_job = self.recorder.wrap('claim', pool.claim_job)
+        pool.finish_job = self.recorder.wrap('finish', pool.finish_job)
+        return pool
+
+    def _results(self, recordings, elapsed):
+        statuses = dict.fromkeys(('completed', 'failed', 'pending', 'processing'), 0)
+        for status in CallRecording.objects.filter(id__in=[r.id for r in recordings]).values_list('status', flat=True):
+            statuses[status] = statuses.get(status, 0) + 1
+
+        summary = self.recorder.summary()
+        order = ['claim'] + [stage for stage, _ in self.STAGES] + ['finish', 'total']
+        stages = {stage: summary[stage] for stage in order if stage in summary}
+        total_queries = sum(stats['queries'] for stage, stats in stages.items() if stage != 'total')
+        processed = statuses['completed'] + statuses['failed']
+
+        return {
+            'calls': self.calls,
+            'engine': self.engine,
+            'elapsed': elapsed,
+            'throughput_per_second': statuses['completed'] / elapsed if elapsed else 0.0,
+            'throughput_per_hour': statuses['completed'] / elapsed * 3600 if elapsed else 0.0,
+            'outcomes': statuses,
+            'queries_per_call': total_queries / processed if processed else 0.0,
+            'stages': stages,
+            'apis': {
+                'assemblyai': self.assemblyai.stats(),
+                'gemini': self.gemini.stats()
+            },
+            'api_limits': api_limiter_stats()
+        }
+
+    def _cleanup(self, recordings):
+        """Delete the synthetic recordings, their files and reports."""
+        for recording in recordings:
+            recording.file.delete(save=False)
+        for path in self.report_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        CallRecording.objects.filter(id__in=[r.id for r in recordings]).delete()
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+class PipelineItem:
+    """State of one call recording as it moves through the pipeline stages."""
+
+    def __init__(self, job):
+        self.job = job
+        self.recording = None
+        self.transcription_result = None
+        self.sentiment_result = None
+        self.analysis = None
+
+
+class PipelinedCallProcessor:
+    """
+    Asyncio engine that runs call processing as a pipeline of stages.
+
+    Each stage (transcription, analysis, persistence, report) has its own
+    queue and its own number of concurrent workers, so while one call is
+    being analysed the next ones are already being transcribed. Throughput
+    is bounded by the slowest stage instead of the sum of all stages. The
+    stages themselves are the blocking CallProcessingService steps, run in
+    a thread pool.
+    """
+
+    STAGES = ('transcription', 'analysis', 'persistence', 'report')
+
+    def __init__(self, worker_pool, concurrency=None):
+        """
+        Args:
+            worker_pool: CallWorkerPool that claims, tracks and finishes jobs
+            concurrency: Optional dict of worker counts per stage
+        """
+        self.worker_pool = worker_pool
+        self.call_processor = worker_pool.call_processor
+        self.concurrency = {**settings.CALL_PIPELINE_CONCURRENCY, **(concurrency or {})}
+        self.max_in_flight = settings.CALL_PIPELINE_MAX_IN_FLIGHT or sum(self.concurrency.values()) * 2
+        self.handlers = {
+            'transcription': self._transcribe,
+            'analysis': self._analyze,
+            'persistence': self._persist,
+            'report': self._report,
+        }
+
+    def run(self, burst=False):
+        """
+        Run the pipeline until the worker pool is stopped.
+
+        Args:
+            burst: If True, return once the queue is empty and all work is done
+        """
+        executor = ThreadPoolExecutor(
+            max_workers=sum(self.concurrency.values()) + 1,
+            thread_name_prefix='call-pipeline'
+        )
+        try:
+            asyncio.run(self._serve(executor, burst))
+        finally:
+            executor.shutdown(wait=True)
+
+    async def _serve(self, executor, burst):
+        """Feed claimed jobs into the first stage and wait for them to drain."""
+        self.loop = asyncio.get_running_loop()
+        self.executor = executor
+        self.in_flight = 0
+        self.slot_freed = asyncio.Event()
+
+        # Bounded queues make a slow stage push back on the stages before it
+        self.queues = {
+            stage: asyncio.Queue(maxsize=self.concurrency[stage] * 2)
+            for stage in self.STAGES
+        }
+        stage_workers = [
+            asyncio.create_task(self._stage_worker(stage))
+            for stage in self.STAGES
+            for _ in range(self.concurrency[stage])
+        ]
+
+        logger.info(
+            "Pipeline started with stage concurrency "
+            + ", ".join(f"{stage}={self.concurrency[stage]}" for stage in self.STAGES)
+        )
+
+        stop_event = self.worker_pool.stop_event
+        while not stop_event.is_set():
+            if self.in_flight >= self.max_in_flight:
+                await self._wait_for_slot()
+                continue
+
+            job = await self._call(self.worker_pool.claim_job, self.worker_pool.pipeline_worker_id)
+            if job is not None:
+                self.in_flight += 1
+                await self.queues['transcription'].put(PipelineItem(job))
+                continue
+
+            if burst and self.in_flight == 0:
+                break
+            await self._wait_for_slot(timeout=self.worker_pool.poll_interval)
+
+        # Let the calls already in the pipeline finish before shutting down
+        while self.in_flight:
+            await self._wait_for_slot()
+
+        for task in stage_workers:
+            task.cancel()
+        await asyncio.gather(*stage_workers, return_exceptions=True)
+        logger.info("Pipeline stopped")
+
+    async def _wait_for_slot(self, timeout=1):
+        """Wait until a call leaves the pipeline or the timeout passes."""
+        self.slot_freed.clear()
+        try:
+            await asyncio.wait_for(self.slot_freed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _stage_worker(self, stage):
+        """Take items from a stage's queue and run the stage on them."""
+        queue = self.queues[stage]
+        next_stage = self._next_stage(stage)
+
+        while True:
+            item = await queue.get()
+            forwarded = False
+            try:
+                try:
+                    succeeded = await self._call(self.handlers[stage], item)
+                except Exception as e:
+                    logger.exception(f"Exception in {stage} stage for job {item.job.id}: {str(e)}")
+                    succeeded = False
+                    try:
+                        await self._call(self._fail, item, stage.capitalize(), {'success': False, 'error': str(e)})
+                    except Exception as e:
+                        # Its lease is no longer renewed, so the reaper requeues a job left running
+                        logger.exception(f"Could not record the failure of job {item.job.id}: {str(e)}")
+
+                if succeeded and next_stage:
+                    await self.queues[next_stage].put(item)
+                    forwarded = True
+            finally:
+                queue.task_done()
+                if not forwarded:
+                    self._release()
+
+    def _next_stage(self, stage):
+        """Return the stage after the given one, or None for the last stage."""
+        index = self.STAGES.index(stage)
+        return self.STAGES[index + 1] if index + 1 < len(self.STAGES) else None
+
+    def _release(self):
+        """Record that a call has left the pipeline."""
+        self.in_flight -= 1
+        self.slot_freed.set()
+
+    async def _call(self, func, *args):
+        """Run a blocking function in the pipeline's thread pool."""
+        return await self.loop.run_in_executor(self.executor, self._run_blocking, func, args)
+
+    def _run_blocking(self, func, args):
+        """Run a blocking function with fresh database connections."""
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    def _transcribe(self, item):
+        """Transcription stage."""
+        item.recording = self.call_processor.start_processing(item.job.call_recording_id)
+        item.transcription_result = self.call_processor.transcribe(item.recording)
+
+        if not item.transcription_result['success']:
+            self._fail(item, "Transcription", item.transcription_result)
+            return False
+        return True
+
+    def _analyze(self, item):
+        """LLM analysis stage."""
+        item.sentiment_result = self.call_processor.analyze(item.transcription_result)
+
+        if not item.sentiment_result['success']:
+            self._fail(item, "Sentiment analysis", item.sentiment_result)
+            return False
+        return True
+
+    def _persist(self, item):
+        """Persistence stage."""
+        item.analysis = self.call_processor.persist(
+            item.recording, item.transcription_result, item.sentiment_result
+        )
+        return True
+
+    def _report(self, item):
+        """Report rendering stage, which also completes the job."""
+        self.call_processor.render_report(item.analysis)
+        self.call_processor.mark_completed(item.recording)
+        self.worker_pool.finish_job(item.job, {'success': True, 'analysis': item.analysis})
+        return True
+
+    def _fail(self, item, step, result):
+        """Mark the recording and its job as failed, or park them if a provider is unavailable."""
+        try:
+            result = self.call_processor.handle_failure(item.job.call_recording_id, step, result)
+        finally:
+            # Stop renewing the lease even if the failure could not be recorded
+            self.worker_pool.finish_job(item.job, result)
@@ -0,0 +1,222 @@
+import logging
+import re
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Speaker A is the agent and speaker B the customer
+SPEAKER_TAGS = {'A': 'Agent', 'B': 'Customer'}
+
+def estimate_tokens(text):
+    """Estimate the number of LLM tokens in a text (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def split_transcript(transcript):
+    """
+    Recover each speaker's side of the conversation from a speaker-tagged transcript.
+
+    Returns:
+        tuple: (agent_text, customer_text), one utterance per line
+    """
+    sides = {'Agent': [], 'Customer': []}
+    for line in transcript.splitlines():
+        tag, _, text = line.strip().partition(': ')
+        if tag in sides:
+            sides[tag].append(text)
+    return "\n".join(sides['Agent']), "\n".join(sides['Customer'])
+
+
+class TranscriptCompactor:
+    """
+    Build the speaker-tagged transcript sent to the analysis model within a token budget.
+
+    The conversation is rendered once, one ``Agent:``/``Customer:`` line per
+    turn, with disfluencies ("um", "uh") removed and consecutive utterances of
+    the same speaker merged. While the transcript is over the budget, the
+    least informative content is dropped in order:
+
+    1. filler: hold music, "please hold", and utterances that are only
+       acknowledgements such as "okay" or "mm-hmm"
+    2. repeated content: utterances that repeat an earlier one
+    3. greetings and pleasantries: short hellos, thanks and goodbyes
+    4. the middle of the call: the opening and closing turns are kept and the
+       turns between them replaced by a note of what was left out
+
+    A transcript without utterances is sent as plain text; if it is over the
+    budget, its disfluencies are removed and its middle is left out likewise.
+    """
+
+    # Share of the budget kept from the start of the call when the middle is left out
+    HEAD_SHARE = 0.4
+
+    DISFLUENCY_RE = re.compile(r"(?<![\w'-])(?:u+m+|u+h+|e+r+m+|h+m+|mm+)(?![\w'-])[,.]?\s*", re.IGNORECASE)
+
+    FILLER_RE = re.compile(
+        r"^(?:[\[(][^\])]*(?:music|hold|silence|inaudible|crosstalk)[^\])]*[\])]"
+        r"|(?:(?:ok(?:ay)?|yeah|right|sure|alright|all right|uh-huh|mm-hmm|mhm|got it|i see)[\s,.!]*)+"
+        r"|.{0,40}\b(?:please hold|hold on|one moment|bear with me|just a (?:moment|second|sec)|"
+        r"thank you for (?:holding|waiting|your patience))\b.{0,20})$",
+        re.IGNORECASE
+    )
+
+    GREETING_RE = re.compile(
+        r"^(?:(?:hi|hello|hey|good (?:morning|afternoon|evening)|thanks?(?: you)?(?: so much| very much)?"
+        r"|you're welcome|no problem|bye|goodbye|have a (?:good|nice|great) (?:day|one|evening)"
+        r"|take care|thank you for calling|thanks for calling|nice to meet you|how are you(?: today)?"
+        r"|i'm (?:fine|good|well)(?: thanks?(?: you)?)?)[\s,.!?]*)+$",
+        re.IGNORECASE
+    )
+
+    def __init__(self, token_budget=None):
+        self.token_budget = token_budget if token_budget is not None else settings.ANALYSIS_PROMPT_TOKEN_BUDGET
+
+    def compact(self, transcription_data):
+        """
+        Build the transcript for a transcription result.
+
+        Args:
+            transcription_data: Transcription result with utterances (or only full_text)
+
+        Returns:
+            dict: transcript, tokens_before and tokens_after (estimated), and
+                the number of turns dropped per reason
+        """
+        turns = [
+            {
+                'speaker': SPEAKER_TAGS.get(u['speaker'], f"Speaker {u['speaker']}"),
+                'text': " ".join(u['text'].split()),
+                'start': u.get('start') or 0,
+                'end': u.get('end') or 0
+            }
+            for u in transcription_data.get('utterances') or []
+            if u.get('text')
+        ]
+        if not turns:
+            # Without utterances the speakers are unknown; send the plain text
+            text = " ".join((transcription_data.get('full_text') or '').split())
+            tokens_before = estimate_tokens(text)
+            if tokens_before > self.token_budget:
+                text = self._elide_text(self._clean(text))
+                logger.info(f"Compacted analysis transcript from ~{tokens_before} to ~{estimate_tokens(text)} tokens")
+            return {
+                'transcript': text,
+                'tokens_before': tokens_before,
+                'tokens_after': estimate_tokens(text),
+                'dropped': {}
+            }
+
+        tokens_before = estimate_tokens(self._render(turns))
+        dropped = {}
+
+        turns = [{**turn, 'text': self._clean(turn['text'])} for turn in turns]
+        turns = [turn for turn in turns if turn['text']]
+
+        # Utterances are judged one by one; same-speaker runs are only merged when rendering
+        for reason, keep in (
+            ('filler', self._not_filler),
+            ('repeated', self._not_repeated()),
+            ('greetings', self._not_greeting),
+        ):
+            if estimate_tokens(self._render(turns)) <= self.token_budget:
+                break
+            kept = [turn for turn in turns if keep(turn)]
+            dropped[reason] = len(turns) - len(kept)
+            turns = kept
+
+        transcript = self._render(turns)
+        if estimate_tokens(transcript) > self.token_budget:
+            transcript, dropped['middle'] = self._elide_middle(self._merge(turns))
+
+        tokens_after = estimate_tokens(transcript)
+        if tokens_after < tokens_before:
+            logger.info(f"Compacted analysis transcript from ~{tokens_before} to ~{tokens_after} tokens")
+        return {
+            'transcript': transcript,
+            'tokens_before': tokens_before,
+            'tokens_after': tokens_after,
+            'dropped': {reason: count for reason, count in dropped.items() if count}
+        }
+
+    def _clean(self, text):
+        return " ".join(self.DISFLUENCY_RE.sub('', text).split())
+
+    def _merge(self, turns):
+        """Join consecutive turns of the same speaker."""
+        merged = []
+        for turn in turns:
+            if merged and merged[-1]['speaker'] == turn['speaker']:
+                merged[-1] = {**merged[-1], 'text': f"{merged[-1]['text']} {turn['text']}", 'end': turn['end']}
+            else:
+                merged.append(dict(turn))
+        return merged
+
+    def _not_filler(self, turn):
+        return not self.FILLER_RE.match(turn['text'])
+
+    def _not_repeated(self):
+        seen = set()
+
+        def keep(turn):
+            key = re.sub(r"[^a-z0-9 ]", '', turn['text'].lower())
+            # Short answers such as "no" or "that's right" legitimately recur
+            if len(key.split()) < 4:
+                return True
+            if key in seen:
+                return False
+            seen.add(key)
+            return True
+
+        return keep
+
+    def _not_greeting(self, turn):
+        return not self.GREETING_RE.match(turn['text'])
+
+    def _elide_middle(self, turns):
+        """Keep the opening and closing turns within the budget and note how many were left out."""
+        lines = [self._line(turn) for turn in turns]
+        # Leave room for the note itself
+        budget = self.token_budget - 20
+
+        head = []
+        used = 0
+        for line in lines:
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget * self.HEAD_SHARE:
+                break
+            head.append(line)
+            used += cost
+
+        tail = []
+        for line in reversed(lines[len(head):]):
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget:
+                break
+            tail.insert(0, line)
+            used += cost
+
+        omitted = turns[len(head):len(turns) - len(tail)]
+        if not head and not tail:
+            # A single turn longer than the budget: keep its beginning
+            return lines[0][:max(budget, 0) * 4], len(turns) - 1
+
+        seconds = max(int(omitted[-1]['end'] - omitted[0]['start']) // 1000, 0) if omitted else 0
+        note = f"[... {len(omitted)} turns ({seconds // 60}:{seconds % 60:02d}) omitted ...]"
+        return "\n".join(head + [note] + tail), len(omitted)
+
+    def _elide_text(self, text):
+        """Keep the beginning and end of an untagged transcript within the budget, cut between words."""
+        if estimate_tokens(text) <= self.token_budget:
+            return text
+        # Leave room for the note itself
+        budget = max(self.token_budget - 20, 0) * 4
+        head = text[:int(budget * self.HEAD_SHARE)].rsplit(' ', 1)[0]
+        tail = text[len(text) - (budget - len(head)):].split(' ', 1)[-1] if budget > len(head) else ''
+        omitted = len(text.split()) - len(head.split()) - len(tail.split())
+        return " ".join(part for part in (head, f"[... {omitted} words omitted ...]", tail) if part)
+
+    def _line(self, turn):
+        return f"{turn['speaker']}: {turn['text']}"
+
+    def _render(self, turns):
+        return "\n".join(self._line(turn) for turn in self._merge(turns))
@@ -5,12 +5,16 @@ from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from datetime import datetime
 from django.conf import settings
+from .singletons import ProcessSingleton
 
 logger = logging.getLogger(__name__)
 
 class ReportGenerator:
     """Service to generate Excel reports from call analysis data."""
     
+    # Transcription speaker labels: speaker A is the agent and speaker B the customer
+    SPEAKER_NAMES = {'A': 'Agent', 'B': 'Customer'}
+    
     def generate_call_report(self, call_analysis):
         """
         Generate a detailed Excel report for a single call analysis.
@@ -38,12 +42,18 @@ class ReportGenerator:
             basic_df = pd.DataFrame(basic_info)
             
             # Create a dataframe for the transcription
-            utterances = []
-            for utterance in call_analysis.transcription_text.split('\n'):
-                if utterance.strip():
-                    utterances.append(utterance)
-            
-            transcript_df = pd.DataFrame({'Transcription': utterances})
+            utterances = list(call_analysis.utterances.values_list('speaker', 'start_ms', 'end_ms', 'text'))
+            if utterances:
+                transcript_df = pd.DataFrame({
+                    'Speaker': [self.SPEAKER_NAMES.get(u[0], u[0]) for u in utterances],
+                    'Start (seconds)': [u[1] / 1000 for u in utterances],
+                    'End (seconds)': [u[2] / 1000 for u in utterances],
+                    'Transcription': [u[3] for u in utterances]
+                })
+            else:
+                # Analyses stored before utterances were kept only have the full text
+                lines = [line for line in call_analysis.transcription_text.split('\n') if line.strip()]
+                transcript_df = pd.DataFrame({'Transcription': lines})
             
             # Create dataframe for analysis results
             key_issues = call_analysis.key_issues
@@ -242,3 +252,10 @@ class ReportGenerator:
                 bottom=Side(style='thin')
             )
             cell.border = thin_border
+
+
+_report_generator = ProcessSingleton(ReportGenerator)
+
+def get_report_generator():
+    """Return the process-wide report generator."""
+    return _report_generator.get()
@@ -0,0 +1,128 @@
+import math
+from collections import Counter
+from django.db import connections
+from django.db.models import Sum
+from ..models import AgentDailyStats
+
+# Expands the key_issues array of every analysis into one row per issue. Rows
+# whose key_issues is not an array expand to nothing.
+ISSUE_FREQUENCY_SQL = {
+    'postgresql': (
+        "SELECT issue, COUNT(*) AS issue_count FROM ({analyses}) AS analyses "
+        "CROSS JOIN LATERAL jsonb_array_elements_text("
+        "CASE WHEN jsonb_typeof(analyses.key_issues) = 'array' THEN analyses.key_issues ELSE '[]'::jsonb END"
+        ") AS issue "
+        "GROUP BY issue ORDER BY issue_count DESC, issue LIMIT %s"
+    ),
+    'sqlite': (
+        "SELECT issues.value, COUNT(*) AS issue_count FROM ({analyses}) AS analyses, json_each("
+        "CASE WHEN json_type(analyses.key_issues) = 'array' THEN analyses.key_issues ELSE '[]' END"
+        ") AS issues "
+        "GROUP BY issues.value ORDER BY issue_count DESC, issues.value LIMIT %s"
+    ),
+}
+
+
+def agent_performance(start_date, end_date):
+    """
+    Compute the call count and average score of every agent over a date range.
+
+    Reads the daily stats rollup in one GROUP BY query, so the cost depends
+    on the number of agents and days, not on the number of calls.
+
+    Args:
+        start_date: First day of the range
+        end_date: Last day of the range
+
+    Returns:
+        dict: call_count and avg_score by agent name, for agents with at least one analysis
+    """
+    rows = AgentDailyStats.objects.filter(
+        date__gte=start_date, date__lte=end_date, call_count__gt=0
+    ).order_by('agent').values(
+        'agent', 'agent__user__first_name', 'agent__user__last_name'
+    ).annotate(call_count=Sum('call_count'), score_sum=Sum('score_sum'))
+
+    return {
+        f"{row['agent__user__first_name']} {row['agent__user__last_name']}".strip(): {
+            'call_count': row['call_count'],
+            'avg_score': row['score_sum'] / row['call_count']
+        }
+        for row in rows
+    }
+
+
+def daily_trend(start_date, end_date):
+    """
+    Compute the totals of every day in a date range from the daily stats rollup.
+
+    Args:
+        start_date: First day of the range
+        end_date: Last day of the range
+
+    Returns:
+        list: Dicts with the date, call count, average and standard deviation
+            of the coverage score, sentiment counts, compliance pass rate and
+            average call duration, for days with at least one analysis
+    """
+    counters = [
+        'call_count', 'score_sum', 'score_sq_sum', 'positive_count', 'neutral_count', 'negative_count',
+        'compliance_checks', 'compliance_passed', 'compliant_calls', 'total_duration_seconds'
+    ]
+    rows = AgentDailyStats.objects.filter(
+        date__gte=start_date, date__lte=end_date, call_count__gt=0
+    ).order_by('date').values('date').annotate(**{f'{field}_total': Sum(field) for field in counters})
+
+    trend = []
+    for row in rows:
+        calls = row['call_count_total']
+        mean = row['score_sum_total'] / calls
+        trend.append({
+            'date': row['date'].isoformat(),
+            'call_count': calls,
+            'avg_score': mean,
+            'score_stddev': math.sqrt(max(row['score_sq_sum_total'] / calls - mean * mean, 0.0)),
+            'sentiment': {
+                'positive': row['positive_count_total'],
+                'neutral': row['neutral_count_total'],
+                'negative': row['negative_count_total'],
+            },
+            'compliance_pass_rate': (
+                row['compliance_passed_total'] / row['compliance_checks_total']
+                if row['compliance_checks_total'] else None
+            ),
+            'compliant_calls': row['compliant_calls_total'],
+            'avg_duration_seconds': row['total_duration_seconds_total'] / calls,
+        })
+    return trend
+
+
+def issue_frequencies(call_analyses, limit=10):
+    """
+    Count how often each key issue was identified, most frequent first.
+
+    The JSON arrays are expanded and counted in the database on PostgreSQL
+    and SQLite; other databases count the fetched arrays in Python.
+
+    Args:
+        call_analyses: CallAnalysis queryset to count the issues of
+        limit: Maximum number of issues
+
+    Returns:
+        list: Dicts with the issue and its count
+    """
+    connection = connections[call_analyses.db]
+    template = ISSUE_FREQUENCY_SQL.get(connection.vendor)
+    if template is None:
+        counts = Counter()
+        for issues in call_analyses.values_list('key_issues', flat=True):
+            if isinstance(issues, list):
+                counts.update(issues)
+        return [{'issue': issue, 'count': count} for issue, count in counts.most_common(limit)]
+
+    analyses_sql, params = call_analyses.order_by().values('key_issues').query.get_compiler(
+        connection=connection
+    ).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(template.format(analyses=analyses_sql), (*params, limit))
+        return [{'issue': issue, 'count': count} for issue, count in cursor.fetchall()]
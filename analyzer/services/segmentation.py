@@ -0,0 +1,349 @@
+import logging
+import os
+import wave
+from difflib import SequenceMatcher
+import numpy as np
+from ..audio_probe import has_vbr_header, iter_mp3_frames, probe_audio
+
+logger = logging.getLogger(__name__)
+
+class AudioSegmenter:
+    """
+    Split long recordings into overlapping segments cut at quiet moments.
+
+    A cut is placed near every ``segment_seconds`` at the quietest point
+    within ``search_seconds`` of the target. Each segment extends
+    ``overlap_seconds / 2`` past its cuts on both sides, so the audio around a
+    cut is transcribed twice; the overlap is used to match speaker labels
+    between neighbouring segments when they are stitched together.
+
+    WAV files are measured by the RMS energy of their samples. MP3 files are
+    cut on frame boundaries without decoding: VBR files use the size of the
+    frames as the measure, since silence encodes to the smallest frames, while
+    CBR frames all have the same size, so those files are cut at fixed
+    intervals. Other formats, including non-PCM WAV files, are not segmented.
+    """
+
+    # Resolution of the loudness measurement when searching for a cut
+    WINDOW_SECONDS = 0.1
+
+    def __init__(self, segment_seconds=300, overlap_seconds=10, search_seconds=None):
+        self.segment_seconds = segment_seconds
+        self.overlap_seconds = overlap_seconds
+        self.search_seconds = search_seconds if search_seconds is not None else min(30, segment_seconds / 4)
+
+    def split(self, file_path, output_dir):
+        """
+        Write the segments of an audio file to a directory.
+
+        Args:
+            file_path: Path to the audio file
+            output_dir: Directory the segment files are written to
+
+        Returns:
+            list: Segment dicts with path, start and end (milliseconds in the
+                original audio) and keep_start/keep_end, the cuts between which
+                the segment's utterances are kept; None if the file's format
+                cannot be segmented
+        """
+        with open(file_path, 'rb') as f:
+            info = probe_audio(f)
+
+        if info is None or info['format'] not in ('wav', 'mp3'):
+            return None
+
+        if info['format'] == 'wav':
+            try:
+                return self._split_wav(file_path, output_dir)
+            except (wave.Error, EOFError) as e:
+                # The wave module only reads PCM; μ-law and A-law telephony
+                # recordings are transcribed whole instead
+                logger.info(f"Not segmenting {file_path}: {str(e)}")
+                return None
+        return self._split_mp3(file_path, output_dir)
+
+    def _plan(self, duration, loudness_at):
+        """
+        Choose the cut points and the segment boundaries.
+
+        Args:
+            duration: Length of the audio in seconds
+            loudness_at: Function returning (times, loudness) arrays for a time range
+
+        Returns:
+            list: (start, end, keep_start, keep_end) tuples in seconds
+        """
+        cuts = [0.0]
+        target = self.segment_seconds
+        while target < duration - self.segment_seconds / 2:
+            times, loudness = loudness_at(target - self.search_seconds, target + self.search_seconds)
+            if len(times):
+                # Quietest window, preferring the one closest to the target on ties
+                quietest = np.lexsort((np.abs(times - target), loudness))[0]
+                cuts.append(float(times[quietest]))
+            else:
+                cuts.append(float(target))
+            target = cuts[-1] + self.segment_seconds
+        cuts.append(duration)
+
+        half_overlap = self.overlap_seconds / 2
+        return [
+            (max(keep_start - half_overlap, 0.0), min(keep_end + half_overlap, duration), keep_start, keep_end)
+            for keep_start, keep_end in zip(cuts, cuts[1:])
+        ]
+
+    def _split_wav(self, file_path, output_dir):
+        with wave.open(file_path, 'rb') as source:
+            params = source.getparams()
+            rate = params.framerate
+            duration = params.nframes / rate
+            window_frames = max(int(rate * self.WINDOW_SECONDS), 1)
+
+            def loudness_at(start, end):
+                first = max(int(start * rate), 0)
+                last = min(int(end * rate), params.nframes)
+                source.setpos(first)
+                samples = _pcm_samples(source.readframes(last - first), params.sampwidth)
+                samples = samples.reshape(-1, params.nchannels).mean(axis=1)
+                windows = len(samples) // window_frames
+                if not windows:
+                    return np.array([]), np.array([])
+                energy = samples[:windows * window_frames].reshape(windows, window_frames)
+                rms = np.sqrt(np.mean(energy ** 2, axis=1))
+                times = (first + (np.arange(windows) + 0.5) * window_frames) / rate
+                return times, rms
+
+            plan = self._plan(duration, loudness_at)
+            if len(plan) < 2:
+                return None
+
+            segments = []
+            for index, (start, end, keep_start, keep_end) in enumerate(plan):
+                path = os.path.join(output_dir, f"segment-{index:03d}.wav")
+                source.setpos(int(start * rate))
+                remaining = int(end * rate) - int(start * rate)
+                with wave.open(path, 'wb') as target:
+                    target.setparams(params)
+                    while remaining > 0:
+                        frames = source.readframes(min(remaining, rate * 10))
+                        if not frames:
+                            break
+                        target.writeframes(frames)
+                        remaining -= len(frames) // (params.sampwidth * params.nchannels)
+                segments.append(_segment(path, start, end, keep_start, keep_end))
+
+        return segments
+
+    def _split_mp3(self, file_path, output_dir):
+        with open(file_path, 'rb') as source:
+            # Byte offset and length of every frame
+            frames = []
+            frame = None
+            for offset, header in iter_mp3_frames(source):
+                frame = frame or header
+                frames.append((offset, header['frame_length']))
+            if not frames:
+                return None
+
+            # Leave out a Xing/VBRI header frame, whose counts describe the whole file
+            source.seek(frames[0][0])
+            if has_vbr_header(source.read(frames[0][1]), frame):
+                frames = frames[1:]
+
+            frame_seconds = frame['samples_per_frame'] / frame['sample_rate']
+            sizes = np.array([length for _, length in frames], dtype=float)
+            times = np.arange(len(frames)) * frame_seconds
+            duration = len(frames) * frame_seconds
+            # CBR frames differ by at most a padding byte and say nothing about loudness
+            variable_bitrate = sizes.max() - sizes.min() > 1
+
+            def loudness_at(start, end):
+                if not variable_bitrate:
+                    return np.array([]), np.array([])
+                first = max(int(start / frame_seconds), 0)
+                last = min(int(end / frame_seconds), len(frames))
+                return times[first:last], sizes[first:last]
+
+            plan = self._plan(duration, loudness_at)
+            if len(plan) < 2:
+                return None
+
+            segments = []
+            for index, (start, end, keep_start, keep_end) in enumerate(plan):
+                path = os.path.join(output_dir, f"segment-{index:03d}.mp3")
+                first = int(round(start / frame_seconds))
+                last = min(int(round(end / frame_seconds)), len(frames))
+                byte_start = frames[first][0]
+                byte_end = frames[last - 1][0] + frames[last - 1][1]
+
+                source.seek(byte_start)
+                remaining = byte_end - byte_start
+                with open(path, 'wb') as target:
+                    while remaining > 0:
+                        data = source.read(min(remaining, 1024 * 1024))
+                        if not data:
+                            break
+                        target.write(data)
+                        remaining -= len(data)
+                segments.append(_segment(path, first * frame_seconds, last * frame_seconds, keep_start, keep_end))
+
+        return segments
+
+
+def _segment(path, start, end, keep_start, keep_end):
+    return {
+        'path': path,
+        'start': int(start * 1000),
+        'end': int(end * 1000),
+        'keep_start': int(keep_start * 1000),
+        'keep_end': int(keep_end * 1000),
+    }
+
+
+def _pcm_samples(data, sample_width):
+    """Convert little-endian PCM bytes to a float array."""
+    if sample_width == 1:
+        return np.frombuffer(data, dtype=np.uint8).astype(float) - 128
+    if sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        padded = np.zeros((len(raw), 4), dtype=np.uint8)
+        padded[:, 1:] = raw
+        return padded.view('<i4').ravel().astype(float)
+    return np.frombuffer(data, dtype=f'<i{sample_width}').astype(float)
+
+
+def stitch_utterances(segments, segment_utterances):
+    """
+    Combine per-segment utterances into one timeline.
+
+    Timestamps are shifted by the segment's offset in the original audio and
+    each segment keeps only the utterances that start between its cuts.
+    Speaker labels are mapped onto those of the previous segment by matching
+    the utterances both segments transcribed in their overlap. An utterance
+    spanning a cut is in both segments, each copy possibly cut off at the
+    segment's edge, so the two copies are merged.
+
+    Args:
+        segments: Segment dicts as returned by AudioSegmenter.split
+        segment_utterances: Utterance lists for each segment, timed from the segment start
+
+    Returns:
+        list: Utterances with consistent speakers, ordered by start time
+    """
+    stitched = []
+    previous = []
+
+    for segment, utterances in zip(segments, segment_utterances):
+        shifted = [
+            {**u, 'start': u['start'] + segment['start'], 'end': u['end'] + segment['start']}
+            for u in utterances
+        ]
+
+        if previous:
+            # Audio from the segment start to as far past the cut was also in the previous segment
+            overlap_end = 2 * segment['keep_start'] - segment['start']
+            mapping = _match_speakers(
+                [u for u in previous if u['end'] > segment['start']],
+                [u for u in shifted if u['start'] < overlap_end]
+            )
+            shifted = [{**u, 'speaker': mapping.get(u['speaker'], u['speaker'])} for u in shifted]
+
+        kept = [u for u in shifted if segment['keep_start'] <= u['start'] < segment['keep_end']]
+        if previous:
+            cut = segment['keep_start']
+            for u in shifted:
+                if not u['start'] < cut < u['end']:
+                    continue
+                # The previous segment kept its own copy of an utterance spanning the cut
+                copy = next(
+                    (p for p in reversed(stitched) if p['speaker'] == u['speaker'] and p['start'] < cut < p['end']),
+                    None
+                )
+                if copy is not None:
+                    stitched.remove(copy)
+                    kept.append(_merge_copies(copy, u))
+
+        stitched.extend(kept)
+        previous = shifted
+
+    stitched.sort(key=lambda u: u['start'])
+    return stitched
+
+
+def _merge_copies(before, after):
+    """
+    Merge the copies of an utterance transcribed by the segments on both sides of a cut.
+
+    The copies are aligned on the longest run of words both transcribed; the
+    text before it comes from the earlier copy and the rest from the later
+    one. Without such a run, the copy covering more of the utterance is kept.
+    """
+    words_before = before['text'].split()
+    words_after = after['text'].split()
+    match = SequenceMatcher(
+        None, [_word_key(w) for w in words_before], [_word_key(w) for w in words_after], autojunk=False
+    ).find_longest_match(0, len(words_before), 0, len(words_after))
+
+    if match.size < 2:
+        return after if after['end'] - after['start'] > before['end'] - before['start'] else before
+    return {
+        **after,
+        'start': min(before['start'], after['start']),
+        'end': max(before['end'], after['end']),
+        'text': " ".join(words_before[:match.a] + words_after[match.b:]),
+    }
+
+
+def _word_key(word):
+    return word.lower().strip('.,;:!?"\'')
+
+
+def _match_speakers(previous, current):
+    """
+    Map the speaker labels of a segment onto those of the previous segment.
+
+    Utterances from the two segments that overlap in time are compared by
+    text; each pair votes for mapping its current label to its previous label,
+    weighted by how similar and how overlapping they are.
+
+    Returns:
+        dict: Current label to previous label
+    """
+    votes = {}
+    for before in previous:
+        for after in current:
+            overlap = min(before['end'], after['end']) - max(before['start'], after['start'])
+            if overlap <= 0:
+                continue
+            similarity = SequenceMatcher(None, before['text'].lower(), after['text'].lower()).ratio()
+            if similarity < 0.3:
+                continue
+            key = (after['speaker'], before['speaker'])
+            votes[key] = votes.get(key, 0) + similarity * overlap
+
+    mapping = {}
+    used = set()
+    for (current_label, previous_label), _ in sorted(votes.items(), key=lambda item: item[1], reverse=True):
+        if current_label in mapping or previous_label in used:
+            continue
+        mapping[current_label] = previous_label
+        used.add(previous_label)
+
+    # Unmatched labels keep their name unless a matched label took it, in
+    # which case they take a free one (with two speakers: the other speaker)
+    current_labels = {u['speaker'] for u in current}
+    previous_labels = {u['speaker'] for u in previous}
+    unmatched = sorted(current_labels - set(mapping))
+    for label in unmatched:
+        if label not in used:
+            mapping[label] = label
+            used.add(label)
+    for label in unmatched:
+        if label not in mapping:
+            free = sorted(previous_labels - used) or sorted((current_labels | {'A', 'B'}) - used)
+            mapping[label] = free[0] if free else label
+            used.add(mapping[label])
+
+    if mapping:
+        logger.debug(f"Mapped segment speakers {mapping}")
+    return mapping
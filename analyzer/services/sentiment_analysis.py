@@ -1,16 +1,26 @@
-import google.generativeai as genai
 import logging
 from django.conf import settings
+from .analysis_batching import AnalysisBatcher
+from .api_limiter import ProviderUnavailableError, get_api_limiter
+from .backends import get_analysis_backend
+from .llm_cache import get_llm_cache
+from .prompt_compaction import TranscriptCompactor
+from .singletons import ProcessSingleton
 
 logger = logging.getLogger(__name__)
 
 class SentimentAnalysisService:
-    """Service to handle sentiment and tone analysis using Google Gemini 2.0 Flash."""
+    """Service to handle sentiment and tone analysis with the configured backend."""
     
-    def __init__(self):
-        self.api_key = settings.GOOGLE_API_KEY
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+    def __init__(self, backend=None):
+        self.backend = backend or get_analysis_backend()
+        self.limiter = get_api_limiter(self.backend.name)
+        self.cache = get_llm_cache()
+        self.compactor = TranscriptCompactor()
+        self.batcher = None
+        if settings.ANALYSIS_BATCHING and self.backend.supports_batch:
+            # Shared by every worker thread using this service
+            self.batcher = AnalysisBatcher(self.backend, limiter=self.limiter)
     
     def analyze_conversation(self, transcription_data):
         """
@@ -20,94 +30,54 @@ class SentimentAnalysisService:
             transcription_data: Dictionary containing the full transcription and speaker-separated text
             
         Returns:
-            dict: Analysis results including sentiment, tone, and key issues
+            dict: Analysis results including sentiment, tone, and key issues; on
+                failure, retry_after is set if the provider is unavailable and the
+                call should be retried after that many seconds
         """
         try:
             logger.info("Starting sentiment analysis")
             
-            full_text = transcription_data.get('full_text', '')
-            agent_text = transcription_data.get('agent_text', '')
-            customer_text = transcription_data.get('customer_text', '')
-            
-            # Create prompt for analysis
-            prompt = f"""
-            You are an expert insurance call quality analyst.
-            
-            I will provide you with a transcription of a call between an insurance agent and a customer calling with a complaint.
-            
-            Please analyze this conversation and provide the following:
-            
-            1. Overall sentiment (positive, neutral, or negative)
-            2. Tone analysis for both the agent and customer (detect: escalation, stress, politeness, professionalism)
-            3. Key issues identified in the call
-            4. Coverage score (0-10) - how well the agent handled the complaint
-            5. Coverage score explanation
-            6. Compliance check (Did the agent follow required procedures and disclosures?)
-            7. Improvement suggestions for the agent
-            
-            Full conversation:
-            {full_text}
-            
-            Agent's dialogue:
-            {agent_text}
-            
-            Customer's dialogue:
-            {customer_text}
-            
-            Please format your response as structured JSON with the following keys:
-            sentiment, tone_analysis, key_issues, coverage_score, score_explanation, compliance_check, improvement_suggestions
-            """
-            
-            # Generate analysis with Gemini
-            response = self.model.generate_content(prompt)
-            
-            # Extract JSON content
-            result = response.text
-            
-            # Parse and format the response
-            # Note: In a real implementation, we'd use proper JSON parsing
-            # For simplicity, we're assuming the LLM will return structured data in this example
-            
-            # Example structured output (simplified for this example)
-            analysis_result = {
-                'sentiment': 'neutral',  # Placeholder - would be parsed from actual response
-                'tone_analysis': {
-                    'agent': {
-                        'escalation': 'low',
-                        'stress': 'low',
-                        'politeness': 'high',
-                        'professionalism': 'high'
-                    },
-                    'customer': {
-                        'escalation': 'medium',
-                        'stress': 'high',
-                        'politeness': 'medium',
-                        'professionalism': 'medium'
-                    }
-                },
-                'key_issues': [
-                    'Billing discrepancy',
-                    'Delayed claim processing',
-                    'Communication issues'
-                ],
-                'coverage_score': 7.5,  # 0-10 scale
-                'score_explanation': 'The agent maintained professionalism throughout the call...',
-                'compliance_check': {
-                    'identity_verification': True,
-                    'disclosure_statements': True,
-                    'solution_provided': True,
-                    'follow_up_scheduled': False
-                },
-                'improvement_suggestions': 'The agent should have scheduled a follow-up call...'
+            # Send the conversation once, speaker-tagged and within the token budget
+            compacted = self.compactor.compact(transcription_data)
+            transcript = compacted['transcript']
+            input_tokens = {
+                'before': compacted['tokens_before'],
+                'after': compacted['tokens_after']
             }
             
-            # In a real implementation, we would parse the actual response from the LLM
-            # and extract the structured data properly
+            # Reuse the analysis of an identical conversation
+            cache_key = self.cache.make_key(self.backend.model_name, self.backend.prompt_version, transcript)
+            cached_analysis = self.cache.get(cache_key)
+            if cached_analysis is not None:
+                logger.info("Using cached sentiment analysis")
+                return {
+                    'success': True,
+                    'cached': True,
+                    'analysis': cached_analysis,
+                    'input_tokens': input_tokens
+                }
+            
+            if self.batcher is not None and self._is_short_call(transcription_data):
+                analysis_result = self.batcher.analyze(transcript)
+            else:
+                analysis_result = self.limiter.call(self.backend.analyze, transcript)
+            
+            self.cache.set(cache_key, analysis_result, self.backend.model_name, self.backend.prompt_version)
             
             logger.info("Completed sentiment analysis")
             return {
                 'success': True,
-                'analysis': analysis_result
+                'analysis': analysis_result,
+                'input_tokens': input_tokens
+            }
+        
+        except ProviderUnavailableError as e:
+            # The provider is down: the caller parks the call and tries again later
+            logger.warning(f"Sentiment analysis deferred: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'retry_after': e.retry_after
             }
         
         except Exception as e:
@@ -116,3 +86,18 @@ class SentimentAnalysisService:
                 'success': False,
                 'error': str(e)
             }
+    
+    def _is_short_call(self, transcription_data):
+        """Return True if the call is short enough to be analysed in a batch with others."""
+        utterances = transcription_data.get('utterances') or []
+        if not utterances:
+            return False
+        duration_ms = max(u.get('end') or 0 for u in utterances)
+        return duration_ms < settings.ANALYSIS_BATCH_MAX_DURATION * 1000
+
+
+_sentiment_service = ProcessSingleton(SentimentAnalysisService)
+
+def get_sentiment_service():
+    """Return the process-wide sentiment analysis service, shared with its batcher."""
+    return _sentiment_service.get()
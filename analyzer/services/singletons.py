@@ -0,0 +1,85 @@
+import threading
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_singletons = []
+
+class ProcessSingleton:
+    """
+    Lazily created, thread-safe, process-wide instance of a service or client.
+
+    The instance is built by ``factory`` on first use and shared by every
+    thread afterwards, so API clients keep their configuration and pooled
+    HTTP connections for the life of the process. Instances are discarded
+    when a setting changes (``override_settings``), since they capture
+    settings when they are built; a discarded instance with a ``close``
+    method is closed.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.instance = None
+        self.lock = threading.Lock()
+        _singletons.append(self)
+
+    def get(self):
+        """Return the instance, creating it on first use."""
+        instance = self.instance
+        if instance is None:
+            with self.lock:
+                if self.instance is None:
+                    self.instance = self.factory()
+                instance = self.instance
+        return instance
+
+    def reset(self):
+        """Discard the instance; the next get() creates a new one."""
+        with self.lock:
+            instance, self.instance = self.instance, None
+        _close(instance)
+
+
+class KeyedProcessSingleton:
+    """
+    Process-wide instances of a service, one per key, such as per provider.
+
+    ``factory`` is called with the key the first time it is requested.
+    Discarded together when a setting changes, like ProcessSingleton.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.instances = {}
+        self.lock = threading.Lock()
+        _singletons.append(self)
+
+    def get(self, key):
+        """Return the instance for a key, creating it on first use."""
+        with self.lock:
+            if key not in self.instances:
+                self.instances[key] = self.factory(key)
+            return self.instances[key]
+
+    def all(self):
+        """Return the instances created so far."""
+        with self.lock:
+            return list(self.instances.values())
+
+    def reset(self):
+        """Discard all instances; the next get() creates new ones."""
+        with self.lock:
+            instances, self.instances = self.instances, {}
+        for instance in instances.values():
+            _close(instance)
+
+
+def _close(instance):
+    close = getattr(instance, 'close', None)
+    if close is not None:
+        close()
+
+
+@receiver(setting_changed)
+def reset_singletons(**kwargs):
+    for singleton in _singletons:
+        singleton.reset()
@@ -0,0 +1,322 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import Counter
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, connections, transaction
+from .singletons import ProcessSingleton
+from ..models import CallRecording
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel carrying recording status transitions between processes
+STATUS_CHANNEL = 'call_recording_status'
+
+TERMINAL_STATUSES = ('completed', 'failed')
+
+def publish_status(recording_id, status):
+    """
+    Announce a recording's new status to clients waiting on it.
+
+    Call this where the processing pipeline changes a recording's status. The
+    event is delivered once the surrounding transaction commits: in this
+    process through the status hub, and to other processes (such as the web
+    servers, when workers run separately) through Postgres NOTIFY.
+    """
+    if connection.vendor == 'postgresql':
+        payload = json.dumps({'id': recording_id, 'status': status})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [STATUS_CHANNEL, payload])
+
+    transaction.on_commit(lambda: get_status_hub().publish(recording_id, status))
+
+
+class StatusHub:
+    """
+    In-process register of the statuses of the recordings clients are watching.
+
+    Clients watch a set of recordings and block, in a thread or a coroutine,
+    until one of them differs from the status the client last saw. Statuses
+    are pushed in by publish_status, and by a listener thread that receives
+    the transitions published by other processes, so waiting clients cost
+    no database reads. Only watched recordings are kept in memory.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.statuses = {}
+        self.watchers = Counter()
+        self.async_waiters = set()
+        self.blocked_threads = 0
+        self.listener = None
+
+    def watch(self, recording_ids):
+        """
+        Start watching recordings.
+
+        Args:
+            recording_ids: IDs of the recordings to watch
+
+        Returns:
+            dict: Current status of every watched recording that exists
+        """
+        self._start_listener()
+        with self.condition:
+            self.watchers.update(recording_ids)
+            missing = [recording_id for recording_id in recording_ids if recording_id not in self.statuses]
+
+        # Statuses published while loading are newer than the database read, so keep them
+        loaded = dict(CallRecording.objects.filter(id__in=missing).values_list('id', 'status')) if missing else {}
+        with self.condition:
+            for recording_id, status in loaded.items():
+                self.statuses.setdefault(recording_id, status)
+            return {
+                recording_id: self.statuses[recording_id]
+                for recording_id in recording_ids if recording_id in self.statuses
+            }
+
+    def unwatch(self, recording_ids):
+        """Stop watching recordings, forgetting those nobody else watches."""
+        with self.condition:
+            self.watchers.subtract(recording_ids)
+            for recording_id in recording_ids:
+                if self.watchers[recording_id] <= 0:
+                    del self.watchers[recording_id]
+                    self.statuses.pop(recording_id, None)
+
+    def watched(self):
+        """Return the IDs of all watched recordings."""
+        with self.condition:
+            return list(self.watchers)
+
+    def reserve_thread(self):
+        """
+        Reserve one of the CALL_STATUS_MAX_BLOCKING_REQUESTS server threads requests may block waiting.
+
+        Returns:
+            bool: False if the limit is reached and the request must not wait
+        """
+        with self.condition:
+            limit = settings.CALL_STATUS_MAX_BLOCKING_REQUESTS
+            if limit and self.blocked_threads >= limit:
+                return False
+            self.blocked_threads += 1
+            return True
+
+    def release_thread(self):
+        """Give back a thread reserved with reserve_thread."""
+        with self.condition:
+            self.blocked_threads -= 1
+
+    def publish(self, recording_id, status):
+        """Record a recording's new status and wake the clients waiting on it."""
+        with self.condition:
+            if recording_id not in self.watchers or self.statuses.get(recording_id) == status:
+                return
+            self.statuses[recording_id] = status
+            self.condition.notify_all()
+            for loop, event in self.async_waiters:
+                loop.call_soon_threadsafe(event.set)
+
+    def changes(self, known):
+        """Return the watched recordings whose status differs from the known one."""
+        with self.condition:
+            return {
+                recording_id: self.statuses[recording_id]
+                for recording_id, status in known.items()
+                if recording_id in self.statuses and self.statuses[recording_id] != status
+            }
+
+    def wait(self, known, timeout):
+        """
+        Block until a recording's status differs from the known one.
+
+        Args:
+            known: Dict of recording ID to the status the client last saw
+            timeout: Seconds to wait at most
+
+        Returns:
+            dict: Recording ID to new status; empty if the timeout passed
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.changes(known), timeout)
+            return self.changes(known)
+
+    async def wait_async(self, known, timeout):
+        """Coroutine version of wait, for streams served over ASGI."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self.condition:
+            changes = self.changes(known)
+            if changes:
+                return changes
+            self.async_waiters.add(waiter)
+
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self.condition:
+                self.async_waiters.discard(waiter)
+        return self.changes(known)
+
+    def close(self):
+        """Stop the listener thread, e.g. when the hub is discarded."""
+        with self.condition:
+            if self.listener is not None:
+                self.listener.stop_event.set()
+
+    def _start_listener(self):
+        with self.condition:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = StatusListener(self)
+                self.listener.start()
+
+
+class StatusListener(threading.Thread):
+    """
+    Thread feeding the status transitions of other processes into a StatusHub.
+
+    On Postgres it LISTENs for the NOTIFY events sent by publish_status on a
+    dedicated connection. Other databases cannot push, so the statuses of
+    all watched recordings are read with a single query every
+    CALL_STATUS_POLL_INTERVAL seconds, however many clients are waiting.
+    """
+
+    def __init__(self, hub):
+        super().__init__(name='call-status-listener', daemon=True)
+        self.hub = hub
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                if connections['default'].vendor == 'postgresql':
+                    self._listen()
+                else:
+                    self._poll()
+            except Exception as e:
+                logger.exception(f"Call status listener failed, restarting: {str(e)}")
+                self.stop_event.wait(settings.CALL_STATUS_POLL_INTERVAL)
+
+    def _listen(self):
+        wrapper = connections['default']
+        conn = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {STATUS_CHANNEL}")
+
+            # Catch up on transitions missed while not listening
+            self._refresh()
+
+            while not self.stop_event.is_set():
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    event = json.loads(notify.payload)
+                    self.hub.publish(event['id'], event['status'])
+        finally:
+            conn.close()
+
+    def _poll(self):
+        while not self.stop_event.is_set():
+            self._refresh()
+            self.stop_event.wait(settings.CALL_STATUS_POLL_INTERVAL)
+
+    def _refresh(self):
+        """Read the statuses of all watched recordings with one query."""
+        recording_ids = self.hub.watched()
+        if not recording_ids:
+            return
+        try:
+            for recording_id, status in CallRecording.objects.filter(id__in=recording_ids).values_list('id', 'status'):
+                self.hub.publish(recording_id, status)
+        finally:
+            close_old_connections()
+
+
+class StatusEventStream:
+    """
+    Server-sent event stream of the status transitions of a set of recordings.
+
+    Sends the current status of every recording, then each change as it is
+    published, with a comment line as a keep-alive when nothing happens. The
+    stream ends once every recording is completed or failed, or after
+    CALL_STATUS_STREAM_MAX_DURATION seconds; browsers' EventSource reconnects
+    by itself. Iterable both synchronously (WSGI) and asynchronously (ASGI),
+    so it does not hold a thread per client under ASGI. Under WSGI, streams
+    beyond CALL_STATUS_MAX_BLOCKING_REQUESTS only send the current statuses
+    and ask the client to reconnect later.
+    """
+
+    def __init__(self, recording_ids, hub=None):
+        self.recording_ids = recording_ids
+        self.hub = hub or get_status_hub()
+        self.heartbeat = settings.CALL_STATUS_HEARTBEAT
+        self.max_duration = settings.CALL_STATUS_STREAM_MAX_DURATION
+
+    def __iter__(self):
+        if not self.hub.reserve_thread():
+            # Too many requests are blocking threads: send the current statuses
+            # and let EventSource reconnect later instead of holding one more
+            known = self.hub.watch(self.recording_ids)
+            self.hub.unwatch(self.recording_ids)
+            yield self._start(known, retry=settings.CALL_STATUS_BUSY_RETRY_AFTER * 1000)
+            return
+
+        known = self.hub.watch(self.recording_ids)
+        try:
+            yield self._start(known)
+            deadline = time.monotonic() + self.max_duration
+            while not self._finished(known) and time.monotonic() < deadline:
+                changes = self.hub.wait(known, min(self.heartbeat, max(deadline - time.monotonic(), 0)))
+                yield self._events(known, changes)
+            yield self._end()
+        finally:
+            self.hub.unwatch(self.recording_ids)
+            self.hub.release_thread()
+
+    async def __aiter__(self):
+        known = await sync_to_async(self.hub.watch)(self.recording_ids)
+        try:
+            yield self._start(known)
+            deadline = time.monotonic() + self.max_duration
+            while not self._finished(known) and time.monotonic() < deadline:
+                changes = await self.hub.wait_async(known, min(self.heartbeat, max(deadline - time.monotonic(), 0)))
+                yield self._events(known, changes)
+            yield self._end()
+        finally:
+            self.hub.unwatch(self.recording_ids)
+
+    def _start(self, known, retry=3000):
+        # Ask EventSource to wait a few seconds before reconnecting
+        return f"retry: {retry}\n\n" + "".join(self._event(recording_id, status) for recording_id, status in known.items())
+
+    def _events(self, known, changes):
+        if not changes:
+            return ": keep-alive\n\n"
+        known.update(changes)
+        return "".join(self._event(recording_id, status) for recording_id, status in changes.items())
+
+    def _event(self, recording_id, status):
+        return f"event: status\ndata: {json.dumps({'id': recording_id, 'status': status})}\n\n"
+
+    def _end(self):
+        return "event: end\ndata: {}\n\n"
+
+    def _finished(self, known):
+        return all(status in TERMINAL_STATUSES for status in known.values())
+
+
+_status_hub = ProcessSingleton(StatusHub)
+
+def get_status_hub():
+    """Return the process-wide status hub."""
+    return _status_hub.get()
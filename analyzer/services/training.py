@@ -1,17 +1,22 @@
-import google.generativeai as genai
 import logging
-from django.conf import settings
 from datetime import datetime
+from .backends.gemini_backend import get_gemini_model
+from .llm_cache import get_llm_cache
+from .singletons import ProcessSingleton
 
 logger = logging.getLogger(__name__)
 
 class TrainingService:
     """Service to handle agent training evaluations."""
     
+    MODEL_NAME = 'gemini-1.5-flash'
+    
+    # Bump whenever the prompt or the parsing of its response changes
+    PROMPT_VERSION = 'training-evaluation-v1'
+    
     def __init__(self):
-        self.api_key = settings.GOOGLE_API_KEY
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.model = get_gemini_model(self.MODEL_NAME)
+        self.cache = get_llm_cache()
     
     def evaluate_response(self, training_session):
         """
@@ -29,49 +34,15 @@ class TrainingService:
             query_text = training_session.query_text
             agent_response = training_session.agent_response
             
-            # Create prompt for evaluation
-            prompt = f"""
-            You are an expert insurance call quality trainer.
-            
-            I will provide you with a customer query and an insurance agent's response.
-            
-            Please evaluate the agent's response on the following criteria:
-            
-            1. Tone (0-10): How appropriate and professional was the agent's tone?
-            2. Clarity (0-10): How clear and understandable was the agent's explanation?
-            3. Accuracy (0-10): How accurately did the agent address the customer's concern?
-            4. Feedback: Provide specific constructive feedback for the agent to improve.
-            
-            Customer Query:
-            {query_text}
-            
-            Agent Response:
-            {agent_response}
-            
-            Please format your response as structured JSON with the following keys:
-            tone_score, clarity_score, accuracy_score, feedback
-            """
-            
-            # Generate evaluation with Gemini
-            response = self.model.generate_content(prompt)
-            
-            # Extract JSON content
-            result = response.text
-            
-            # Parse and format the response
-            # Note: In a real implementation, we'd use proper JSON parsing
-            # For simplicity, we're assuming the LLM will return structured data in this example
-            
-            # Example structured output (simplified for this example)
-            evaluation_result = {
-                'tone_score': 8.5,  # Placeholder - would be parsed from actual response
-                'clarity_score': 7.0,  # Placeholder
-                'accuracy_score': 8.0,  # Placeholder
-                'feedback': 'The agent maintained a professional tone throughout their response...'  # Placeholder
-            }
-            
-            # In a real implementation, we would parse the actual response from the LLM
-            # and extract the structured data properly
+            cache_key = self.cache.make_key(
+                self.MODEL_NAME, self.PROMPT_VERSION, query_text, agent_response
+            )
+            evaluation_result = self.cache.get(cache_key)
+            if evaluation_result is not None:
+                logger.info(f"Using cached evaluation for training session {training_session.id}")
+            else:
+                evaluation_result = self._evaluate(query_text, agent_response)
+                self.cache.set(cache_key, evaluation_result, self.MODEL_NAME, self.PROMPT_VERSION)
             
             # Update the training session with evaluation results
             training_session.tone_score = evaluation_result['tone_score']
@@ -95,3 +66,67 @@ class TrainingService:
                 'success': False,
                 'error': str(e)
             }
+    
+    def _evaluate(self, query_text, agent_response):
+        """
+        Ask Gemini to evaluate an agent's response.
+        
+        Args:
+            query_text: The customer query
+            agent_response: The agent's response to the query
+            
+        Returns:
+            dict: Tone, clarity and accuracy scores with feedback
+        """
+        # Create prompt for evaluation
+        prompt = f"""
+        You are an expert insurance call quality trainer.
+        
+        I will provide you with a customer query and an insurance agent's response.
+        
+        Please evaluate the agent's response on the following criteria:
+        
+        1. Tone (0-10): How appropriate and professional was the agent's tone?
+        2. Clarity (0-10): How clear and understandable was the agent's explanation?
+        3. Accuracy (0-10): How accurately did the agent address the customer's concern?
+        4. Feedback: Provide specific constructive feedback for the agent to improve.
+        
+        Customer Query:
+        {query_text}
+        
+        Agent Response:
+        {agent_response}
+        
+        Please format your response as structured JSON with the following keys:
+        tone_score, clarity_score, accuracy_score, feedback
+        """
+        
+        # Generate evaluation with Gemini
+        response = self.model.generate_content(prompt)
+        
+        # Extract JSON content
+        result = response.text
+        
+        # Parse and format the response
+        # Note: In a real implementation, we'd use proper JSON parsing
+        # For simplicity, we're assuming the LLM will return structured data in this example
+        
+        # Example structured output (simplified for this example)
+        evaluation_result = {
+            'tone_score': 8.5,  # Placeholder - would be parsed from actual response
+            'clarity_score': 7.0,  # Placeholder
+            'accuracy_score': 8.0,  # Placeholder
+            'feedback': 'The agent maintained a professional tone throughout their response...'  # Placeholder
+        }
+        
+        # In a real implementation, we would parse the actual response from the LLM
+        # and extract the structured data properly
+        
+        return evaluation_result
+
+
+_training_service = ProcessSingleton(TrainingService)
+
+def get_training_service():
+    """Return the process-wide training service."""
+    return _training_service.get()
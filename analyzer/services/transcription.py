@@ -1,81 +1,255 @@
-import assemblyai as aai
-import os
+import hashlib
+import json
 import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+from .api_limiter import ProviderUnavailableError, get_api_limiter
+from .backends import get_transcription_backend
+from .backends.base import BackendError, build_transcription_result
+from .segmentation import AudioSegmenter, stitch_utterances
+from .singletons import ProcessSingleton
+from .transcription_webhooks import webhook_config, webhooks_enabled
+from ..audio_probe import probe_audio
+from ..models import TranscriptionCacheEntry, TranscriptionRequest
 
 logger = logging.getLogger(__name__)
 
 class TranscriptionService:
-    """Service to handle speech-to-text transcription using AssemblyAI."""
+    """Service to handle speech-to-text transcription with the configured backend."""
     
-    def __init__(self):
-        self.api_key = settings.ASSEMBLY_AI_API_KEY
-        aai.settings.api_key = self.api_key
+    # Speaker diarization for the agent and the customer
+    TRANSCRIPTION_CONFIG = {
+        'speaker_labels': True,
+        'speakers_expected': 2,
+        'language_code': 'en',
+    }
     
-    def process_audio_file(self, file_path):
+    def __init__(self, backend=None):
+        self.backend = backend or get_transcription_backend()
+        self.limiter = get_api_limiter(self.backend.name)
+        self.config_key = hashlib.sha256(
+            json.dumps({'engine': self.backend.name, **self.TRANSCRIPTION_CONFIG}, sort_keys=True).encode()
+        ).hexdigest()
+    
+        # Submit and return instead of blocking a thread while the engine works
+        self.use_webhooks = webhooks_enabled() and self.backend.supports_webhooks
+    
+    def process_audio_file(self, file_path, audio_sha256=None, recording=None):
         """
         Process an audio file and return the transcription with speaker labels.
         
+        When the audio digest is known, a previous transcription of the same
+        audio with the same configuration is returned from the cache instead.
+        
+        When webhooks are enabled and a recording is given, the first call only
+        submits the audio and returns a result with waiting set; calling again
+        once the engine's webhook has arrived (or after retry_after seconds, in
+        case the callback was missed) collects the transcript.
+        
         Args:
             file_path: Path to the audio file
+            audio_sha256: Optional SHA-256 digest of the audio file
+            recording: Optional CallRecording the audio belongs to
             
         Returns:
-            dict: Transcription data including the full text and speaker-separated text
+            dict: Transcription data including the full text and speaker-separated text;
+                on failure, retry_after is set if the provider is unavailable and
+                the call should be retried after that many seconds, and waiting
+                if the transcript is not ready yet
         """
+        if audio_sha256:
+            cached = self._get_cached(audio_sha256)
+            if cached:
+                logger.info(f"Using cached transcription for audio {audio_sha256[:12]}")
+                return cached
+        
+        if recording is not None and self.use_webhooks:
+            result = self._transcribe_with_webhook(recording, file_path)
+        else:
+            result = self._transcribe(file_path)
+        
+        if result['success'] and audio_sha256:
+            self._store_cached(audio_sha256, result)
+        
+        return result
+    
+    def _transcribe(self, file_path):
+        """Transcribe an audio file with the configured backend."""
         try:
-            logger.info(f"Processing audio file: {file_path}")
+            logger.info(f"Processing audio file: {file_path} ({self.backend.name})")
             
-            # Create a transcriber with speaker diarization
-            config = aai.TranscriptionConfig(
-                speaker_labels=True,
-                speakers_expected=2,  # Agent and customer
-                language_code="en"
-            )
-            
-            transcriber = aai.Transcriber(config=config)
+            result = None
+            if self._should_segment(file_path):
+                result = self._transcribe_segmented(file_path)
+            if result is None:
+                result = self.limiter.call(self.backend.transcribe, file_path, self.TRANSCRIPTION_CONFIG)
             
-            # Start transcription
-            transcript = transcriber.transcribe(file_path)
-            
-            if transcript.status == 'error':
-                logger.error(f"Transcription failed: {transcript.error}")
-                return {
-                    'success': False,
-                    'error': transcript.error
-                }
-            
-            # Extract full text
-            full_text = transcript.text
-            
-            # Extract agent and customer text based on speaker labels
-            agent_text = []
-            customer_text = []
+            return {
+                'success': True,
+                **result
+            }
+        
+        except ProviderUnavailableError as e:
+            # The provider is down: the caller parks the call and tries again later
+            logger.warning(f"Transcription deferred: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'retry_after': e.retry_after
+            }
+        
+        except Exception as e:
+            logger.exception(f"Exception in transcription service: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def _transcribe_with_webhook(self, recording, file_path):
+        """
+        Submit a recording with a completion webhook, or collect its submitted transcript.
+        
+        Long recordings are not segmented in this mode: waiting costs no
+        thread, so there is nothing to gain from splitting them.
+        """
+        request = TranscriptionRequest.objects.filter(
+            call_recording=recording, engine=self.backend.name, status='submitted'
+        ).first()
+        
+        try:
+            if request is None:
+                logger.info(f"Submitting audio file: {file_path} ({self.backend.name})")
+                transcript_id = self.limiter.call(
+                    self.backend.submit, file_path, self.TRANSCRIPTION_CONFIG, webhook_config()
+                )
+                TranscriptionRequest.objects.create(
+                    call_recording=recording, engine=self.backend.name, transcript_id=transcript_id
+                )
+                return self._waiting(transcript_id)
             
-            for utterance in transcript.utterances:
-                if utterance.speaker == "A":  # Assuming A is the agent
-                    agent_text.append(utterance.text)
-                elif utterance.speaker == "B":  # Assuming B is the customer
-                    customer_text.append(utterance.text)
+            result = self.limiter.call(self.backend.fetch, request.transcript_id)
+            if result is None:
+                age = (timezone.now() - request.submitted_at).total_seconds()
+                if age < settings.TRANSCRIPTION_WEBHOOK_TIMEOUT:
+                    # A callback arriving while the job was running is picked up by this poll
+                    return self._waiting(request.transcript_id)
+                raise BackendError(f"Transcript {request.transcript_id} not ready after {age:.0f}s")
             
+            request.status = 'completed'
+            request.completed_at = timezone.now()
+            request.save(update_fields=['status', 'completed_at'])
             return {
                 'success': True,
-                'full_text': full_text,
-                'agent_text': "\n".join(agent_text),
-                'customer_text': "\n".join(customer_text),
-                'utterances': [
-                    {
-                        'speaker': u.speaker,
-                        'text': u.text,
-                        'start': u.start,
-                        'end': u.end
-                    }
-                    for u in transcript.utterances
-                ]
+                **result
+            }
+        
+        except ProviderUnavailableError as e:
+            logger.warning(f"Transcription deferred: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'retry_after': e.retry_after
             }
         
         except Exception as e:
             logger.exception(f"Exception in transcription service: {str(e)}")
+            if request is not None:
+                # Failing is final for this job; if the recording is queued again, it is submitted anew
+                request.status = 'failed'
+                request.error = str(e)
+                request.save(update_fields=['status', 'error'])
             return {
                 'success': False,
                 'error': str(e)
             }
+    
+    def _waiting(self, transcript_id):
+        """Result for a transcript the engine is still working on."""
+        return {
+            'success': False,
+            'waiting': True,
+            'error': f"Waiting for transcript {transcript_id}",
+            'retry_after': settings.TRANSCRIPTION_WEBHOOK_POLL_INTERVAL
+        }
+    
+    def _should_segment(self, file_path):
+        """Return True if the file is long enough to be transcribed in segments."""
+        if not settings.TRANSCRIPTION_SEGMENTATION:
+            return False
+        
+        with open(file_path, 'rb') as f:
+            info = probe_audio(f)
+        return info is not None and info['duration'] >= settings.TRANSCRIPTION_SEGMENT_MIN_DURATION
+    
+    def _transcribe_segmented(self, file_path):
+        """
+        Transcribe overlapping segments of a long recording concurrently and stitch them.
+        
+        Returns:
+            dict: Transcription result, or None if the file could not be segmented
+        """
+        segmenter = AudioSegmenter(
+            segment_seconds=settings.TRANSCRIPTION_SEGMENT_SECONDS,
+            overlap_seconds=settings.TRANSCRIPTION_SEGMENT_OVERLAP
+        )
+        
+        with tempfile.TemporaryDirectory(prefix='call-segments-') as segment_dir:
+            segments = segmenter.split(file_path, segment_dir)
+            if not segments:
+                return None
+            
+            logger.info(f"Transcribing {file_path} as {len(segments)} segments")
+            with ThreadPoolExecutor(max_workers=settings.TRANSCRIPTION_SEGMENT_CONCURRENCY) as executor:
+                results = list(executor.map(
+                    lambda segment: self.limiter.call(self.backend.transcribe, segment['path'], self.TRANSCRIPTION_CONFIG),
+                    segments
+                ))
+        
+        utterances = stitch_utterances(segments, [result['utterances'] for result in results])
+        return build_transcription_result(" ".join(u['text'] for u in utterances), utterances)
+    
+    def _get_cached(self, audio_sha256):
+        """Return a cached transcription result for the audio digest, if any."""
+        entry = TranscriptionCacheEntry.objects.filter(
+            audio_sha256=audio_sha256, config_key=self.config_key
+        ).first()
+        if entry is None:
+            return None
+        
+        TranscriptionCacheEntry.objects.filter(id=entry.id).update(hit_count=F('hit_count') + 1)
+        return {
+            'success': True,
+            'cached': True,
+            'full_text': entry.full_text,
+            'agent_text': entry.agent_text,
+            'customer_text': entry.customer_text,
+            'utterances': entry.utterances
+        }
+    
+    def _store_cached(self, audio_sha256, result):
+        """Store a successful transcription result in the cache."""
+        try:
+            TranscriptionCacheEntry.objects.get_or_create(
+                audio_sha256=audio_sha256,
+                config_key=self.config_key,
+                defaults={
+                    'full_text': result['full_text'],
+                    'agent_text': result['agent_text'],
+                    'customer_text': result['customer_text'],
+                    'utterances': result['utterances']
+                }
+            )
+        except IntegrityError:
+            # Another worker cached the same audio concurrently
+            pass
+
+
+_transcription_service = ProcessSingleton(TranscriptionService)
+
+def get_transcription_service():
+    """Return the process-wide transcription service."""
+    return _transcription_service.get()
@@ -0,0 +1,60 @@
+import hmac
+import logging
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from .job_queue import JobQueue
+from ..models import TranscriptionRequest
+
+logger = logging.getLogger(__name__)
+
+# Header carrying TRANSCRIPTION_WEBHOOK_SECRET on the provider's callbacks
+WEBHOOK_AUTH_HEADER = 'X-Webhook-Secret'
+
+def webhooks_enabled():
+    """Return True if transcriptions should be submitted with a completion webhook."""
+    return bool(settings.TRANSCRIPTION_WEBHOOK_BASE_URL and settings.TRANSCRIPTION_WEBHOOK_SECRET)
+
+
+def webhook_config():
+    """
+    Return the webhook a provider should call when a submitted transcript completes.
+
+    Returns:
+        dict: url, auth_header_name and auth_header_value
+    """
+    return {
+        'url': settings.TRANSCRIPTION_WEBHOOK_BASE_URL.rstrip('/') + reverse('transcription-webhook'),
+        'auth_header_name': WEBHOOK_AUTH_HEADER,
+        'auth_header_value': settings.TRANSCRIPTION_WEBHOOK_SECRET,
+    }
+
+
+def verify_webhook_secret(value):
+    """Return True if a callback's auth header carries the webhook secret."""
+    secret = settings.TRANSCRIPTION_WEBHOOK_SECRET
+    return bool(secret) and hmac.compare_digest((value or '').encode(), secret.encode())
+
+
+def handle_transcript_callback(transcript_id):
+    """
+    Record a provider's completion callback and wake the job waiting for the transcript.
+
+    The callback only says that the transcript is done; the woken job fetches
+    it, so a forged or repeated callback at most causes an extra fetch.
+
+    Args:
+        transcript_id: The provider's ID of the transcript
+
+    Returns:
+        bool: False if no transcription was submitted under this ID
+    """
+    request = TranscriptionRequest.objects.filter(transcript_id=transcript_id).only('id', 'call_recording_id').first()
+    if request is None:
+        logger.warning(f"Webhook for unknown transcript {transcript_id}")
+        return False
+
+    TranscriptionRequest.objects.filter(id=request.id, notified_at__isnull=True).update(notified_at=timezone.now())
+    woken = JobQueue().wake(request.call_recording_id)
+    logger.info(f"Transcript {transcript_id} is ready, woke {woken} jobs for call recording {request.call_recording_id}")
+    return True
@@ -0,0 +1,215 @@
+import logging
+import os
+import socket
+import threading
+from django.conf import settings
+from django.db import close_old_connections
+from .call_processor import CallProcessingService
+from .api_limiter import api_limiter_stats
+from .chunked_upload import ChunkedUploadService
+from .job_queue import JobQueue
+from .leaderboard import rank_changed_periods
+from .pipeline import PipelinedCallProcessor
+
+logger = logging.getLogger(__name__)
+
+class CallWorkerPool:
+    """Pool of worker threads that drain the call processing queue."""
+
+    ENGINES = ('threads', 'pipeline')
+
+    def __init__(self, concurrency=None, poll_interval=None, engine='threads'):
+        """
+        Args:
+            concurrency: Number of worker threads for the threads engine
+            poll_interval: Seconds to wait before polling an empty queue again
+            engine: 'threads' to run whole jobs per thread, or 'pipeline' to run
+                the asyncio engine that overlaps stages across calls
+        """
+        self.engine = engine
+        self.concurrency = concurrency or settings.CALL_WORKER_CONCURRENCY
+        self.poll_interval = poll_interval if poll_interval is not None else settings.CALL_WORKER_POLL_INTERVAL
+        self.job_queue = JobQueue()
+        self.call_processor = CallProcessingService()
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        # Jobs currently held by this pool, keyed by job ID
+        self.active_jobs = {}
+        self.active_jobs_lock = threading.Lock()
+
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.pipeline_worker_id = f"{self.node_id}:pipeline"
+
+    def start(self, burst=False):
+        """
+        Start the worker threads and the lease maintenance thread.
+
+        Args:
+            burst: If True, the workers exit once the queue is empty
+        """
+        if self.engine == 'pipeline':
+            thread = threading.Thread(
+                target=PipelinedCallProcessor(self).run,
+                args=(burst,),
+                name="call-pipeline"
+            )
+            thread.start()
+            self.threads.append(thread)
+        else:
+            for index in range(self.concurrency):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(burst,),
+                    name=f"call-worker-{index + 1}"
+                )
+                thread.start()
+                self.threads.append(thread)
+
+        self.maintenance_thread = threading.Thread(
+            target=self._maintain,
+            name="call-worker-maintenance",
+            daemon=True
+        )
+        self.maintenance_thread.start()
+
+        logger.info(f"Started call processing workers ({self.engine} engine) on {self.node_id}")
+
+    def stop(self):
+        """Ask the workers to exit after their current job."""
+        self.stop_event.set()
+
+    def join(self):
+        """Wait for all worker threads to exit."""
+        for thread in self.threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
+        self.stop_event.set()
+
+    def claim_job(self, worker_id):
+        """
+        Claim a job and track it for lease renewal.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+
+        Returns:
+            ProcessingJob: The claimed job, or None if nothing is available
+        """
+        try:
+            job = self.job_queue.claim(worker_id)
+        except Exception as e:
+            logger.exception(f"Exception while claiming a job: {str(e)}")
+            return None
+
+        if job is not None:
+            logger.info(f"{worker_id} picked up job {job.id} (attempt {job.attempts}/{job.max_attempts})")
+            with self.active_jobs_lock:
+                self.active_jobs[job.id] = job
+        return job
+
+    def finish_job(self, job, result):
+        """
+        Record the outcome of a job and stop renewing its lease.
+
+        Args:
+            job: The claimed ProcessingJob
+            result: Processing result dictionary
+        """
+        try:
+            if result['success']:
+                self.job_queue.complete(job)
+            elif result.get('parked'):
+                self.job_queue.park(job, result['retry_after'], result.get('error'))
+            else:
+                self.job_queue.fail(job, result.get('error'))
+        finally:
+            with self.active_jobs_lock:
+                self.active_jobs.pop(job.id, None)
+
+    def run_job(self, job):
+        """
+        Process a single claimed job and record its outcome.
+
+        Args:
+            job: The claimed ProcessingJob
+        """
+        try:
+            result = self.call_processor.process_now(job.call_recording_id)
+        except Exception as e:
+            logger.exception(f"Exception while running job {job.id}: {str(e)}")
+            result = {'success': False, 'error': str(e)}
+        self.finish_job(job, result)
+
+    def _work(self, burst):
+        """Claim and process jobs until stopped."""
+        worker_id = f"{self.node_id}:{threading.current_thread().name}"
+
+        while not self.stop_event.is_set():
+            close_old_connections()
+            job = self.claim_job(worker_id)
+
+            if job is None:
+                if burst:
+                    break
+                self.stop_event.wait(self.poll_interval)
+                continue
+
+            self.run_job(job)
+
+        close_old_connections()
+
+    def _maintain(self):
+        """Renew leases on active jobs, reap expired leases, purge abandoned uploads and rank leaderboards."""
+        heartbeat_interval = max(self.job_queue.lease_seconds / 3, 1)
+        reap_interval = settings.CALL_JOB_REAP_INTERVAL
+        rank_interval = settings.LEADERBOARD_RANK_INTERVAL
+        since_reap = reap_interval
+        since_rank = rank_interval
+
+        while not self.stop_event.wait(heartbeat_interval):
+            close_old_connections()
+
+            with self.active_jobs_lock:
+                jobs = list(self.active_jobs.values())
+            for job in jobs:
+                try:
+                    if not self.job_queue.heartbeat(job):
+                        logger.warning(f"Lost the lease on job {job.id}")
+                except Exception as e:
+                    logger.exception(f"Exception while renewing lease on job {job.id}: {str(e)}")
+
+            since_reap += heartbeat_interval
+            if since_reap >= reap_interval:
+                since_reap = 0
+                try:
+                    self.job_queue.reap_expired()
+                except Exception as e:
+                    logger.exception(f"Exception while reaping expired jobs: {str(e)}")
+                try:
+                    ChunkedUploadService().purge_expired()
+                except Exception as e:
+                    logger.exception(f"Exception while purging expired upload sessions: {str(e)}")
+                self._log_api_limits()
+
+            since_rank += heartbeat_interval
+            if since_rank >= rank_interval:
+                since_rank = 0
+                try:
+                    rank_changed_periods()
+                except Exception as e:
+                    logger.exception(f"Exception while ranking leaderboards: {str(e)}")
+
+        close_old_connections()
+
+    def _log_api_limits(self):
+        """Log the state of the external API limiters, louder while a circuit is not closed."""
+        for name, stats in api_limiter_stats().items():
+            level = logging.INFO if stats['circuit'] == 'closed' else logging.WARNING
+            logger.log(
+                level,
+                f"API limiter {name}: circuit {stats['circuit']}, concurrency "
+                f"{stats['in_flight']}/{stats['concurrency_limit']}, {stats['succeeded']} succeeded, "
+                f"{stats['rate_limited']} rate limited, {stats['unavailable']} unavailable, "
+                f"{stats['rejected']} rejected"
+            )
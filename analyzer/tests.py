@@ -1,3 +1,734 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import wave
+import zipfile
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest import mock
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import (
+    Agent, AgentDailyStats, CallAnalysis, CallRecording, LeaderboardEntry, ProcessingJob, TranscriptionRequest,
+    UploadSession
+)
+from .services.agent_performance import get_agent_performance
+from .services.api_limiter import ProviderLimiter, ProviderUnavailableError, get_api_limiter
+from .services.ingestion import IngestionError, RecordingIngestionService
+from .services.chunked_upload import ChunkedUploadService, UploadConflictError, UploadError
+from .services.backends.base import (
+    AnalysisBackend, BackendError, BackendUnavailableError, TranscriptionBackend, build_transcription_result
+)
+from .services.job_queue import JobQueue
+from .services.leaderboard import get_leaderboard, rank_changed_periods
+from .services.llm_cache import LocalMemoryLLMCache, NullLLMCache, get_llm_cache
+from .services.pipeline import PipelinedCallProcessor
+from .services import report_metrics
+from .services.prompt_compaction import TranscriptCompactor
+from .services.segmentation import AudioSegmenter, stitch_utterances
+from .services.status_events import StatusEventStream, StatusHub, get_status_hub
+from .services.worker import CallWorkerPool
 
-# Create your tests here.
+
+def make_agent(number=1, department='Claims'):
+    user = User.objects.create_user(f"agent{number}", first_name='Agent', last_name=str(number))
+    return Agent.objects.create(
+        user=user, employee_id=f"E{number:03d}", department=department, hire_date=date(2024, 1, 1)
+    )
+
+
+def make_recording(agent, title='Call', content=b'RIFF0000WAVE', **fields):
+    return CallRecording.objects.create(agent=agent, title=title, file=ContentFile(content, name='call.wav'), **fields)
+
+
+def make_wav(seconds=1, rate=8000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b'\x00\x00' * rate * seconds)
+    return buffer.getvalue()
+
+
+def make_analysis(recording, coverage_score, sentiment='positive', key_issues=(), compliance_check=None):
+    return CallAnalysis.objects.create(
+        call_recording=recording, agent=recording.agent, transcription_text='', agent_text='', customer_text='',
+        coverage_score=coverage_score, score_explanation='', sentiment=sentiment, confidence_score=0.9,
+        key_issues=list(key_issues), compliance_check=compliance_check or {}
+    )
+
+
+class MediaTestCase(TestCase):
+    """TestCase storing uploaded files in a temporary MEDIA_ROOT."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(prefix='analyzer-tests-')
+        cls.media_override = override_settings(
+            MEDIA_ROOT=cls.media_root, CHUNKED_UPLOAD_TEMP_DIR=os.path.join(cls.media_root, 'upload_sessions')
+        )
+        cls.media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+@override_settings(
+    API_RETRY_ATTEMPTS=3, API_RETRY_BASE_DELAY=0, API_RETRY_MAX_DELAY=0,
+    API_CIRCUIT_FAILURE_THRESHOLD=1, API_CIRCUIT_RESET_TIMEOUT=0.05
+)
+class CircuitBreakerProbeTests(SimpleTestCase):
+    def open_circuit(self, limiter):
+        def outage():
+            raise BackendUnavailableError("server error")
+
+        with self.assertRaises(ProviderUnavailableError):
+            limiter.call(outage)
+        self.assertEqual(limiter.breaker.state, 'open')
+        time.sleep(0.06)
+
+    def test_rate_limited_probe_reopens_circuit(self):
+        limiter = ProviderLimiter('test')
+        self.open_circuit(limiter)
+
+        def rate_limited():
+            raise BackendUnavailableError("rate limited", rate_limited=True)
+
+        with self.assertRaises(ProviderUnavailableError):
+            limiter.call(rate_limited)
+        self.assertEqual(limiter.breaker.state, 'open')
+        self.assertFalse(limiter.breaker.probing)
+
+        # Once the reset timeout has passed again, a new probe goes through
+        time.sleep(0.06)
+        self.assertEqual(limiter.call(lambda: 'ok'), 'ok')
+        self.assertEqual(limiter.breaker.state, 'closed')
+
+    def test_successful_probe_closes_circuit(self):
+        limiter = ProviderLimiter('test')
+        self.open_circuit(limiter)
+
+        self.assertEqual(limiter.call(lambda: 'ok'), 'ok')
+        self.assertEqual(limiter.breaker.state, 'closed')
+        self.assertFalse(limiter.breaker.probing)
+
+
+class AudioSegmenterTests(SimpleTestCase):
+    def test_non_pcm_wav_is_not_segmented(self):
+        # Minimal 8 kHz μ-law WAV (format 7), which the wave module cannot read
+        rate, frames = 8000, 8000 * 60
+        header = (
+            b'RIFF' + struct.pack('<I', 36 + frames) + b'WAVE'
+            + b'fmt ' + struct.pack('<IHHIIHH', 16, 7, 1, rate, rate, 1, 8)
+            + b'data' + struct.pack('<I', frames)
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'call.wav')
+            with open(path, 'wb') as f:
+                f.write(header + b'\xff' * frames)
+            segmenter = AudioSegmenter(segment_seconds=20, overlap_seconds=2)
+            self.assertIsNone(segmenter.split(path, directory))
+
+
+class StitchUtterancesTests(SimpleTestCase):
+    # Two segments cut at 60s with 10s of overlap
+    SEGMENTS = [
+        {'path': 'segment-000.wav', 'start': 0, 'end': 65000, 'keep_start': 0, 'keep_end': 60000},
+        {'path': 'segment-001.wav', 'start': 55000, 'end': 120000, 'keep_start': 60000, 'keep_end': 120000},
+    ]
+
+    def stitch(self, before, after):
+        first = [
+            {'speaker': 'A', 'start': 10000, 'end': 20000, 'text': "Thanks for calling, how can I help?"},
+            {'speaker': 'B', 'start': 50000, 'end': 56000, 'text': "It was filed last month."},
+            {'speaker': 'A', **before},
+        ]
+        second = [
+            {'speaker': 'B', 'start': 0, 'end': 1000, 'text': "last month."},
+            {'speaker': 'A', **after},
+            {'speaker': 'B', 'start': 20000, 'end': 25000, 'text': "Thank you."},
+        ]
+        return stitch_utterances(self.SEGMENTS, [first, second])
+
+    def test_utterance_spanning_a_cut_is_merged(self):
+        utterances = self.stitch(
+            {'start': 58000, 'end': 65000, 'text': "Let me check the status of"},
+            {'start': 3000, 'end': 15000, 'text': "check the status of your claim for you now."},
+        )
+        self.assertEqual(
+            [u['text'] for u in utterances],
+            ["Thanks for calling, how can I help?", "It was filed last month.",
+             "Let me check the status of your claim for you now.", "Thank you."]
+        )
+        self.assertEqual((utterances[2]['start'], utterances[2]['end']), (58000, 70000))
+
+    def test_longer_copy_is_kept_without_common_words(self):
+        utterances = self.stitch(
+            {'start': 58000, 'end': 65000, 'text': "Let me"},
+            {'start': 3000, 'end': 15000, 'text': "Let me check the status of your claim."},
+        )
+        self.assertEqual(utterances[2]['text'], "Let me check the status of your claim.")
+        self.assertEqual(len(utterances), 4)
+
+
+class AnalysisParsingTests(SimpleTestCase):
+    ANALYSIS = {
+        'sentiment': 'Negative',
+        'tone_analysis': {'agent': {'politeness': 'high'}, 'customer': {'stress': 'high'}},
+        'key_issues': ['Delayed claim'],
+        'coverage_score': '6.5',
+        'score_explanation': 'The agent verified the caller.',
+        'compliance_check': {'identity_verification': True, 'follow_up_scheduled': 'no'},
+        'improvement_suggestions': ['Schedule a follow-up', 'Explain the delay'],
+    }
+
+    def test_analysis_is_coerced(self):
+        analysis = AnalysisBackend().parse_response(json.dumps(self.ANALYSIS))
+        self.assertEqual(analysis['sentiment'], 'negative')
+        self.assertEqual(analysis['coverage_score'], 6.5)
+        self.assertEqual(analysis['compliance_check'], {'identity_verification': True, 'follow_up_scheduled': False})
+        self.assertEqual(analysis['improvement_suggestions'], "Schedule a follow-up\nExplain the delay")
+
+    def test_invalid_values_are_rejected(self):
+        for key, value in [
+            ('coverage_score', 11), ('coverage_score', 'high'), ('coverage_score', True),
+            ('sentiment', 'angry'), ('compliance_check', ['identity_verification']),
+        ]:
+            with self.subTest(key=key, value=value), self.assertRaises(BackendError):
+                AnalysisBackend().parse_analysis({**self.ANALYSIS, key: value})
+
+    def test_invalid_batch_entry_fails_only_its_call(self):
+        response = json.dumps([
+            {'call_id': 'call-1', **self.ANALYSIS},
+            {'call_id': 'call-2', **self.ANALYSIS, 'coverage_score': 'n/a'},
+        ])
+        results = AnalysisBackend().parse_batch_response(response, {'call-1', 'call-2'})
+        self.assertEqual(list(results), ['call-1'])
+
+
+class FailingCallProcessor:
+    def start_processing(self, recording_id):
+        raise RuntimeError("recording unavailable")
+
+    def handle_failure(self, recording_id, step, result):
+        raise RuntimeError("database unavailable")
+
+
+class StubWorkerPool:
+    """Worker pool handing out a fixed list of jobs, without a database."""
+
+    pipeline_worker_id = 'test-pipeline'
+    poll_interval = 0.01
+
+    def __init__(self, jobs):
+        self.call_processor = FailingCallProcessor()
+        self.stop_event = threading.Event()
+        self.jobs = list(jobs)
+        self.finished = []
+
+    def claim_job(self, worker_id):
+        return self.jobs.pop(0) if self.jobs else None
+
+    def finish_job(self, job, result):
+        self.finished.append((job.id, result['success']))
+
+
+@override_settings(CALL_PIPELINE_MAX_IN_FLIGHT=2)
+class PipelineFailureTests(SimpleTestCase):
+    def test_unrecordable_failures_release_their_slots(self):
+        jobs = [SimpleNamespace(id=number, call_recording_id=number) for number in range(5)]
+        pool = StubWorkerPool(jobs)
+        concurrency = {'transcription': 1, 'analysis': 1, 'persistence': 1, 'report': 1}
+
+        runner = threading.Thread(target=PipelinedCallProcessor(pool, concurrency).run, kwargs={'burst': True})
+        runner.start()
+        runner.join(timeout=10)
+
+        self.assertFalse(runner.is_alive())
+        self.assertEqual(pool.finished, [(job.id, False) for job in jobs])
+
+
+class ProcessSingletonTests(SimpleTestCase):
+    def test_services_are_rebuilt_when_settings_change(self):
+        with override_settings(LLM_CACHE_BACKEND='memory', API_LIMITS={'test': {'rate': 5, 'burst': 2}}):
+            cache = get_llm_cache()
+            limiter = get_api_limiter('test')
+            hub = get_status_hub()
+            self.assertIsInstance(cache, LocalMemoryLLMCache)
+            self.assertIs(get_api_limiter('test'), limiter)
+            self.assertEqual(limiter.bucket.rate, 5)
+
+        with override_settings(LLM_CACHE_BACKEND='none', API_LIMITS={}):
+            self.assertIsInstance(get_llm_cache(), NullLLMCache)
+            self.assertIsNot(get_api_limiter('test'), limiter)
+            self.assertEqual(get_api_limiter('test').bucket.rate, 0)
+            self.assertIsNot(get_status_hub(), hub)
+
+
+class TranscriptCompactorTests(SimpleTestCase):
+    def test_plain_text_is_kept_within_the_budget(self):
+        text = " ".join(f"word{number}" for number in range(5000))
+        result = TranscriptCompactor(token_budget=200).compact({'full_text': text, 'utterances': []})
+        self.assertLessEqual(result['tokens_after'], 200)
+        self.assertTrue(result['transcript'].startswith("word0 "))
+        self.assertTrue(result['transcript'].endswith(" word4999"))
+        self.assertIn("words omitted", result['transcript'])
+
+
+@override_settings(CALL_STATUS_MAX_BLOCKING_REQUESTS=1, CALL_STATUS_BUSY_RETRY_AFTER=15)
+class StatusThreadLimitTests(SimpleTestCase):
+    def test_streams_beyond_the_limit_do_not_block(self):
+        hub = StatusHub()
+        hub.watch = lambda recording_ids: {recording_id: 'processing' for recording_id in recording_ids}
+        self.assertTrue(hub.reserve_thread())
+
+        events = list(StatusEventStream([1], hub=hub))
+
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0].startswith("retry: 15000\n\n"))
+        self.assertEqual(hub.blocked_threads, 1)
+
+    def test_threads_are_released(self):
+        hub = StatusHub()
+        self.assertTrue(hub.reserve_thread())
+        self.assertFalse(hub.reserve_thread())
+        hub.release_thread()
+        self.assertTrue(hub.reserve_thread())
+
+
+class RateLimitedTranscriptionBackend(TranscriptionBackend):
+    """Transcription backend that is always rate limited."""
+
+    name = 'rate-limited'
+    calls = 0
+
+    def transcribe(self, file_path, config):
+        RateLimitedTranscriptionBackend.calls += 1
+        raise BackendUnavailableError("429 Too Many Requests", rate_limited=True)
+
+
+@override_settings(
+    TRANSCRIPTION_BACKEND='analyzer.tests.RateLimitedTranscriptionBackend', TRANSCRIPTION_SEGMENTATION=False,
+    API_RETRY_ATTEMPTS=3, API_RETRY_BASE_DELAY=0, API_RETRY_MAX_DELAY=0, API_CIRCUIT_FAILURE_THRESHOLD=5
+)
+class ProviderOutageTests(MediaTestCase):
+    def test_job_is_parked_when_retries_run_out(self):
+        recording = make_recording(make_agent())
+        job_queue = JobQueue()
+        job_queue.enqueue(recording.id)
+        job = job_queue.claim('test-worker')
+        RateLimitedTranscriptionBackend.calls = 0
+
+        CallWorkerPool(concurrency=1).run_job(job)
+
+        job.refresh_from_db()
+        recording.refresh_from_db()
+        self.assertEqual(RateLimitedTranscriptionBackend.calls, 3)
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(job.attempts, 0)
+        self.assertEqual(recording.status, 'pending')
+
+
+@override_settings(LEADERBOARD_MIN_CALLS=1)
+class LeaderboardTests(MediaTestCase):
+    def test_reads_do_not_rank(self):
+        first, second = make_agent(1), make_agent(2, department='Sales')
+        make_analysis(make_recording(first), 6)
+        make_analysis(make_recording(second), 9)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_leaderboard(), [])
+
+        self.assertEqual(rank_changed_periods(), 3)
+        self.assertEqual([entry.agent for entry in get_leaderboard()], [second, first])
+        self.assertEqual([entry.agent for entry in get_leaderboard(department='Claims')], [first])
+        self.assertEqual(rank_changed_periods(), 0)
+
+        make_analysis(make_recording(second), 1)
+        self.assertEqual(rank_changed_periods(), 3)
+        self.assertEqual(
+            [(entry.agent, entry.rank, entry.call_count) for entry in get_leaderboard(period='week')],
+            [(first, 1, 1), (second, 2, 2)]
+        )
+        self.assertFalse(LeaderboardEntry.objects.filter(rank__isnull=True).exists())
+
+
+class InterruptedStream:
+    """Request stream whose connection drops after ``limit`` bytes."""
+
+    def __init__(self, data, limit, session_id):
+        self.data = io.BytesIO(data[:limit])
+        self.session_id = session_id
+        self.statuses = set()
+
+    def read(self, size):
+        self.statuses.add(UploadSession.objects.get(id=self.session_id).status)
+        data = self.data.read(size)
+        if not data:
+            raise OSError("Connection reset by peer")
+        return data
+
+
+class ChunkedUploadTests(MediaTestCase):
+    def setUp(self):
+        self.service = ChunkedUploadService()
+        self.data = make_wav()
+        self.session = self.service.create_session(
+            agent=make_agent(), title='Long call', filename='call.wav', total_size=len(self.data),
+            sha256=hashlib.sha256(self.data).hexdigest()
+        )
+
+    def test_chunk_at_wrong_offset_is_refused(self):
+        self.service.append_chunk(self.session.id, 0, io.BytesIO(self.data[:100]), 100)
+
+        with self.assertRaises(UploadConflictError) as raised:
+            self.service.append_chunk(self.session.id, 50, io.BytesIO(self.data[50:150]), 100)
+
+        self.assertEqual(raised.exception.offset, 100)
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.status, self.session.received_bytes), ('active', 100))
+
+    def test_interrupted_upload_resumes_from_reported_offset(self):
+        stream = InterruptedStream(self.data, 4000, self.session.id)
+        with self.assertRaises(UploadConflictError) as raised:
+            self.service.append_chunk(self.session.id, 0, stream, len(self.data))
+        offset = raised.exception.offset
+
+        # The session was marked rather than locked while the chunk was read
+        self.assertEqual(stream.statuses, {'receiving'})
+        self.assertEqual(offset, 4000)
+
+        self.service.append_chunk(self.session.id, offset, io.BytesIO(self.data[offset:]), len(self.data) - offset)
+        result = self.service.finalize(self.session.id)
+
+        recording = result['recording']
+        self.assertEqual(result['session'].status, 'completed')
+        self.assertEqual(recording.audio_sha256, hashlib.sha256(self.data).hexdigest())
+        with recording.file.open('rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertTrue(ProcessingJob.objects.filter(call_recording=recording, status='queued').exists())
+        self.assertFalse(os.path.exists(self.session.temp_path))
+
+    def test_checksum_mismatch_fails_the_session(self):
+        self.service.append_chunk(self.session.id, 0, io.BytesIO(self.data), len(self.data))
+
+        with self.assertRaises(UploadError):
+            self.service.finalize(self.session.id, sha256='0' * 64)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'failed')
+        self.assertFalse(CallRecording.objects.exists())
+        self.assertFalse(os.path.exists(self.session.temp_path))
+
+    def test_stalled_session_is_taken_over(self):
+        UploadSession.objects.filter(id=self.session.id).update(status='receiving')
+        with self.assertRaises(UploadConflictError):
+            self.service.append_chunk(self.session.id, 0, io.BytesIO(self.data), len(self.data))
+
+        UploadSession.objects.filter(id=self.session.id).update(updated_at=timezone.now() - timedelta(hours=1))
+        session = self.service.append_chunk(self.session.id, 0, io.BytesIO(self.data), len(self.data))
+        self.assertEqual((session.status, session.received_bytes), ('active', len(self.data)))
+
+
+class AgentDailyStatsTests(MediaTestCase):
+    def snapshot(self):
+        fields = [field.name for field in AgentDailyStats._meta.fields if field.name != 'id']
+        return sorted(
+            tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+            for row in AgentDailyStats.objects.filter(call_count__gt=0).values_list(*fields)
+        )
+
+    def test_rollup_matches_rebuild(self):
+        first, second = make_agent(1), make_agent(2)
+        checks = {'identity_verification': True, 'follow_up_scheduled': False}
+        analyses = [
+            make_analysis(make_recording(first, duration_seconds=300), 7.5, 'positive', compliance_check=checks),
+            make_analysis(make_recording(first, duration_seconds=45), 4, 'negative'),
+            make_analysis(make_recording(second), 9, 'neutral', compliance_check={'identity_verification': True}),
+        ]
+
+        # Re-score, reassign and delete through the model, and delete by cascade
+        analyses[1].coverage_score = 6
+        analyses[1].sentiment = 'neutral'
+        analyses[1].compliance_check = {'identity_verification': False}
+        analyses[1].save()
+        analyses[2].agent = first
+        analyses[2].save(update_fields=['agent'])
+        analyses[0].delete()
+        make_analysis(make_recording(second), 8, 'positive', compliance_check=checks)
+        analyses[1].call_recording.delete()
+
+        incremental = self.snapshot()
+        AgentDailyStats.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(sum(row.call_count for row in AgentDailyStats.objects.all()), 2)
+
+
+class JobQueueTests(MediaTestCase):
+    @override_settings(CALL_PROCESSING_MAX_IN_FLIGHT=1)
+    def test_claims_stop_at_the_in_flight_limit(self):
+        agent = make_agent()
+        job_queue = JobQueue()
+        job_queue.enqueue_many([make_recording(agent).id, make_recording(agent).id])
+
+        job = job_queue.claim('worker-1')
+        self.assertIsNotNone(job)
+        self.assertIsNone(job_queue.claim('worker-2'))
+
+        job_queue.complete(job)
+        self.assertIsNotNone(job_queue.claim('worker-2'))
+
+
+class WebhookTranscriptionBackend(TranscriptionBackend):
+    """Transcription backend whose transcript is ready once ``ready`` is set."""
+
+    name = 'webhook'
+    supports_webhooks = True
+    ready = False
+
+    def submit(self, file_path, config, webhook):
+        return 'transcript-1'
+
+    def fetch(self, transcript_id):
+        if not WebhookTranscriptionBackend.ready:
+            return None
+        utterances = [
+            {'speaker': 'A', 'start': 0, 'end': 3000, 'text': "Thanks for calling. Can you verify your policy number?"},
+            {'speaker': 'B', 'start': 3000, 'end': 6000, 'text': "Sure. My claim has been delayed twice."},
+        ]
+        return build_transcription_result(" ".join(u['text'] for u in utterances), utterances)
+
+
+@override_settings(
+    TRANSCRIPTION_BACKEND='analyzer.tests.WebhookTranscriptionBackend', ANALYSIS_BACKEND='local',
+    TRANSCRIPTION_WEBHOOK_BASE_URL='https://calls.example.com', TRANSCRIPTION_WEBHOOK_SECRET='webhook-secret',
+    TRANSCRIPTION_WEBHOOK_POLL_INTERVAL=600, TRANSCRIPTION_SEGMENTATION=False, LLM_CACHE_BACKEND='none'
+)
+class TranscriptionWebhookTests(MediaTestCase):
+    def callback(self, secret='webhook-secret'):
+        return self.client.post(
+            reverse('transcription-webhook'), {'transcript_id': 'transcript-1'},
+            content_type='application/json', headers={'X-Webhook-Secret': secret}
+        )
+
+    def test_callback_wakes_the_waiting_job(self):
+        WebhookTranscriptionBackend.ready = False
+        recording = make_recording(make_agent())
+        job_queue = JobQueue()
+        job_queue.enqueue(recording.id)
+        pool = CallWorkerPool(concurrency=1)
+
+        # The first run submits the audio and parks the job until the callback
+        pool.run_job(job_queue.claim('test-worker'))
+        job = ProcessingJob.objects.get(call_recording=recording)
+        self.assertEqual(job.status, 'queued')
+        self.assertGreater(job.available_at, timezone.now())
+        self.assertEqual(TranscriptionRequest.objects.get(call_recording=recording).status, 'submitted')
+        self.assertIsNone(job_queue.position(job))
+        self.assertEqual((job_queue.depth(), job_queue.stats()['waiting']), (0, 1))
+
+        self.assertEqual(self.callback(secret='wrong').status_code, 403)
+        self.assertEqual(self.callback().status_code, 200)
+        job.refresh_from_db()
+        self.assertLessEqual(job.available_at, timezone.now())
+
+        # The woken job collects the transcript and finishes the call
+        WebhookTranscriptionBackend.ready = True
+        pool.run_job(job_queue.claim('test-worker'))
+        job.refresh_from_db()
+        recording.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(recording.status, 'completed')
+        self.assertEqual(TranscriptionRequest.objects.get(call_recording=recording).status, 'completed')
+        self.assertTrue(CallAnalysis.objects.filter(call_recording=recording).exists())
+
+
+class ArchiveIngestionTests(MediaTestCase):
+    def make_archive(self, files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, content in files.items():
+                archive.writestr(name, content)
+        buffer.seek(0)
+        return buffer
+
+    def test_archive_is_ingested_with_its_manifest(self):
+        first, second = make_agent(1), make_agent(2)
+        manifest = json.dumps([{'filename': 'b.wav', 'employee_id': second.employee_id, 'title': 'Escalation'}])
+        archive = self.make_archive({
+            'calls/a.wav': os.urandom(2000), 'calls/b.wav': os.urandom(3000), 'manifest.json': manifest,
+            '__MACOSX/calls/._a.wav': b'',
+        })
+
+        result = RecordingIngestionService().ingest_archive(archive, default_agent=first)
+
+        self.assertEqual([r['success'] for r in result['results']], [True, True])
+        recordings = {r.title: r for r in CallRecording.objects.select_related('agent')}
+        self.assertEqual(set(recordings), {'a', 'Escalation'})
+        self.assertEqual(recordings['Escalation'].agent, second)
+        self.assertEqual(ProcessingJob.objects.filter(status='queued').count(), 2)
+
+    def test_archive_bombs_are_refused_before_extraction(self):
+        agent = make_agent()
+        cases = [
+            ({}, {'silence.wav': b'\x00' * 1024 ** 2}),
+            ({'BULK_UPLOAD_MAX_FILE_SIZE': 1000}, {'a.wav': os.urandom(2000)}),
+            ({'BULK_UPLOAD_MAX_TOTAL_SIZE': 3000}, {'a.wav': os.urandom(2000), 'b.wav': os.urandom(2000)}),
+        ]
+        for limits, files in cases:
+            with self.subTest(limits=limits), override_settings(**limits):
+                with self.assertRaises(IngestionError):
+                    RecordingIngestionService().ingest_archive(self.make_archive(files), default_agent=agent)
+        self.assertFalse(CallRecording.objects.exists())
+
+
+class AgentMetricsTests(MediaTestCase):
+    def metrics(self):
+        return {
+            agent.id: (agent.total_calls_handled, round(agent.coverage_score_sum, 6), round(agent.avg_coverage_score, 6))
+            for agent in Agent.objects.all()
+        }
+
+    def test_running_totals_match_rebuild(self):
+        first, second = make_agent(1), make_agent(2)
+        analyses = [make_analysis(make_recording(agent), score) for agent, score in [
+            (first, 8), (first, 5.5), (second, 9), (second, 3)
+        ]]
+        analyses[0].coverage_score = 10
+        analyses[0].save(update_fields=['coverage_score'])
+        analyses[2].agent = first
+        analyses[2].save()
+        analyses[3].delete()
+        analyses[1].call_recording.delete()
+
+        incremental = self.metrics()
+        self.assertEqual(incremental[first.id], (2, 19.0, 9.5))
+        self.assertEqual(incremental[second.id], (0, 0.0, 0.0))
+
+        Agent.rebuild_metrics()
+        self.assertEqual(self.metrics(), incremental)
+
+
+class AgentPerformanceTests(MediaTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_percentiles_and_cache_invalidation(self):
+        agent = make_agent()
+        scores = [3, 9.5, 6, 7, 8]
+        for score, sentiment in zip(scores, ['negative', 'positive', 'neutral', 'positive', 'positive']):
+            make_analysis(make_recording(agent), score, sentiment)
+        agent.refresh_from_db()
+
+        performance = get_agent_performance(agent)
+        self.assertEqual(performance['total_calls'], 5)
+        self.assertAlmostEqual(performance['avg_coverage_score'], 6.7)
+        self.assertEqual(performance['sentiment_distribution'], {'positive': 3, 'neutral': 1, 'negative': 1})
+        for name, fraction in [('p25', 25), ('p50', 50), ('p75', 75), ('p90', 90)]:
+            self.assertAlmostEqual(performance['score_percentiles'][name], np.percentile(scores, fraction))
+
+        # Served from the cache until an analysis changes
+        with self.assertNumQueries(0):
+            self.assertEqual(get_agent_performance(agent), performance)
+        make_analysis(make_recording(agent), 1, 'negative')
+        agent.refresh_from_db()
+        self.assertEqual(get_agent_performance(agent)['total_calls'], 6)
+
+
+class ReportMetricsTests(MediaTestCase):
+    def setUp(self):
+        self.first, self.second = make_agent(1), make_agent(2)
+        for agent, score, sentiment, issues in [
+            (self.first, 8, 'positive', ['Billing discrepancy', 'Delayed claim processing']),
+            (self.first, 4, 'negative', ['Delayed claim processing']),
+            (self.second, 6, 'neutral', ['Policy changes', 'Delayed claim processing', 'Billing discrepancy']),
+            (self.second, 7, 'positive', []),
+        ]:
+            make_analysis(make_recording(agent, duration_seconds=120), score, sentiment, issues)
+        # Analyses stored before key_issues was validated may hold other JSON
+        broken = make_analysis(make_recording(self.second), 5, 'neutral')
+        CallAnalysis.objects.filter(id=broken.id).update(key_issues={'issue': 'Policy changes'})
+
+    def test_issue_frequencies_expand_the_json_arrays(self):
+        expected = [
+            {'issue': 'Delayed claim processing', 'count': 3},
+            {'issue': 'Billing discrepancy', 'count': 2},
+            {'issue': 'Policy changes', 'count': 1},
+        ]
+        analyses = CallAnalysis.objects.all()
+        self.assertEqual(report_metrics.issue_frequencies(analyses), expected)
+        self.assertEqual(
+            report_metrics.issue_frequencies(analyses.filter(agent=self.first), limit=1),
+            [{'issue': 'Delayed claim processing', 'count': 2}]
+        )
+
+        # Databases without a JSON expansion count the arrays in Python
+        with mock.patch.dict(report_metrics.ISSUE_FREQUENCY_SQL, clear=True):
+            self.assertEqual(report_metrics.issue_frequencies(analyses), expected)
+
+    def test_performance_and_trend_come_from_the_rollup(self):
+        today = timezone.localdate()
+        performance = report_metrics.agent_performance(today, today)
+        self.assertEqual(performance, {
+            'Agent 1': {'call_count': 2, 'avg_score': 6.0},
+            'Agent 2': {'call_count': 3, 'avg_score': 6.0},
+        })
+
+        trend = report_metrics.daily_trend(today - timedelta(days=1), today)
+        self.assertEqual(len(trend), 1)
+        self.assertEqual(trend[0]['call_count'], 5)
+        self.assertAlmostEqual(trend[0]['score_stddev'], np.std([8, 4, 6, 7, 5]))
+        self.assertEqual(trend[0]['sentiment'], {'positive': 2, 'neutral': 2, 'negative': 1})
+        self.assertEqual(trend[0]['avg_duration_seconds'], 96)
+        self.assertEqual(report_metrics.daily_trend(today + timedelta(days=1), today + timedelta(days=7)), [])
+
+
+class SparseFieldsetTests(MediaTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('supervisor'))
+        for number in range(1, 4):
+            make_analysis(make_recording(make_agent(number)), 5 + number, key_issues=['Billing discrepancy'])
+
+    def test_expanded_list_takes_one_query_per_page(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/call-analyses/?expand=agent,call_recording')
+        self.assertEqual(response.status_code, 200)
+        first = response.json()['results'][0]
+        self.assertEqual(first['call_recording']['agent'], first['agent']['id'])
+        self.assertEqual(first['call_recording']['agent_name'], first['agent_name'])
+        self.assertNotIn('transcription_text', first)
+
+    def test_requested_fields_limit_the_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/call-analyses/?fields=id,coverage_score,agent_name')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'coverage_score', 'agent_name'})
+        self.assertEqual(len(queries), 2)
+        select = queries[-1]['sql']
+        self.assertIn('first_name', select)
+        self.assertNotIn('transcription_text', select)
+        self.assertNotIn('key_issues', select)
+
+    def test_unknown_fields_are_rejected(self):
+        self.assertEqual(self.client.get('/api/call-analyses/?fields=id,secret').status_code, 400)
+        self.assertEqual(self.client.get('/api/call-analyses/?expand=transcription_text').status_code, 400)
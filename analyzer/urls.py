@@ -6,6 +6,7 @@ from . import views
 router = DefaultRouter()
 router.register(r'agents', views.AgentViewSet)
 router.register(r'call-recordings', views.CallRecordingViewSet)
+router.register(r'upload-sessions', views.UploadSessionViewSet)
 router.register(r'call-analyses', views.CallAnalysisViewSet)
 router.register(r'reports', views.ReportViewSet)
 router.register(r'training-sessions', views.TrainingSessionViewSet)
@@ -14,4 +15,5 @@ urlpatterns = [
     # API endpoints
     path('', include(router.urls)),  # Changed from 'api/' to '' since we're already under /api/
     path('agents/me/', views.AgentViewSet.as_view({'get': 'me'}), name='agent-me'),  # Add me/ endpoint
+    path('transcription-webhook/', views.TranscriptionWebhookView.as_view(), name='transcription-webhook'),
 ]
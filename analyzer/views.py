@@ -1,68 +1,168 @@
 from django.shortcuts import render, get_object_or_404
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.http import FileResponse
-from django.db.models import Avg, Count, Q
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta
 import os
 
-from .models import Agent, CallRecording, CallAnalysis, Report, TrainingSession
+from .models import Agent, CallRecording, UploadSession, CallAnalysis, Report, TrainingSession
 from .serializers import (
-    AgentSerializer, CallRecordingSerializer, CallAnalysisSerializer,
-    ReportSerializer, TrainingSessionSerializer
+    AgentSerializer, LeaderboardEntrySerializer, CallRecordingSerializer, UploadSessionSerializer, CallAnalysisSerializer,
+    CallAnalysisListSerializer, UtteranceSerializer, ReportSerializer, TrainingSessionSerializer
 )
-from .services.call_processor import CallProcessingService
-from .services.report_generator import ReportGenerator
-from .services.training import TrainingService
+from .services.job_queue import JobQueue
+from .services.leaderboard import PERIODS as LEADERBOARD_PERIODS, get_leaderboard
+from .uploads import file_digest
+from .audio_probe import recording_metadata
+from .renderers import EventStreamRenderer
+from .services.agent_performance import PERFORMANCE_WINDOWS, get_agent_performance
+from .services.api_limiter import api_limiter_stats
+from .services.llm_cache import get_llm_cache
+from .services.ingestion import RecordingIngestionService, IngestionError, PipelineSaturatedError
+from .services.chunked_upload import ChunkedUploadService, UploadError, UploadConflictError
+from .services.report_generator import get_report_generator
+from .services.report_metrics import agent_performance, daily_trend, issue_frequencies
+from .services.status_events import StatusEventStream, get_status_hub
+from .services.training import get_training_service
+from .services.transcription_webhooks import WEBHOOK_AUTH_HEADER, handle_transcript_callback, verify_webhook_secret
+
+
+def saturated_response(admission):
+    """Build the 503 response returned when uploads are rejected."""
+    return Response(
+        {
+            'error': 'Call processing pipeline is saturated, please retry later',
+            'pipeline': admission['stats']
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(admission['retry_after'])}
+    )
+
+
+class SparseFieldsetMixin:
+    """
+    Viewset mixin adding ``?fields=`` and ``?expand=`` to list and retrieve.
+    
+    Both take comma-separated field names. Lists use ``list_serializer_class``
+    unless fields are requested explicitly, and the queryset only loads the
+    columns and joins the serialized fields need (see SparseFieldsMixin).
+    """
+    list_serializer_class = None
+    
+    def get_serializer_class(self):
+        if (self.action == 'list' and self.list_serializer_class is not None
+                and 'fields' not in self.request.query_params):
+            return self.list_serializer_class
+        return super().get_serializer_class()
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        fields, expand = self.get_sparse_fieldset()
+        return self.get_serializer_class().optimize_queryset(queryset, fields, expand)
+    
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ('list', 'retrieve'):
+            kwargs['fields'], kwargs['expand'] = self.get_sparse_fieldset()
+        return super().get_serializer(*args, **kwargs)
+    
+    def get_sparse_fieldset(self):
+        """
+        Parse and validate the fields and expand query parameters.
+        
+        Returns:
+            tuple: Field names to serialize (None for all) and field names to expand
+        """
+        serializer_class = self.get_serializer_class()
+        params = self.request.query_params
+        fields = expand = None
+        if params.get('fields'):
+            fields = [name.strip() for name in params['fields'].split(',') if name.strip()]
+            unknown = sorted(set(fields) - set(serializer_class.Meta.fields))
+            if unknown:
+                raise ValidationError({'fields': [f"Unknown fields: {', '.join(unknown)}"]})
+        if params.get('expand'):
+            expand = [name.strip() for name in params['expand'].split(',') if name.strip()]
+            unknown = sorted(set(expand) - set(serializer_class.expandable_fields))
+            if unknown:
+                raise ValidationError({'expand': [
+                    f"Cannot expand {', '.join(unknown)}; expandable fields are "
+                    f"{', '.join(serializer_class.expandable_fields)}"
+                ]})
+        return fields, expand or []
 
 
 class AgentViewSet(viewsets.ModelViewSet):
     """API endpoint for managing agents."""
-    queryset = Agent.objects.all()
+    queryset = Agent.objects.select_related('user')
     serializer_class = AgentSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     @action(detail=True, methods=['get'])
     def performance(self, request, pk=None):
-        """Get performance metrics for an agent."""
-        agent = self.get_object()
+        """
+        Get performance metrics for an agent.
         
-        # Get basic metrics
-        total_calls = agent.call_analyses.count()
-        avg_score = agent.avg_coverage_score
-        
-        # Get recent calls
-        recent_calls = agent.call_recordings.order_by('-uploaded_at')[:5]
-        recent_call_data = CallRecordingSerializer(recent_calls, many=True).data
+        Query parameters:
+            window: Optional rolling window in days (7, 30 or 90); all time by default
+        """
+        agent = self.get_object()
         
-        # Get sentiment distribution
-        sentiment_counts = {
-            'positive': agent.call_analyses.filter(sentiment='positive').count(),
-            'neutral': agent.call_analyses.filter(sentiment='neutral').count(),
-            'negative': agent.call_analyses.filter(sentiment='negative').count(),
-        }
+        window = request.query_params.get('window')
+        if window is not None:
+            if window not in {str(days) for days in PERFORMANCE_WINDOWS}:
+                raise ValidationError({'window': [
+                    f"Must be one of {', '.join(str(days) for days in PERFORMANCE_WINDOWS)}"
+                ]})
+            window = int(window)
         
-        return Response({
-            'total_calls': total_calls,
-            'avg_coverage_score': avg_score,
-            'recent_calls': recent_call_data,
-            'sentiment_distribution': sentiment_counts
-        })
+        return Response(get_agent_performance(agent, window))
     
     @action(detail=False, methods=['get'])
     def leaderboard(self, request):
-        """Get a leaderboard of agents based on coverage scores."""
-        # Get top agents by coverage score (minimum 5 calls)
-        top_agents = Agent.objects.annotate(
-            calls_count=Count('call_analyses')
-        ).filter(
-            calls_count__gte=5
-        ).order_by('-avg_coverage_score')[:10]
-        
-        return Response(AgentSerializer(top_agents, many=True).data)
+        """
+        Get a leaderboard of agents based on coverage scores.
+        
+        Only agents with at least LEADERBOARD_MIN_CALLS analysed calls in the
+        period are ranked.
+        
+        Query parameters:
+            period: 'all' (default), 'week' or 'month'
+            date: Optional date (YYYY-MM-DD) within the period; today by default
+            department: Optional department to rank agents within
+            limit: Number of agents (1-100, default 10)
+        """
+        period = request.query_params.get('period', 'all')
+        if period not in LEADERBOARD_PERIODS:
+            raise ValidationError({'period': [f"Must be one of {', '.join(LEADERBOARD_PERIODS)}"]})
+        
+        day = None
+        if request.query_params.get('date'):
+            day = parse_date(request.query_params['date'])
+            if day is None:
+                raise ValidationError({'date': ["Expected a date as YYYY-MM-DD"]})
+        
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= 100:
+            raise ValidationError({'limit': ["Must be an integer from 1 to 100"]})
+        
+        entries = get_leaderboard(
+            period=period, day=day, department=request.query_params.get('department'), limit=limit
+        )
+        return Response(LeaderboardEntrySerializer(entries, many=True, context={'request': request}).data)
     
     @action(detail=False, methods=['get'])
     def me(self, request):
@@ -78,7 +178,7 @@ class AgentViewSet(viewsets.ModelViewSet):
             )
 
 
-class CallRecordingViewSet(viewsets.ModelViewSet):
+class CallRecordingViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """API endpoint for managing call recordings."""
     queryset = CallRecording.objects.all()
     serializer_class = CallRecordingSerializer
@@ -87,51 +187,421 @@ class CallRecordingViewSet(viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         """Upload a new call recording."""
+        job_queue = JobQueue()
+        
+        # Turn the upload away before storing it if the pipeline is saturated
+        admission = job_queue.admit()
+        if not admission['admitted']:
+            return saturated_response(admission)
+        
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        recording = serializer.save()
+        audio = serializer.validated_data['file']
+        recording = serializer.save(audio_sha256=file_digest(audio), **recording_metadata(audio))
         
-        # Start processing the call
-        call_processor = CallProcessingService()
-        call_processor.process_call_recording(recording.id)
+        # Queue the call for the processing workers
+        job_queue.enqueue(recording.id, delay=admission['delay'])
+        
+        if admission['deferred']:
+            return Response(
+                {**serializer.data, 'deferred': True},
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Retry-After': str(admission['retry_after'])}
+            )
         
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    @action(detail=False, methods=['post'])
+    def bulk_upload(self, request):
+        """
+        Upload a batch of call recordings.
+        
+        Accepts either several `files` or a zip `archive`. An optional
+        `manifest` (JSON or CSV, or manifest.csv/manifest.json inside the
+        archive) supplies title, employee_id and customer_phone per file name;
+        `agent` or `employee_id` sets the agent for files not in the manifest.
+        """
+        ingestion_service = RecordingIngestionService()
+        files = request.FILES.getlist('files')
+        archive = request.FILES.get('archive')
+        
+        if not files and not archive:
+            return Response(
+                {'error': 'Provide recordings as files or a zip archive'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Resolve the agent used for files without a manifest entry
+        default_agent = None
+        if request.data.get('agent'):
+            default_agent = get_object_or_404(Agent, id=request.data['agent'])
+        elif request.data.get('employee_id'):
+            default_agent = get_object_or_404(Agent, employee_id=request.data['employee_id'])
+        
+        try:
+            manifest = None
+            manifest_data = request.FILES.get('manifest') or request.data.get('manifest')
+            if manifest_data:
+                if hasattr(manifest_data, 'read'):
+                    manifest = ingestion_service.parse_manifest(manifest_data.read(), manifest_data.name)
+                else:
+                    manifest = ingestion_service.parse_manifest(manifest_data)
+            
+            if archive:
+                result = ingestion_service.ingest_archive(archive, manifest, default_agent)
+            else:
+                result = ingestion_service.ingest_files(files, manifest, default_agent)
+        except PipelineSaturatedError as e:
+            return saturated_response(e.admission)
+        except IngestionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        headers = {}
+        if result['deferred']:
+            response_status = status.HTTP_202_ACCEPTED
+            headers['Retry-After'] = str(result['retry_after'])
+        elif result['created']:
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        
+        return Response({
+            'created': result['created'],
+            'failed': result['failed'],
+            'deferred': result['deferred'],
+            'results': result['results']
+        }, status=response_status, headers=headers)
+    
     @action(detail=True, methods=['get'])
     def analysis_status(self, request, pk=None):
         """Get the current status of a call analysis."""
         recording = self.get_object()
         
+        # Report where the recording sits in the processing queue
+        job = recording.processing_jobs.order_by('-created_at').first()
+        queue_position = JobQueue().position(job) if job else None
+        
         # Check if analysis exists
         try:
             analysis = recording.analysis
             return Response({
                 'status': recording.status,
                 'analysis_id': analysis.id if analysis else None,
-                'completed': recording.status == 'completed'
+                'completed': recording.status == 'completed',
+                'queue_position': queue_position
             })
         except CallAnalysis.DoesNotExist:
             return Response({
                 'status': recording.status,
                 'analysis_id': None,
-                'completed': False
+                'completed': False,
+                'queue_position': queue_position
             })
+    
+    # Most recordings one status request may watch
+    STATUS_WATCH_MAX_RECORDINGS = 100
+    
+    @action(detail=False, methods=['get'])
+    def status_updates(self, request):
+        """
+        Long-poll for status changes of one or more recordings.
+        
+        ``ids`` lists the recordings as ``id`` or ``id:status``, the status
+        being the one the client last saw. The request returns as soon as a
+        recording's status differs from it (immediately for recordings given
+        without a status), or with an empty list after ``timeout`` seconds.
+        """
+        known = self._watch_list(request)
+        
+        try:
+            timeout = float(request.query_params.get('timeout', settings.CALL_STATUS_LONG_POLL_TIMEOUT))
+        except ValueError:
+            raise ValidationError({'timeout': ['A number of seconds is required.']})
+        timeout = min(max(timeout, 0), settings.CALL_STATUS_LONG_POLL_TIMEOUT)
+        
+        hub = get_status_hub()
+        recording_ids = list(known)
+        current = hub.watch(recording_ids)
+        # When too many requests are blocking threads, answer at once
+        reserved = timeout > 0 and hub.reserve_thread()
+        try:
+            if not current:
+                return Response({'error': 'No such call recordings'}, status=status.HTTP_404_NOT_FOUND)
+            # Recordings that do not exist are left out
+            changes = hub.wait(
+                {recording_id: known[recording_id] for recording_id in current},
+                timeout if reserved else 0
+            )
+        finally:
+            if reserved:
+                hub.release_thread()
+            hub.unwatch(recording_ids)
+        
+        headers = {}
+        if timeout > 0 and not reserved:
+            headers['Retry-After'] = str(settings.CALL_STATUS_BUSY_RETRY_AFTER)
+        return Response({
+            'recordings': [
+                {'id': recording_id, 'status': recording_status}
+                for recording_id, recording_status in changes.items()
+            ]
+        }, headers=headers)
+    
+    @action(detail=False, methods=['get'], renderer_classes=[EventStreamRenderer, JSONRenderer])
+    def status_stream(self, request):
+        """
+        Stream status changes of one or more recordings as server-sent events.
+        
+        ``ids`` lists the recordings to watch. Each change is sent as a
+        ``status`` event with the recording's id and status.
+        """
+        known = self._watch_list(request)
+        
+        recording_ids = list(
+            CallRecording.objects.filter(id__in=list(known)).values_list('id', flat=True)
+        )
+        if not recording_ids:
+            return Response({'error': 'No such call recordings'}, status=status.HTTP_404_NOT_FOUND)
+        
+        stream = StatusEventStream(recording_ids)
+        # Under ASGI the stream waits in the event loop instead of holding a thread
+        is_asgi = isinstance(request._request, ASGIRequest)
+        response = StreamingHttpResponse(
+            stream.__aiter__() if is_asgi else iter(stream),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    def _watch_list(self, request):
+        """Parse the ``ids`` parameter into a dict of recording ID to last seen status."""
+        known = {}
+        try:
+            for entry in request.query_params.get('ids', '').split(','):
+                if entry.strip():
+                    recording_id, _, recording_status = entry.strip().partition(':')
+                    known[int(recording_id)] = recording_status or None
+        except ValueError:
+            raise ValidationError({'ids': ['A comma-separated list of recording IDs is required.']})
+        
+        if not known or len(known) > self.STATUS_WATCH_MAX_RECORDINGS:
+            raise ValidationError({'ids': [f"Between 1 and {self.STATUS_WATCH_MAX_RECORDINGS} recording IDs are required."]})
+        return known
+    
+    @action(detail=False, methods=['get'])
+    def pipeline_status(self, request):
+        """Get the current load and admission limits of the processing pipeline."""
+        return Response({
+            **JobQueue().stats(),
+            'llm_cache': get_llm_cache().stats(),
+            'api_limits': api_limiter_stats()
+        })
 
 
-class CallAnalysisViewSet(viewsets.ReadOnlyModelViewSet):
+class UploadSessionViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.ListModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    API endpoint for resumable chunked uploads of call recordings.
+    
+    Create a session with the file's size (and optionally its SHA-256), PUT
+    the file to `chunk/` in pieces with an `Upload-Offset` header, and POST to
+    `finalize/` once every byte has arrived. After a dropped connection, GET
+    the session to find the offset to resume from.
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def perform_create(self, serializer):
+        try:
+            serializer.instance = ChunkedUploadService().create_session(
+                created_by=self.request.user,
+                **serializer.validated_data
+            )
+        except UploadError as e:
+            raise ValidationError({'total_size': [str(e)]})
+    
+    def destroy(self, request, *args, **kwargs):
+        """Abort an upload session and discard the data received so far."""
+        session = self.get_object()
+        try:
+            ChunkedUploadService().abort(session.id)
+        except UploadConflictError as e:
+            return self._conflict_response(e)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        """Append the raw request body to the upload at the given offset."""
+        session = self.get_object()
+        
+        offset = request.headers.get('Upload-Offset', request.query_params.get('offset'))
+        try:
+            offset = int(offset)
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'An integer Upload-Offset header and a Content-Length are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if length <= 0:
+            return Response(
+                {'error': 'Chunks must be sent with a Content-Length'},
+                status=status.HTTP_411_LENGTH_REQUIRED
+            )
+        
+        try:
+            # Read the body straight from the request stream, bypassing the parsers
+            session = ChunkedUploadService().append_chunk(session.id, offset, request.stream, length)
+        except UploadConflictError as e:
+            return self._conflict_response(e)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(
+            {
+                'offset': session.received_bytes,
+                'complete': session.received_bytes == session.total_size
+            },
+            headers={'Upload-Offset': str(session.received_bytes)}
+        )
+    
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Verify the checksum, create the call recording and queue it for processing."""
+        session = self.get_object()
+        
+        try:
+            result = ChunkedUploadService().finalize(session.id, request.data.get('sha256'))
+        except PipelineSaturatedError as e:
+            return saturated_response(e.admission)
+        except UploadConflictError as e:
+            return self._conflict_response(e)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        recording_data = CallRecordingSerializer(result['recording'], context={'request': request}).data
+        admission = result['admission']
+        
+        if admission is None:
+            # Retried finalize of a completed session
+            return Response(recording_data)
+        
+        if admission['deferred']:
+            return Response(
+                {**recording_data, 'deferred': True},
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Retry-After': str(admission['retry_after'])}
+            )
+        
+        return Response(recording_data, status=status.HTTP_201_CREATED)
+    
+    def _conflict_response(self, error):
+        """Build the 409 response telling the client where to resume."""
+        return Response(
+            {'error': str(error), 'offset': error.offset},
+            status=status.HTTP_409_CONFLICT,
+            headers={'Upload-Offset': str(error.offset)}
+        )
+
+
+class TranscriptionWebhookView(APIView):
+    """
+    Callback for the transcription engine, called when a submitted transcript completes.
+    
+    Authenticated by the shared secret in the `X-Webhook-Secret` header rather
+    than a user token. Wakes the job waiting for the transcript, which fetches
+    it and carries on with the analysis.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    
+    def post(self, request):
+        if not verify_webhook_secret(request.headers.get(WEBHOOK_AUTH_HEADER)):
+            return Response({'error': 'Invalid webhook secret'}, status=status.HTTP_403_FORBIDDEN)
+        
+        transcript_id = request.data.get('transcript_id')
+        if not transcript_id:
+            raise ValidationError({'transcript_id': ['This field is required.']})
+        
+        if not handle_transcript_callback(str(transcript_id)):
+            return Response({'error': 'Unknown transcript'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'status': 'ok'})
+
+
+class CallAnalysisViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """API endpoint for retrieving call analyses."""
     queryset = CallAnalysis.objects.all()
     serializer_class = CallAnalysisSerializer
+    list_serializer_class = CallAnalysisListSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    # Most utterances returned by one timeline request
+    TIMELINE_DEFAULT_LIMIT = 200
+    TIMELINE_MAX_LIMIT = 1000
+    
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """
+        Return the utterances of a call that overlap a time range.
+        
+        Query parameters (milliseconds from the start of the call): ``start``
+        (default 0), ``end`` (default: end of the call) and ``limit``. If more
+        utterances fall in the range than the limit, ``next_start`` is the
+        start of the first one left out, to request the next page from.
+        """
+        # Only the id is needed; skip loading the transcript text columns
+        analysis = get_object_or_404(self.get_queryset().only('id'), pk=pk)
+        self.check_object_permissions(request, analysis)
+        
+        try:
+            start = int(request.query_params.get('start', 0))
+            end = request.query_params.get('end')
+            end = int(end) if end is not None else None
+            limit = int(request.query_params.get('limit', self.TIMELINE_DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {'error': 'start, end and limit must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if start < 0 or (end is not None and end <= start) or limit <= 0:
+            return Response(
+                {'error': 'start must be non-negative, end greater than start and limit positive'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = min(limit, self.TIMELINE_MAX_LIMIT)
+        
+        utterances = analysis.utterances.filter(end_ms__gt=start)
+        if end is not None:
+            utterances = utterances.filter(start_ms__lt=end)
+        # One extra row tells whether the range holds more than the limit
+        utterances = list(utterances.order_by('start_ms', 'position')[:limit + 1])
+        
+        next_start = None
+        if len(utterances) > limit:
+            next_start = utterances[limit].start_ms
+            utterances = utterances[:limit]
+        
+        return Response({
+            'start': start,
+            'end': end,
+            'next_start': next_start,
+            'utterances': UtteranceSerializer(utterances, many=True).data
+        })
+    
     @action(detail=True, methods=['get'])
     def download_report(self, request, pk=None):
         """Download the Excel report for a call analysis."""
         analysis = self.get_object()
         
         # Generate report if it doesn't exist
-        report_generator = ReportGenerator()
-        report_path = report_generator.generate_call_report(analysis)
+        report_path = get_report_generator().generate_call_report(analysis)
         
         if report_path and os.path.exists(report_path):
             return FileResponse(
@@ -177,6 +647,9 @@ class ReportViewSet(viewsets.ModelViewSet):
             created_at__date__lte=end_date
         )
         
+        # The Calls sheet shows each analysis with its recording and agent
+        sheet_analyses = call_analyses.select_related('call_recording', 'agent__user')
+        
         # Create report object
         report = Report.objects.create(
             title=f"{report_type.capitalize()} Report ({start_date} to {end_date})",
@@ -186,9 +659,8 @@ class ReportViewSet(viewsets.ModelViewSet):
         )
         
         # Generate Excel report
-        report_generator = ReportGenerator()
-        excel_path = report_generator.generate_aggregate_report(
-            report_type, start_date, end_date, call_analyses
+        excel_path = get_report_generator().generate_aggregate_report(
+            report_type, start_date, end_date, sheet_analyses
         )
         
         if excel_path:
@@ -196,37 +668,14 @@ class ReportViewSet(viewsets.ModelViewSet):
             with open(excel_path, 'rb') as f:
                 report.excel_file.save(os.path.basename(excel_path), f)
             
-            # Calculate aggregated metrics
-            agent_performance = {}
-            for agent in Agent.objects.all():
-                agent_analyses = call_analyses.filter(agent=agent)
-                if agent_analyses.exists():
-                    agent_performance[agent.user.get_full_name()] = {
-                        'call_count': agent_analyses.count(),
-                        'avg_score': agent_analyses.aggregate(Avg('coverage_score'))['coverage_score__avg']
-                    }
-            
-            # Identify common issues
-            all_issues = []
-            for analysis in call_analyses:
-                if isinstance(analysis.key_issues, list):
-                    all_issues.extend(analysis.key_issues)
-            
-            issue_counts = {}
-            for issue in all_issues:
-                if issue in issue_counts:
-                    issue_counts[issue] += 1
-                else:
-                    issue_counts[issue] = 1
-            
-            common_issues = [
-                {'issue': issue, 'count': count}
-                for issue, count in sorted(issue_counts.items(), key=lambda x: x[1], reverse=True)
-            ][:10]  # Top 10 issues
+            # Agents and daily trends come from the daily stats rollup, issues from the analyses
+            performance = agent_performance(start_date, end_date)
+            common_issues = issue_frequencies(call_analyses, limit=10)
             
             # Update report with aggregated data
-            report.agent_performance = agent_performance
+            report.agent_performance = performance
             report.common_issues = common_issues
+            report.trend_analysis = {'daily': daily_trend(start_date, end_date)}
             report.save()
             
             return Response(ReportSerializer(report).data)
@@ -280,8 +729,7 @@ class TrainingSessionViewSet(viewsets.ModelViewSet):
         session.save()
         
         # Evaluate the response
-        training_service = TrainingService()
-        result = training_service.evaluate_response(session)
+        result = get_training_service().evaluate_response(session)
         
         if result['success']:
             return Response(TrainingSessionSerializer(session).data)
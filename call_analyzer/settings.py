@@ -197,6 +197,20 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Hash uploads while they are received so duplicates can be detected
+FILE_UPLOAD_HANDLERS = [
+    'analyzer.uploads.HashingMemoryFileUploadHandler',
+    'analyzer.uploads.HashingTemporaryFileUploadHandler',
+]
+
+# Resumable chunked uploads: partial files live here until the upload is finalized
+CHUNKED_UPLOAD_TEMP_DIR = os.getenv('CHUNKED_UPLOAD_TEMP_DIR', os.path.join(MEDIA_ROOT, 'upload_sessions'))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', str(4 * 1024 ** 3)))
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', str(32 * 1024 ** 2)))
+CHUNKED_UPLOAD_EXPIRY = int(os.getenv('CHUNKED_UPLOAD_EXPIRY', str(24 * 60 * 60)))
+# Seconds after which a session left receiving or finalizing by a request that died is taken over
+CHUNKED_UPLOAD_STALL_TIMEOUT = int(os.getenv('CHUNKED_UPLOAD_STALL_TIMEOUT', '600'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -206,6 +220,133 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 ASSEMBLY_AI_API_KEY = os.getenv('ASSEMBLY_AI_API_KEY')
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 
+# Speech-to-text and analysis engines. 'local' selects deterministic offline
+# engines for development and benchmarks; a dotted path selects a custom class.
+TRANSCRIPTION_BACKEND = os.getenv('TRANSCRIPTION_BACKEND', 'assemblyai')  # 'assemblyai' or 'local'
+ANALYSIS_BACKEND = os.getenv('ANALYSIS_BACKEND', 'gemini')  # 'gemini' or 'local'
+
+# Transcribe recordings longer than TRANSCRIPTION_SEGMENT_MIN_DURATION seconds as
+# overlapping segments cut at silences, several at a time (WAV and MP3 only)
+TRANSCRIPTION_SEGMENTATION = os.getenv('TRANSCRIPTION_SEGMENTATION', 'False').lower() == 'true'
+TRANSCRIPTION_SEGMENT_MIN_DURATION = int(os.getenv('TRANSCRIPTION_SEGMENT_MIN_DURATION', '900'))
+TRANSCRIPTION_SEGMENT_SECONDS = int(os.getenv('TRANSCRIPTION_SEGMENT_SECONDS', '300'))
+TRANSCRIPTION_SEGMENT_OVERLAP = int(os.getenv('TRANSCRIPTION_SEGMENT_OVERLAP', '10'))
+TRANSCRIPTION_SEGMENT_CONCURRENCY = int(os.getenv('TRANSCRIPTION_SEGMENT_CONCURRENCY', '4'))
+
+# Alternative API servers (e.g. `manage.py load_test_pipeline` stand-ins); unset uses the real APIs
+ASSEMBLY_AI_BASE_URL = os.getenv('ASSEMBLY_AI_BASE_URL')
+ASSEMBLY_AI_POLLING_INTERVAL = float(os.getenv('ASSEMBLY_AI_POLLING_INTERVAL', '3'))
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT')
+
+# Webhook-driven transcription: with a public base URL of this app and a shared
+# secret, recordings are submitted to AssemblyAI and the worker moves on; the
+# job resumes when the completion webhook arrives. Jobs whose callback is missed
+# poll for their transcript every TRANSCRIPTION_WEBHOOK_POLL_INTERVAL seconds
+# and fail after TRANSCRIPTION_WEBHOOK_TIMEOUT seconds.
+TRANSCRIPTION_WEBHOOK_BASE_URL = os.getenv('TRANSCRIPTION_WEBHOOK_BASE_URL')
+TRANSCRIPTION_WEBHOOK_SECRET = os.getenv('TRANSCRIPTION_WEBHOOK_SECRET')
+TRANSCRIPTION_WEBHOOK_POLL_INTERVAL = float(os.getenv('TRANSCRIPTION_WEBHOOK_POLL_INTERVAL', '120'))
+TRANSCRIPTION_WEBHOOK_TIMEOUT = int(os.getenv('TRANSCRIPTION_WEBHOOK_TIMEOUT', '3600'))
+
+# Estimated token budget for the transcript embedded in the analysis prompt;
+# longer transcripts are compacted (filler, repeats, greetings, then the middle of the call)
+ANALYSIS_PROMPT_TOKEN_BUDGET = int(os.getenv('ANALYSIS_PROMPT_TOKEN_BUDGET', '8000'))
+
+# Analyse calls shorter than ANALYSIS_BATCH_MAX_DURATION seconds several per LLM
+# request, waiting up to ANALYSIS_BATCH_MAX_WAIT seconds for a batch to fill
+ANALYSIS_BATCHING = os.getenv('ANALYSIS_BATCHING', 'False').lower() == 'true'
+ANALYSIS_BATCH_SIZE = int(os.getenv('ANALYSIS_BATCH_SIZE', '8'))
+ANALYSIS_BATCH_MAX_WAIT = float(os.getenv('ANALYSIS_BATCH_MAX_WAIT', '2'))
+ANALYSIS_BATCH_MAX_DURATION = int(os.getenv('ANALYSIS_BATCH_MAX_DURATION', '120'))
+
+# Client-side limits on the external AI APIs, shared by all workers of a process:
+# calls per second (token bucket, 0 for no limit) with bursts of up to `burst`,
+# and the ceiling of the concurrency limit, which adapts to 429s and latency
+API_LIMITS = {
+    'assemblyai': {
+        'rate': float(os.getenv('ASSEMBLY_AI_RATE_LIMIT', '5')),
+        'burst': int(os.getenv('ASSEMBLY_AI_RATE_BURST', '10')),
+        'max_concurrency': int(os.getenv('ASSEMBLY_AI_MAX_CONCURRENCY', '32')),
+    },
+    'gemini': {
+        'rate': float(os.getenv('GEMINI_RATE_LIMIT', '10')),
+        'burst': int(os.getenv('GEMINI_RATE_BURST', '10')),
+        'max_concurrency': int(os.getenv('GEMINI_MAX_CONCURRENCY', '16')),
+    },
+}
+# Halve the concurrency limit when latency exceeds this multiple of the best observed (0 disables)
+API_LATENCY_TOLERANCE = float(os.getenv('API_LATENCY_TOLERANCE', '3'))
+# Rate-limited, timed-out and 5xx calls are retried with jittered exponential backoff
+API_RETRY_ATTEMPTS = int(os.getenv('API_RETRY_ATTEMPTS', '4'))
+API_RETRY_BASE_DELAY = float(os.getenv('API_RETRY_BASE_DELAY', '1'))
+API_RETRY_MAX_DELAY = float(os.getenv('API_RETRY_MAX_DELAY', '30'))
+# After this many consecutive failures a provider's circuit opens and calls are parked
+# back on the queue until a probe call succeeds, tried every API_CIRCUIT_RESET_TIMEOUT seconds
+API_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('API_CIRCUIT_FAILURE_THRESHOLD', '5'))
+API_CIRCUIT_RESET_TIMEOUT = float(os.getenv('API_CIRCUIT_RESET_TIMEOUT', '60'))
+
+# Call processing workers (see `manage.py run_call_workers`)
+CALL_WORKER_CONCURRENCY = int(os.getenv('CALL_WORKER_CONCURRENCY', '4'))
+CALL_WORKER_POLL_INTERVAL = float(os.getenv('CALL_WORKER_POLL_INTERVAL', '2'))
+CALL_WORKER_ENGINE = os.getenv('CALL_WORKER_ENGINE', 'threads')  # 'threads' or 'pipeline'
+CALL_JOB_LEASE_SECONDS = int(os.getenv('CALL_JOB_LEASE_SECONDS', '300'))
+CALL_JOB_REAP_INTERVAL = int(os.getenv('CALL_JOB_REAP_INTERVAL', '60'))
+CALL_JOB_MAX_ATTEMPTS = int(os.getenv('CALL_JOB_MAX_ATTEMPTS', '3'))
+CALL_JOB_RETRY_DELAY = int(os.getenv('CALL_JOB_RETRY_DELAY', '30'))
+
+# Concurrent workers per stage of the pipeline engine, and the number of calls
+# it holds at once (0 means twice the total number of stage workers)
+CALL_PIPELINE_CONCURRENCY = {
+    'transcription': int(os.getenv('CALL_PIPELINE_TRANSCRIPTION_CONCURRENCY', '8')),
+    'analysis': int(os.getenv('CALL_PIPELINE_ANALYSIS_CONCURRENCY', '4')),
+    'persistence': int(os.getenv('CALL_PIPELINE_PERSISTENCE_CONCURRENCY', '2')),
+    'report': int(os.getenv('CALL_PIPELINE_REPORT_CONCURRENCY', '2')),
+}
+CALL_PIPELINE_MAX_IN_FLIGHT = int(os.getenv('CALL_PIPELINE_MAX_IN_FLIGHT', '0'))
+
+# Admission control for the upload endpoints. A limit of 0 disables the check.
+CALL_PROCESSING_MAX_IN_FLIGHT = int(os.getenv('CALL_PROCESSING_MAX_IN_FLIGHT', '32'))
+CALL_PROCESSING_MAX_QUEUE_DEPTH = int(os.getenv('CALL_PROCESSING_MAX_QUEUE_DEPTH', '1000'))
+CALL_PROCESSING_RETRY_AFTER = int(os.getenv('CALL_PROCESSING_RETRY_AFTER', '60'))
+CALL_PROCESSING_OVERLOAD_POLICY = os.getenv('CALL_PROCESSING_OVERLOAD_POLICY', 'reject')  # 'reject' or 'defer'
+
+# Cache of Gemini responses: 'database' (shared by all processes), 'memory' or 'none'
+LLM_CACHE_BACKEND = os.getenv('LLM_CACHE_BACKEND', 'database')
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+
+# Push channel for recording status changes (long-poll and server-sent events).
+# Postgres delivers changes with LISTEN/NOTIFY; other databases are polled
+# once per CALL_STATUS_POLL_INTERVAL for all watched recordings together.
+CALL_STATUS_LONG_POLL_TIMEOUT = int(os.getenv('CALL_STATUS_LONG_POLL_TIMEOUT', '25'))
+CALL_STATUS_STREAM_MAX_DURATION = int(os.getenv('CALL_STATUS_STREAM_MAX_DURATION', '300'))
+CALL_STATUS_HEARTBEAT = int(os.getenv('CALL_STATUS_HEARTBEAT', '15'))
+CALL_STATUS_POLL_INTERVAL = float(os.getenv('CALL_STATUS_POLL_INTERVAL', '2'))
+# Most long-poll and (WSGI) stream requests one web process lets block a thread,
+# kept below gunicorn's thread count so other requests are always served; 0 for no limit
+CALL_STATUS_MAX_BLOCKING_REQUESTS = int(os.getenv('CALL_STATUS_MAX_BLOCKING_REQUESTS', '16'))
+# Seconds clients turned away by that limit are asked to wait before retrying
+CALL_STATUS_BUSY_RETRY_AFTER = int(os.getenv('CALL_STATUS_BUSY_RETRY_AFTER', '15'))
+
+# Seconds agent performance metrics are cached. Entries are invalidated when
+# the agent's call analyses change; the timeout bounds the staleness of rolling
+# windows and of the recent calls' statuses. Uses the default Django cache.
+AGENT_PERFORMANCE_CACHE_TIMEOUT = int(os.getenv('AGENT_PERFORMANCE_CACHE_TIMEOUT', '60'))
+
+# Analysed calls an agent needs in a period to be ranked on its leaderboard
+LEADERBOARD_MIN_CALLS = int(os.getenv('LEADERBOARD_MIN_CALLS', '5'))
+# Seconds between the call workers' re-ranking of leaderboard periods that changed
+LEADERBOARD_RANK_INTERVAL = int(os.getenv('LEADERBOARD_RANK_INTERVAL', '30'))
+
+# Maximum number of recordings accepted by one bulk upload
+BULK_UPLOAD_MAX_FILES = int(os.getenv('BULK_UPLOAD_MAX_FILES', '1000'))
+# Limits on the files in a bulk upload zip archive, checked against its
+# directory before anything is extracted: the uncompressed size of each file
+# and of all files, and the ratio of uncompressed to compressed size
+BULK_UPLOAD_MAX_FILE_SIZE = int(os.getenv('BULK_UPLOAD_MAX_FILE_SIZE', str(512 * 1024 ** 2)))
+BULK_UPLOAD_MAX_TOTAL_SIZE = int(os.getenv('BULK_UPLOAD_MAX_TOTAL_SIZE', str(4 * 1024 ** 3)))
+BULK_UPLOAD_MAX_COMPRESSION_RATIO = int(os.getenv('BULK_UPLOAD_MAX_COMPRESSION_RATIO', '100'))
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
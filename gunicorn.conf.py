@@ -0,0 +1,13 @@
+import os
+
+# Long-poll and server-sent event status requests hold a thread while they
+# wait, so each worker serves requests from a pool of threads instead of one
+# request at a time. CALL_STATUS_MAX_BLOCKING_REQUESTS keeps some of the
+# threads free for other requests.
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+
+# With threaded workers this bounds how long a worker may stop responding,
+# not how long a request, such as a status stream, may take
+timeout = 30